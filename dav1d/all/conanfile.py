@@ -0,0 +1,188 @@
+from conan import ConanFile
+from conan.errors import ConanInvalidConfiguration
+from conan.tools.apple import fix_apple_shared_install_name
+from conan.tools.env import VirtualBuildEnv
+from conan.tools.files import copy, rename, rmdir
+from conan.tools.layout import basic_layout
+from conan.tools.meson import Meson, MesonToolchain
+from conan.tools.microsoft import is_msvc
+import glob
+import os
+
+
+required_conan_version = ">=1.53.0"
+
+
+class Dav1dConan(ConanFile):
+    name = "dav1d"
+    version = "1.4.3"
+    url = "https://github.com/conan-io/conan-center-index"
+    description = "dav1d is a new AV1 cross-platform decoder, open-source, and focused on speed, size and correctness."
+    license = "BSD-2-Clause"
+    homepage = "https://code.videolan.org/videolan/dav1d"
+    topics = ("av1", "codec", "video", "decoding")
+    package_type = "library"
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.RecipeHelpers"
+    settings = "os", "arch", "compiler", "build_type"
+    options = {
+        "shared": [True, False],
+        "fPIC": [True, False],
+        "bit_depth": ["all", 8, 16],
+        "assembly": [True, False],
+        "with_tools": [True, False],
+        "logging": [True, False],
+        "section_gc": [True, False],
+        "fast_load": [True, False],
+        "cpu_tier": [None, "x86-64-v2", "x86-64-v3", "x86-64-v4", "armv8.2-a+dotprod", "armv8.2-a+dotprod+i8mm"],
+        "debug_symbols": [None, "split", "split_line_tables"],
+        "profiling": [True, False],
+        "wasm_simd": [True, False],
+        "wasm_threads": [True, False],
+    }
+    default_options = {
+        "shared": False,
+        "fPIC": True,
+        "bit_depth": "all",
+        "assembly": True,
+        "with_tools": False,
+        "logging": True,
+        "section_gc": False,
+        "fast_load": False,
+        "cpu_tier": None,
+        "debug_symbols": None,
+        "profiling": False,
+        "wasm_simd": True,
+        "wasm_threads": False,
+    }
+
+    @property
+    def _needs_nasm(self):
+        return self.options.assembly and self.settings.arch in ["x86", "x86_64"]
+
+    def config_options(self):
+        if self.settings.os == "Windows":
+            del self.options.fPIC
+        self._config_build_options()
+        if is_msvc(self) and self.settings.build_type == "Debug":
+            # debug builds with assembly often causes linker hangs or LNK1000
+            self.options.assembly = False
+
+    def configure(self):
+        if self.options.shared:
+            self.options.rm_safe("fPIC")
+        self._configure_build_options()
+        self.settings.rm_safe("compiler.libcxx")
+        self.settings.rm_safe("compiler.cppstd")
+
+    def layout(self):
+        basic_layout(self, src_folder="src")
+
+    def validate(self):
+        self._validate_build_options()
+        if self.settings.os == "Emscripten":
+            # meson's dependency('threads') always adds -pthread for Emscripten
+            if not self.options.wasm_threads:
+                raise ConanInvalidConfiguration(f"{self.ref} requires wasm_threads=True on Emscripten")
+
+    def build_requirements(self):
+        self.tool_requires("meson/1.4.1")
+        if self._needs_nasm:
+            self.tool_requires("nasm/2.16.01")
+
+    def source(self):
+        with self._build_phase("source"):
+            self._get_sources()
+
+    def generate(self):
+        self._save_reproducible_env()
+        env = VirtualBuildEnv(self)
+        env.generate()
+
+        tc = MesonToolchain(self)
+        tc.project_options["enable_tests"] = False
+        tc.project_options["enable_examples"] = False
+        tc.project_options["enable_docs"] = False
+        # NEON on arm/aarch64 and SSSE3/AVX2/AVX-512 on x86 are picked at runtime from the detected cpu
+        tc.project_options["enable_asm"] = bool(self.options.assembly)
+        tc.project_options["enable_tools"] = bool(self.options.with_tools)
+        tc.project_options["logging"] = bool(self.options.logging)
+        if self.options.bit_depth == "all":
+            tc.project_options["bitdepths"] = ["8", "16"]
+        else:
+            tc.project_options["bitdepths"] = [str(self.options.bit_depth)]
+        if self.options.section_gc:
+            tc.extra_cflags.extend(self._section_gc_cflags)
+            if self.options.shared:
+                tc.extra_ldflags.extend(self._section_gc_ldflags)
+        if self.options.get_safe("fast_load"):
+            tc.extra_cflags.extend(self._fast_load_cflags)
+            tc.extra_ldflags.extend(self._fast_load_ldflags)
+        if self.options.get_safe("cpu_tier"):
+            tc.extra_cflags.extend(self._cpu_tier_cflags)
+        if self.options.get_safe("debug_symbols"):
+            tc.extra_cflags.extend(self._debug_symbols_cflags)
+            tc.extra_ldflags.extend(self._debug_symbols_ldflags)
+        if self.options.get_safe("profiling"):
+            tc.extra_cflags.extend(self._profiling_cflags)
+        tc.extra_cflags.extend(self._reproducible_cflags)
+        tc.extra_cflags.extend(self._wasm_cflags)
+        tc.extra_ldflags.extend(self._wasm_ldflags)
+        if self._phase_timing:
+            tc.extra_cflags.extend(self._time_trace_cflags)
+        tc.extra_ldflags.extend(self._linker_ldflags + self._link_timer_ldflags())
+        tc.generate()
+
+    def build(self):
+        with self._build_phase("patch"):
+            self._replace_in_file_once(os.path.join(self.source_folder, "meson.build"), "subdir('doc')", "")
+        meson = Meson(self)
+        with self._build_phase("configure"):
+            meson.configure()
+        with self._build_phase("build"):
+            meson.build()
+        if self._phase_timing and self._time_trace_cflags:
+            self._save_time_trace()
+        if self._phase_timing and self._linker:
+            self._save_link_times()
+
+    def _fix_msvc_libname(self):
+        # meson names static libraries libdav1d.a, also with cl like compilers
+        if not is_msvc(self):
+            return
+        libdir = os.path.join(self.package_folder, "lib")
+        for ext in [".dll.a", ".dll.lib", ".a"]:
+            for filepath in glob.glob(os.path.join(libdir, f"*{ext}")):
+                libname = os.path.basename(filepath)[0:-len(ext)]
+                if libname[0:3] == "lib":
+                    libname = libname[3:]
+                rename(self, filepath, os.path.join(libdir, f"{libname}.lib"))
+
+    def package(self):
+        copy(self, "COPYING", src=self.source_folder, dst=os.path.join(self.package_folder, "licenses"))
+        meson = Meson(self)
+        with self._build_phase("install"):
+            meson.install()
+        rmdir(self, os.path.join(self.package_folder, "lib", "pkgconfig"))
+        fix_apple_shared_install_name(self)
+        self._fix_msvc_libname()
+        self._normalize_archives()
+        if self.options.get_safe("debug_symbols"):
+            with self._build_phase("split_debug_symbols"):
+                self._split_debug_symbols()
+        self._report_build_phases()
+
+    def package_info(self):
+        self.cpp_info.set_property("pkg_config_name", "dav1d")
+        self.cpp_info.libs = ["dav1d"]
+        if self.options.section_gc:
+            self.cpp_info.exelinkflags.extend(self._section_gc_ldflags)
+            self.cpp_info.sharedlinkflags.extend(self._section_gc_ldflags)
+        if self.settings.os in ["FreeBSD", "Linux"]:
+            self.cpp_info.system_libs.extend(["dl", "pthread"])
+        elif self.settings.os == "Android":
+            self.cpp_info.system_libs.append("dl")
+        if self.options.get_safe("wasm_threads"):
+            self.cpp_info.cflags.append("-pthread")
+            self.cpp_info.cxxflags.append("-pthread")
+            self.cpp_info.exelinkflags.extend(self._wasm_ldflags)
@@ -0,0 +1,46 @@
+from conan import ConanFile
+from conan.tools.build import can_run
+from conan.tools.cmake import CMake, CMakeToolchain, cmake_layout
+from io import StringIO
+import json
+import os
+
+
+class TestPackageConan(ConanFile):
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.TestPackageHelpers"
+    settings = "os", "arch", "compiler", "build_type"
+    generators = "CMakeDeps", "VirtualRunEnv"
+    test_type = "explicit"
+
+    def layout(self):
+        cmake_layout(self)
+
+    def requirements(self):
+        self.requires(self.tested_reference_str)
+
+    def generate(self):
+        tc = CMakeToolchain(self)
+        tc.extra_exelinkflags.extend(self._linker_ldflags)
+        tc.generate()
+
+    def build(self):
+        cmake = CMake(self)
+        cmake.configure()
+        cmake.build()
+
+    def test(self):
+        if can_run(self):
+            command = self._command("test_package")
+            # clip.ivf: 48 frames of 640x360 8-bit 4:2:0, encoded with SVT-AV1 (crf 40, keyint 24)
+            clip = os.path.join(self.source_folder, "clip.ivf")
+            report = {"name": "dav1d", "decode": {},
+                      "profiling": bool(self.dependencies["dav1d"].options.get_safe("profiling"))}
+            # 1 thread, then dav1d's default of one thread per logical cpu
+            for threads in (1, 0):
+                output = StringIO()
+                self.run(f"{command} {clip} {threads}", stdout=output, env="conanrun")
+                result = json.loads(output.getvalue().strip().splitlines()[-1])
+                report["decode"]["auto" if threads == 0 else str(threads)] = result
+                self.output.info(f"dav1d: {result['fps']:.1f} fps with threads={threads or 'auto'}")
+            self.output.info(f"benchmark: {json.dumps(report, sort_keys=True)}")
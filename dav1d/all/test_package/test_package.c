@@ -0,0 +1,170 @@
+/*
+ * Decodes an AV1 stream in an IVF container with dav1d and prints one JSON line with the speed.
+ * usage: test_package <stream.ivf> [threads, 0 = dav1d's default] [minimum seconds]
+ * The stream is decoded repeatedly until the minimum time has passed, so short clips give stable numbers.
+ */
+#include <dav1d/dav1d.h>
+
+#include <errno.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+typedef struct Frame {
+    const uint8_t *data;
+    size_t size;
+} Frame;
+
+static double now(void)
+{
+    struct timespec ts;
+#ifdef _WIN32
+    timespec_get(&ts, TIME_UTC);
+#else
+    /* monotonic, unlike TIME_UTC; timespec_get() also needs Android API 29 and iOS 13 */
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+#endif
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+static uint32_t read_le32(const uint8_t *p)
+{
+    return p[0] | (p[1] << 8) | (p[2] << 16) | ((uint32_t)p[3] << 24);
+}
+
+static uint8_t *read_file(const char *path, size_t *size)
+{
+    FILE *f = fopen(path, "rb");
+    uint8_t *data = NULL;
+    long length;
+
+    if (!f)
+        return NULL;
+    if (fseek(f, 0, SEEK_END) == 0 && (length = ftell(f)) > 0 && fseek(f, 0, SEEK_SET) == 0) {
+        data = malloc(length);
+        if (data && fread(data, 1, length, f) != (size_t)length) {
+            free(data);
+            data = NULL;
+        }
+        *size = length;
+    }
+    fclose(f);
+    return data;
+}
+
+/* the 32 byte IVF file header is followed by frames, each with a 12 byte header: size and pts */
+static int parse_ivf(const uint8_t *data, size_t size, Frame **frames, int *width, int *height)
+{
+    size_t offset, header_size;
+    int count = 0;
+
+    if (size < 32 || memcmp(data, "DKIF", 4) != 0 || memcmp(data + 8, "AV01", 4) != 0)
+        return -1;
+    header_size = data[6] | (data[7] << 8);
+    *width = data[12] | (data[13] << 8);
+    *height = data[14] | (data[15] << 8);
+    *frames = malloc(sizeof(Frame) * (size / 12 + 1));
+    if (!*frames)
+        return -1;
+    for (offset = header_size; offset + 12 <= size; count++) {
+        size_t frame_size = read_le32(data + offset);
+        if (offset + 12 + frame_size > size)
+            break;
+        (*frames)[count].data = data + offset + 12;
+        (*frames)[count].size = frame_size;
+        offset += 12 + frame_size;
+    }
+    return count;
+}
+
+static void no_free(const uint8_t *data, void *cookie)
+{
+    (void)data;
+    (void)cookie;
+}
+
+static int get_pictures(Dav1dContext *ctx, long long *pictures)
+{
+    Dav1dPicture picture;
+    int res;
+
+    for (;;) {
+        memset(&picture, 0, sizeof(picture));
+        res = dav1d_get_picture(ctx, &picture);
+        if (res == DAV1D_ERR(EAGAIN))
+            return 0;
+        if (res < 0)
+            return res;
+        dav1d_picture_unref(&picture);
+        (*pictures)++;
+    }
+}
+
+static int decode(Dav1dContext *ctx, const Frame *frames, int count, long long *pictures)
+{
+    Dav1dData data;
+    int i, res;
+
+    for (i = 0; i < count; i++) {
+        memset(&data, 0, sizeof(data));
+        if (dav1d_data_wrap(&data, frames[i].data, frames[i].size, no_free, NULL) < 0)
+            return -1;
+        while (data.sz > 0) {
+            res = dav1d_send_data(ctx, &data);
+            if (res < 0 && res != DAV1D_ERR(EAGAIN))
+                return res;
+            if ((res = get_pictures(ctx, pictures)) < 0)
+                return res;
+        }
+    }
+    return 0;
+}
+
+int main(int argc, char **argv)
+{
+    const char *path = argc > 1 ? argv[1] : "clip.ivf";
+    int threads = argc > 2 ? atoi(argv[2]) : 0;
+    double min_seconds = argc > 3 ? atof(argv[3]) : 1.0;
+    Dav1dSettings settings;
+    Dav1dContext *ctx = NULL;
+    Frame *frames = NULL;
+    uint8_t *file;
+    size_t size = 0;
+    long long pictures = 0;
+    int count, width, height, loops = 0, res = 0;
+    double start, seconds;
+
+    printf("dav1d %s\n", dav1d_version());
+    file = read_file(path, &size);
+    if (!file || (count = parse_ivf(file, size, &frames, &width, &height)) <= 0) {
+        fprintf(stderr, "%s: not an AV1 IVF file\n", path);
+        return 1;
+    }
+
+    dav1d_default_settings(&settings);
+    settings.n_threads = threads;
+    if (dav1d_open(&ctx, &settings) < 0)
+        return 1;
+
+    start = now();
+    do {
+        res = decode(ctx, frames, count, &pictures);
+        loops++;
+    } while (res == 0 && now() - start < min_seconds);
+    if (res == 0)
+        res = get_pictures(ctx, &pictures);
+    seconds = now() - start;
+    dav1d_close(&ctx);
+
+    if (res < 0 || pictures != (long long)count * loops) {
+        fprintf(stderr, "decoded %lld of %lld frames (error %d)\n", pictures, (long long)count * loops, res);
+        return 1;
+    }
+    printf("{\"threads\": %d, \"width\": %d, \"height\": %d, \"frames\": %lld, \"seconds\": %.4f, \"fps\": %.2f}\n",
+           threads, width, height, pictures, seconds, pictures / seconds);
+    free(frames);
+    free(file);
+    return 0;
+}
@@ -1,20 +1,25 @@
 from conan import ConanFile, conan_version
-from conan.errors import ConanInvalidConfiguration
-from conan.tools.apple import is_apple_os
-from conan.tools.build import cross_building
+from conan.errors import ConanException, ConanInvalidConfiguration
+from conan.tools.apple import is_apple_os, XCRun
+from conan.tools.build import can_run, cross_building
 from conan.tools.env import Environment, VirtualBuildEnv, VirtualRunEnv
 from conan.tools.files import (
-    apply_conandata_patches, chdir, copy, export_conandata_patches, get, rename,
-    replace_in_file, rm, rmdir, save, load
+    chdir, copy, export_conandata_patches, rename, rm, rmdir, save, load
 )
 from conan.tools.gnu import Autotools, AutotoolsDeps, AutotoolsToolchain, PkgConfigDeps
 from conan.tools.layout import basic_layout
 from conan.tools.microsoft import check_min_vs, is_msvc, unix_path
 from conan.tools.scm import Version
+from io import StringIO
+import fnmatch
 import os
 import glob
+import json
 import shutil
 import re
+import sys
+import textwrap
+
 
 required_conan_version = ">=1.57.0"
 
@@ -30,11 +35,24 @@ class FFMpegConan(ConanFile):
     topics = ("multimedia", "audio", "video", "encoder", "decoder", "encoding", "decoding",
               "transcoding", "multiplexer", "demultiplexer", "streaming")
     package_type = "library"
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.RecipeHelpers"
     settings = "os", "arch", "compiler", "build_type"
     options = {
         # 编译参数
         "shared": [True, False], # 是否构建动态库。如果为True，则构建共享库（so、DLL）
         "fPIC": [True, False], # 是否为静态库添加位置无关代码（Position Independent Code）。通常在构建共享库时需要启用此选项
+        "monolithic": [True, False], # 是否将所有组件及静态依赖链接为单个动态库（libffmpeg.so），仅导出公开的 av*/sws*/swr* 接口（需要 shared=True）
+        "archive_mode": ["normal", "merged", "thin"], # 静态库的归档方式：normal 每个组件一个 .a；merged 将所有组件及静态依赖合并为单个 libffmpeg_static.a；thin 只引用构建目录中目标文件的 thin archive，仅用于本地开发构建（需要 shared=False）
+        "fast_load": [True, False], # 是否为动态库启用加载期优化（RELR 打包重定位、GNU hash、-fno-semantic-interposition，Android 下 16KB 页对齐），仅 ELF 平台
+        "hardcoded_tables": [True, False], # 是否在编译期生成 AAC、MPEG audio、sin/cos、cbrt 等码表（只读常量），省去首次打开编解码器时的初始化开销，代价是库体积变大
+        "cpu_tier": [None, "x86-64-v2", "x86-64-v3", "x86-64-v4", "armv8.2-a+dotprod", "armv8.2-a+dotprod+i8mm"], # 编译器生成代码所面向的 CPU 档位（透传为 --cpu=，即 -march），为空表示 arch 的基线指令集
+        "debug_symbols": [None, "split", "split_line_tables"], # 拆分调试信息：-g 编译（split_line_tables 只保留行号表），安装后 objcopy/dsymutil 把调试信息移到包的 metadata 中，包本身只含剥离后的二进制
+        "profiling": [True, False], # 保留帧指针（-fno-omit-frame-pointer -mno-omit-leaf-frame-pointer）并生成异步展开表，优化级别不变，使 perf/simpleperf 能在发布版本中采集完整调用栈
+        "wasm_simd": [True, False], # Emscripten：以 -msimd128 编译，让 clang 把循环自动向量化为 wasm SIMD 指令（浏览器/Node 需支持 SIMD）
+        "wasm_threads": [True, False], # Emscripten：以 -pthread 编译（共享内存，运行时需要 SharedArrayBuffer），启用 ffmpeg 的多线程编解码；整个依赖图必须一致
+        "checkasm": [False, "check", "bench"], # 构建后编译并运行 tests/checkasm 校验汇编实现的正确性；bench 额外记录各函数 C 与 SIMD 的耗时比，保存到 res/checkasm_bench.json；check 不影响 package id
+        "section_gc": [True, False], # 是否按函数/数据分段编译（-ffunction-sections -fdata-sections），并向使用方导出链接期段回收参数
         # 原生参数
         "avdevice": [True, False], # 是否包含libavdevice库，该库提供了设备输入和输出支持
         "avcodec": [True, False], # 是否包含libavcodec库，该库提供了编解码器支持
@@ -83,6 +101,7 @@ class FFMpegConan(ConanFile):
         "with_mediacodec": [True, False], # 是否启用MediaCodec支持，用于Android上的硬件编解码
         "with_xlib": [True, False], # 是否启用Xlib支持，用于X窗口系统
         # 编码器、解码器和其他组件的控制
+        "preset": [None, "full", "rtmp_push_audio_video", "mp4_record_audio_video", "audio_only_playback"], # 预设的组件组合，在 --disable-everything 的基础上只启用该场景需要的组件
         "disable_everything": [True, False], # 是否禁用FFmpeg中的所有组件，通常用于精细控制启用哪些组件
         "disable_all_encoders": [True, False], # 是否禁用所有编码器
         "disable_encoders": [None, "ANY"], # 禁用指定的编码器（采用逗号分隔的编码器列表）
@@ -122,6 +141,17 @@ class FFMpegConan(ConanFile):
     default_options = {
         "shared": False,
         "fPIC": True,
+        "monolithic": False,
+        "archive_mode": "normal",
+        "fast_load": False,
+        "hardcoded_tables": False,
+        "cpu_tier": None,
+        "debug_symbols": None,
+        "profiling": False,
+        "wasm_simd": True,
+        "wasm_threads": False,
+        "checkasm": False,
+        "section_gc": False,
         "avdevice": True,
         "avcodec": True,
         "avformat": True,
@@ -162,11 +192,12 @@ class FFMpegConan(ConanFile):
         "with_programs": False,
         "with_libsvtav1": False,
         "with_libaom": False,
-        "with_libdav1d": False,
+        "with_libdav1d": True,
         "with_libdrm": False,
         "with_jni": False,
         "with_mediacodec": False,
         "with_xlib": False,
+        "preset": None,
         "disable_everything": False,
         "disable_all_encoders": False,
         "disable_encoders": None,
@@ -242,6 +273,125 @@ class FFMpegConan(ConanFile):
             "with_xlib": ["avdevice"],
         }
 
+    @property
+    def _presets(self):
+        # Component sets for the workloads we ship. A preset builds with --disable-everything and enables
+        # only the listed components; "requires" are the options the preset cannot work without.
+        return {
+            "full": None,
+            "rtmp_push_audio_video": {
+                "requires": ["avcodec", "avformat", "swresample", "with_libx264", "with_libfdk_aac"],
+                "components": {
+                    "encoders": ["libx264", "libfdk_aac", "aac", "pcm_s16le"],
+                    "decoders": ["aac", "mp3", "pcm_s16le"],
+                    "muxers": ["flv", "wav", "adts"],
+                    "demuxers": ["flv", "wav", "aac"],
+                    "parsers": ["aac", "h264"],
+                    "bitstream_filters": ["aac_adtstoasc", "h264_mp4toannexb"],
+                    "protocols": ["rtmp", "file"],
+                },
+            },
+            "mp4_record_audio_video": {
+                "requires": ["avcodec", "avformat", "swresample", "swscale", "with_libx264", "with_libfdk_aac"],
+                "components": {
+                    "encoders": ["libx264", "libfdk_aac"],
+                    "muxers": ["mp4", "mov"],
+                    "parsers": ["aac", "h264"],
+                    "bitstream_filters": ["aac_adtstoasc", "h264_mp4toannexb"],
+                    "protocols": ["file"],
+                },
+            },
+            "audio_only_playback": {
+                # the https and tls protocols need a TLS library
+                "requires": ["avcodec", "avformat", "swresample", "with_ssl"],
+                "components": {
+                    "decoders": ["aac", "aac_latm", "mp3", "mp3float", "flac", "vorbis", "opus", "pcm_s16le", "pcm_f32le"],
+                    "demuxers": ["aac", "mp3", "wav", "flac", "ogg", "mov", "flv"],
+                    "parsers": ["aac", "aac_latm", "mpegaudio", "flac", "vorbis", "opus"],
+                    "protocols": ["file", "http", "https", "tcp", "tls"],
+                },
+            },
+        }
+
+    @property
+    def _preset(self):
+        return self._presets[str(self.options.preset)] if self.options.preset else None
+
+    @property
+    def _component_flags(self):
+        return {
+            "encoders": "encoder",
+            "decoders": "decoder",
+            "hardware_accelerators": "hwaccel",
+            "muxers": "muxer",
+            "demuxers": "demuxer",
+            "parsers": "parser",
+            "bitstream_filters": "bsf",
+            "protocols": "protocol",
+            "input_devices": "indev",
+            "output_devices": "outdev",
+            "filters": "filter",
+        }
+
+    @property
+    def _component_declarations(self):
+        # file and symbol suffix configure reads each component list from, e.g. "ff_aac_encoder" -> aac
+        return {
+            "encoders": ("libavcodec/allcodecs.c", "encoder"),
+            "decoders": ("libavcodec/allcodecs.c", "decoder"),
+            "hardware_accelerators": ("libavcodec/hwaccels.h", "hwaccel"),
+            "muxers": ("libavformat/allformats.c", "muxer"),
+            "demuxers": ("libavformat/allformats.c", "demuxer"),
+            "parsers": ("libavcodec/parsers.c", "parser"),
+            "bitstream_filters": ("libavcodec/bitstream_filters.c", "bsf"),
+            "protocols": ("libavformat/protocols.c", "protocol"),
+            "input_devices": ("libavdevice/alldevices.c", "demuxer"),
+            "output_devices": ("libavdevice/alldevices.c", "muxer"),
+            "filters": ("libavfilter/allfilters.c", None),
+        }
+
+    @property
+    def _external_codec_options(self):
+        # options pulling in an external library, and the ffmpeg components that library backs
+        return {
+            "with_libx264": ["libx264", "libx264rgb"],
+            "with_libx265": ["libx265"],
+            "with_openh264": ["libopenh264"],
+            "with_libvpx": ["libvpx_vp8", "libvpx_vp9"],
+            "with_libmp3lame": ["libmp3lame"],
+            "with_libfdk_aac": ["libfdk_aac"],
+            "with_opus": ["libopus"],
+            "with_vorbis": ["libvorbis"],
+            "with_libwebp": ["libwebp", "libwebp_anim"],
+            "with_openjpeg": ["libopenjpeg"],
+            "with_libaom": ["libaom_av1", "libaom"],
+            "with_libdav1d": ["libdav1d"],
+            "with_libsvtav1": ["libsvtav1"],
+        }
+
+    @property
+    def _monolithic_exports(self):
+        # public API of every component; avpriv_* and ff_* stay internal to the single library
+        return ["av_*", "avio_*", "avcodec_*", "avformat_*", "avfilter_*", "avdevice_*", "avutil_*",
+                "avsubtitle_free", "sws_*", "swr_*", "swresample_*", "swscale_*", "postproc_*", "pp_*"]
+
+    @property
+    def _enabled_libraries(self):
+        # static link order: dependents before their dependencies
+        return [lib for lib in ("avdevice", "avfilter", "avformat", "avcodec", "postproc", "swresample", "swscale", "avutil")
+                if lib == "avutil" or self.options.get_safe(lib)]
+
+    def _scrub_build_paths(self, config_h):
+        # FFMPEG_CONFIGURATION, returned by avcodec_configuration() and `ffmpeg -buildconf`, is the
+        # configure line: compiler, sysroot and dependency paths of this very build
+        content = load(self, config_h)
+        scrubbed = content
+        for path, mapped in self._reproducible_paths.items():
+            scrubbed = scrubbed.replace(unix_path(self, path), mapped).replace(path, mapped)
+        if scrubbed != content:
+            # only when changed, config.h is included everywhere
+            save(self, config_h, scrubbed)
+
     @property
     def _version_supports_libsvtav1(self):
         return Version(self.version) >= "5.1.0"
@@ -252,6 +402,7 @@ class FFMpegConan(ConanFile):
     def config_options(self):
         if self.settings.os == "Windows":
             del self.options.fPIC
+        self._config_build_options()
         if self.settings.os not in ["Linux", "FreeBSD"]:
             del self.options.with_vaapi
             del self.options.with_vdpau
@@ -281,6 +432,8 @@ class FFMpegConan(ConanFile):
     def configure(self):
         if self.options.shared:
             self.options.rm_safe("fPIC")
+            self.options.rm_safe("archive_mode")
+        self._configure_build_options()
         self.settings.rm_safe("compiler.cppstd")
         self.settings.rm_safe("compiler.libcxx")
 
@@ -288,69 +441,119 @@ class FFMpegConan(ConanFile):
         basic_layout(self, src_folder="src")
 
     def requirements(self):
+        # libffmpeg_static.a already carries the static dependencies, consumers must not link them again
+        libs = {"transitive_libs": False} if self._archive_mode == "merged" else {}
         if self.options.with_zlib:
-            self.requires("zlib/[>=1.2.11 <2]")
+            self.requires("zlib/[>=1.2.11 <2]", **libs)
         if self.options.with_bzip2:
-            self.requires("bzip2/1.0.8")
+            self.requires("bzip2/1.0.8", **libs)
         if self.options.with_lzma:
-            self.requires("xz_utils/5.4.5")
+            self.requires("xz_utils/5.4.5", **libs)
         if self.options.with_libiconv:
-            self.requires("libiconv/1.17")
+            self.requires("libiconv/1.17", **libs)
         if self.options.with_freetype:
-            self.requires("freetype/2.13.2")
+            self.requires("freetype/2.13.2", **libs)
         if self.options.with_openjpeg:
-            self.requires("openjpeg/2.5.2")
+            self.requires("openjpeg/2.5.2", **libs)
         if self.options.with_openh264:
-            self.requires("openh264/2.4.1")
+            self.requires("openh264/2.4.1", **libs)
         if self.options.with_vorbis:
-            self.requires("vorbis/1.3.7")
+            self.requires("vorbis/1.3.7", **libs)
         if self.options.with_opus:
-            self.requires("opus/1.4")
+            self.requires("opus/1.4", **libs)
         if self.options.with_zeromq:
-            self.requires("zeromq/4.3.5")
+            self.requires("zeromq/4.3.5", **libs)
         if self.options.with_sdl:
-            self.requires("sdl/2.28.5")
+            self.requires("sdl/2.28.5", **libs)
         if self.options.with_libx264:
-            self.requires("libx264/cci.20240224")
+            self.requires("libx264/cci.20240224", **libs)
         if self.options.with_libx265:
-            self.requires("libx265/3.4")
+            self.requires("libx265/3.4", **libs)
         if self.options.with_libvpx:
-            self.requires("libvpx/1.14.1")
+            self.requires("libvpx/1.14.1", **libs)
         if self.options.with_libmp3lame:
-            self.requires("libmp3lame/3.100")
+            self.requires("libmp3lame/3.100", **libs)
         if self.options.get_safe("with_libfdk_aac"):
-            self.requires("libfdk_aac/2.0.3")
+            self.requires("libfdk_aac/2.0.3", **libs)
         if self.options.with_libwebp:
-            self.requires("libwebp/1.3.2")
+            self.requires("libwebp/1.3.2", **libs)
         if self.options.with_ssl == "openssl":
-            # self.requires("openssl/[>=1.1 <4]")
-            self.requires("openssl/3.3.1")
+            # self.requires("openssl/[>=1.1 <4]", **libs)
+            self.requires("openssl/3.3.1", **libs)
         if self.options.get_safe("with_libalsa"):
-            self.requires("libalsa/1.2.10")
+            self.requires("libalsa/1.2.10", **libs)
         if self.options.get_safe("with_xcb") or self.options.get_safe("with_xlib"):
-            self.requires("xorg/system")
+            self.requires("xorg/system", **libs)
         if self.options.get_safe("with_pulse"):
-            self.requires("pulseaudio/14.2")
+            self.requires("pulseaudio/14.2", **libs)
         if self.options.get_safe("with_vaapi"):
-            self.requires("vaapi/system")
+            self.requires("vaapi/system", **libs)
         if self.options.get_safe("with_vdpau"):
-            self.requires("vdpau/system")
+            self.requires("vdpau/system", **libs)
         if self.options.get_safe("with_vulkan"):
-            self.requires("vulkan-loader/1.3.243.0")
+            self.requires("vulkan-loader/1.3.243.0", **libs)
         if self.options.get_safe("with_libsvtav1"):
-            self.requires("libsvtav1/2.1.0")
+            self.requires("libsvtav1/2.1.0", **libs)
         if self.options.with_libaom:
-            self.requires("libaom-av1/3.6.1")
+            self.requires("libaom-av1/3.6.1", **libs)
         if self.options.get_safe("with_libdav1d"):
-            self.requires("dav1d/1.4.3")
+            self.requires("dav1d/1.4.3", **libs)
         if self.options.get_safe("with_libdrm"):
-            self.requires("libdrm/2.4.119")
+            self.requires("libdrm/2.4.119", **libs)
+
+    def package_id(self):
+        # The component lists are free-form strings, so "aac,mp3", "mp3,aac" and " aac, mp3" would be three
+        # package ids for the same binary. Store the configure result instead: sorted unique lists without
+        # the entries that cannot change it, and the disable_all_* flags implied by disable_everything/preset.
+        options = self.info.options
+        preset = self._presets[str(options.preset)] if options.preset else None
+        preset_components = preset["components"] if preset else {}
+        everything = bool(options.disable_everything) or preset is not None
+        all_disabled = {}
+        for group in self._component_flags:
+            disabled = options.get_safe(f"disable_all_{group}")
+            if group in ("input_devices", "output_devices"):
+                disabled = disabled or options.disable_all_devices
+            all_disabled[group] = everything or bool(disabled)
+        for group in self._component_flags:
+            by_preset = set(preset_components.get(group, []))
+            disabled = set(self._split_components(options.get_safe(f"disable_{group}")))
+            # user disables come last on the command line, so they win over enables and the preset
+            enabled = set(self._split_components(options.get_safe(f"enable_{group}"))) - disabled - by_preset
+            if all_disabled[group]:
+                disabled = {name for name in disabled
+                            if any(self._components_overlap(name, other) for other in enabled | by_preset)}
+            setattr(options, f"enable_{group}", ",".join(sorted(enabled)) or None)
+            setattr(options, f"disable_{group}", ",".join(sorted(disabled)) or None)
+            setattr(options, f"disable_all_{group}", all_disabled[group])
+        options.disable_all_devices = all_disabled["input_devices"] and all_disabled["output_devices"]
+        options.disable_everything = all(all_disabled.values())
+        # checkasm=check only tests the binaries, bench also packages its timings
+        if options.checkasm == "check":
+            options.checkasm = False
+        # preset=full configures exactly like no preset
+        if options.preset == "full":
+            options.preset = None
 
     def validate(self):
+        self._validate_build_options()
+
         if self.options.with_ssl == "securetransport" and not is_apple_os(self):
             raise ConanInvalidConfiguration(
                 "securetransport is only available on Apple")
 
+        preset = self._preset
+        if preset is not None:
+            for option in preset["requires"]:
+                if not self.options.get_safe(option):
+                    raise ConanInvalidConfiguration(
+                        f"FFmpeg preset '{self.options.preset}' requires '{option}' option to be enabled")
+            codecs = set(preset["components"].get("encoders", []) + preset["components"].get("decoders", []))
+            for option, components in self._external_codec_options.items():
+                if self.options.get_safe(option) and not codecs.intersection(components):
+                    self.output.warning(f"FFmpeg preset '{self.options.preset}' does not use '{option}', "
+                                        f"disable it to avoid building and linking an unused library")
+
         for dependency, features in self._dependencies.items():
             if not self.options.get_safe(dependency):
                 continue
@@ -361,6 +564,45 @@ class FFMpegConan(ConanFile):
                 raise ConanInvalidConfiguration("FFmpeg '{}' option requires '{}' option to be enabled".format(
                     dependency, "' or '".join(features)))
 
+        if self.options.checkasm and not self.options.with_asm:
+            raise ConanInvalidConfiguration("FFmpeg 'checkasm' option requires 'with_asm' option to be enabled")
+
+        # configure looks for aacEncOpen() to enable libfdk-aac at all
+        if self.options.get_safe("with_libfdk_aac") and not self.dependencies["libfdk_aac"].options.get_safe("encoder", True):
+            raise ConanInvalidConfiguration("FFmpeg 'with_libfdk_aac' option requires libfdk_aac/*:encoder=True")
+
+        if self.settings.os == "Emscripten":
+            if self.options.with_asm:
+                raise ConanInvalidConfiguration("FFmpeg 'with_asm' option is not supported on Emscripten, there is no wasm assembly")
+            # a module has either shared or private memory, every object in it has to agree
+            for dependency in self.dependencies.host.values():
+                wasm_threads = dependency.options.get_safe("wasm_threads")
+                if wasm_threads is not None and str(wasm_threads) != str(self.options.wasm_threads):
+                    raise ConanInvalidConfiguration(
+                        f"FFmpeg 'wasm_threads={self.options.wasm_threads}' requires "
+                        f"{dependency.ref.name}/*:wasm_threads={self.options.wasm_threads}")
+
+        if self.options.monolithic:
+            if not self.options.shared:
+                raise ConanInvalidConfiguration("FFmpeg 'monolithic' option requires 'shared' option to be enabled")
+            if is_msvc(self) or self.settings.os == "Windows":
+                raise ConanInvalidConfiguration("FFmpeg 'monolithic' option is not supported on Windows")
+            for dependency in self.dependencies.host.values():
+                if dependency.options.get_safe("shared"):
+                    raise ConanInvalidConfiguration(
+                        f"FFmpeg 'monolithic' option requires static dependencies, but {dependency.ref.name} is shared")
+
+        if self._archive_mode != "normal":
+            if is_msvc(self):
+                raise ConanInvalidConfiguration(f"FFmpeg 'archive_mode={self._archive_mode}' is not supported with MSVC")
+            if self._archive_mode == "thin" and is_apple_os(self):
+                raise ConanInvalidConfiguration("FFmpeg 'archive_mode=thin' is not supported on Apple, its ar can't write thin archives")
+            if self._archive_mode == "merged":
+                for dependency in self.dependencies.host.values():
+                    if dependency.options.get_safe("shared"):
+                        raise ConanInvalidConfiguration(
+                            f"FFmpeg 'archive_mode=merged' requires static dependencies, but {dependency.ref.name} is shared")
+
         if Version(self.version) >= "6.1" and conan_version.major == 1 and is_msvc(self) and self.options.shared:
             # Linking fails with "Argument list too long" for some reason on Conan v1
             raise ConanInvalidConfiguration("MSVC shared build is not supported for Conan v1")
@@ -388,7 +630,8 @@ class FFMpegConan(ConanFile):
                 self.tool_requires("msys2/cci.latest")
 
     def source(self):
-        get(self, **self.conan_data["sources"][self.version], strip_root=True)
+        with self._build_phase("source"):
+            self._get_sources()
 
     @property
     def _target_arch(self):
@@ -397,6 +640,9 @@ class FFMpegConan(ConanFile):
             return "aarch64"
         elif self.settings.arch == "x86":
             return "i686"
+        elif self.settings.os == "Emscripten":
+            # configure has no wasm arch, a 32-bit x86 without asm only enables the C code
+            return "x86_32"
         return str(self.settings.arch)
 
     @property
@@ -418,13 +664,15 @@ class FFMpegConan(ConanFile):
         }.get(str(self.settings.os), "none")
 
     def _patch_sources(self):
-        apply_conandata_patches(self)
+        self._apply_conandata_patches_once()
         if Version(self.version) < "5.1":
             # suppress MSVC linker warnings: https://trac.ffmpeg.org/ticket/7396
             # warning LNK4049: locally defined symbol x264_levels imported
             # warning LNK4049: locally defined symbol x264_bit_depth imported
-            replace_in_file(self, os.path.join(self.source_folder, "libavcodec", "libx264.c"),
-                                  "#define X264_API_IMPORTS 1", "")
+            self._replace_in_file_once(os.path.join(self.source_folder, "libavcodec", "libx264.c"),
+                                       "#define X264_API_IMPORTS 1", "")
+        if self.options.get_safe("profiling"):
+            self._keep_frame_pointers(os.path.join(self.source_folder, "configure"))
         if self.options.with_ssl == "openssl":
             # https://trac.ffmpeg.org/ticket/5675
             openssl_libs = load(self, os.path.join(self.build_folder, "openssl_libs.list"))
@@ -466,6 +714,7 @@ class FFMpegConan(ConanFile):
         return tc
 
     def generate(self):
+        self._save_reproducible_env()
         env = VirtualBuildEnv(self)
         env.generate()
         if not cross_building(self):
@@ -479,6 +728,7 @@ class FFMpegConan(ConanFile):
             if v:
                 args.append(f"--disable-{what}")
 
+        self._validate_component_names()
         tc = self._create_toolchain()
 
         args = [
@@ -487,9 +737,12 @@ class FFMpegConan(ConanFile):
             opt_enable_disable("cross-compile", cross_building(self)),
             opt_enable_disable("asm", self.options.with_asm),
             # Libraries
-            opt_enable_disable("shared", self.options.shared),
-            opt_enable_disable("static", not self.options.shared),
+            # monolithic builds link the static archives into libffmpeg in build(); checkasm links the
+            # internal ff_* functions from them too, but `make checkasm` builds them itself when needed
+            opt_enable_disable("shared", self.options.shared and not self.options.monolithic),
+            opt_enable_disable("static", not self.options.shared or self.options.monolithic),
             opt_enable_disable("pic", self.options.get_safe("fPIC", True)),
+            opt_enable_disable("hardcoded-tables", self.options.hardcoded_tables),
             # Components
             opt_enable_disable("avdevice", self.options.avdevice),
             opt_enable_disable("avcodec", self.options.avcodec),
@@ -561,6 +814,15 @@ class FFMpegConan(ConanFile):
         opt_append_disable_if_set(args, "outdevs", self.options.disable_all_output_devices)
         opt_append_disable_if_set(args, "filters", self.options.disable_all_filters)
 
+        preset = self._preset
+        if preset is not None:
+            # must come before the user lists so that explicit enable/disable options still apply on top
+            if not self.options.disable_everything:
+                args.append("--disable-everything")
+            for group, components in preset["components"].items():
+                args.extend(self._split_and_format_options_string(
+                    f"enable-{self._component_flags[group]}", ",".join(components)))
+
         args.extend(self._split_and_format_options_string(
             "enable-encoder", self.options.enable_encoders))
         args.extend(self._split_and_format_options_string(
@@ -621,6 +883,14 @@ class FFMpegConan(ConanFile):
             ])
         if not self.options.with_programs:
             args.append("--disable-programs")
+        if self.options.get_safe("with_libfdk_aac") and not self.dependencies["libfdk_aac"].options.get_safe("decoder", True):
+            # the native aac decoder stays, the libfdk_aac one needs aacdecoder_lib.h
+            args.append("--disable-decoder=libfdk_aac")
+        if self.settings.os == "Emscripten":
+            # no cpuid on wasm, and without -pthread the pthread functions are stubs that fail
+            args.append("--disable-runtime-cpudetect")
+            if not self.options.wasm_threads:
+                args.append("--disable-pthreads")
         # since ffmpeg"s build system ignores CC and CXX
         compilers_from_conf = self.conf.get("tools.build:compiler_executables", default={}, check_type=dict)
         if self.settings.os == "Android":
@@ -647,7 +917,8 @@ class FFMpegConan(ConanFile):
         cxx = compilers_from_conf.get("cpp", buildenv_vars.get("CXX", self._default_compilers.get("cxx")))
         if cxx:
             args.append(f"--cxx={unix_path(self, cxx)}")
-        ld = buildenv_vars.get("LD") if not self.settings.os == "Android" else ""
+        # -fuse-ld is a compiler driver flag, a raw LD would get it too
+        ld = buildenv_vars.get("LD") if not self.settings.os == "Android" and not self._linker else ""
         if ld:
             args.append(f"--ld={unix_path(self, ld)}")
         ranlib = buildenv_vars.get("RANLIB")
@@ -669,6 +940,40 @@ class FFMpegConan(ConanFile):
             if self.settings.os == "iOS":
                 tc.extra_cflags.extend(["-Wno-implicit-function-declaration"])
                 print("WARNING: AppleClang 15+ requires -Wno-implicit-function-declaration")
+        if self.options.section_gc:
+            # Put every function/object in its own section so the final link can drop unused codecs and tables
+            tc.extra_cflags.extend(self._section_gc_cflags)
+            if self.options.shared:
+                tc.extra_ldflags.extend(self._section_gc_ldflags)
+        if self.options.get_safe("fast_load"):
+            # exports stay controlled by the libav*.ver (or monolithic ffmpeg.ver) version scripts
+            tc.extra_cflags.extend(self._fast_load_cflags)
+            tc.extra_ldflags.extend(self._fast_load_ldflags)
+        target_exec = self.conf.get("user.ffmpeg:target_exec", check_type=str)
+        if target_exec:
+            # emulator (e.g. "qemu-aarch64 -L <sysroot>") used to run test programs of cross builds
+            args.append(f"--target-exec={target_exec}")
+        if self.options.checkasm == "bench" and self.conf.get("user.ffmpeg:linux_perf", check_type=bool):
+            args.append("--enable-linux-perf")
+        if self.options.get_safe("cpu_tier"):
+            if is_msvc(self):
+                tc.extra_cflags.extend(self._cpu_tier_cflags)
+            else:
+                # configure turns --cpu into -march for both x86 and aarch64
+                args.append(f"--cpu={self.options.cpu_tier}")
+        if self.options.get_safe("debug_symbols"):
+            # passed after configure's own -g, so -g1 wins; install must not strip, package() splits instead
+            tc.extra_cflags.extend(self._debug_symbols_cflags)
+            tc.extra_ldflags.extend(self._debug_symbols_ldflags)
+            args.append("--disable-stripping")
+        if self.options.get_safe("profiling"):
+            tc.extra_cflags.extend(self._profiling_cflags)
+        tc.extra_cflags.extend(self._reproducible_cflags)
+        tc.extra_cflags.extend(self._wasm_cflags)
+        tc.extra_ldflags.extend(self._wasm_ldflags)
+        if self._phase_timing:
+            tc.extra_cflags.extend(self._time_trace_cflags)
+        tc.extra_ldflags.extend(self._linker_ldflags + self._link_timer_ldflags())
         if cross_building(self):
             args.append(f"--target-os={self._target_os}")
             if is_apple_os(self) and self.options.with_audiotoolbox:
@@ -733,35 +1038,321 @@ class FFMpegConan(ConanFile):
             openssl_libs = " ".join([f"-l{lib}" for lib in self.dependencies["openssl"].cpp_info.aggregated_components().libs])
             save(self, os.path.join(self.build_folder, "openssl_libs.list"), openssl_libs)
 
-    def _split_and_format_options_string(self, flag_name, options_list):
+    @staticmethod
+    def _split_components(options_list):
         if not options_list:
             return []
+        return list(filter(None, "".join(str(options_list).split()).split(",")))
+
+    @staticmethod
+    def _components_overlap(name, other):
+        # configure matches names as shell patterns; two patterns are assumed to overlap
+        if fnmatch.fnmatchcase(name, other) or fnmatch.fnmatchcase(other, name):
+            return True
+        return any(c in "*?[" for c in name) and any(c in "*?[" for c in other)
 
-        def _format_options_list_item(flag_name, options_item):
-            return f"--{flag_name}={options_item}"
+    def _available_components(self, group):
+        path, suffix = self._component_declarations[group]
+        path = os.path.join(self.source_folder, path)
+        if not os.path.isfile(path):
+            return None
+        # the patterns of configure's find_things_extern and find_filters_extern
+        if suffix is None:
+            # filters are declared as ff_<vf|af|asrc|...>_<name>; the buffer (sink) filters are
+            # declared with two spaces so that configure doesn't list them
+            pattern = r"^extern (?:const )?(?:AVFilter|FFFilter) ff_[avfsinkrc]{2,5}_(\w+);"
+        else:
+            # any type: "const AVHWAccel" up to 6.0, "const struct FFHWAccel" since 6.1
+            pattern = rf"^[^#\n]*extern.*[\s*]ff_(\w+)_{suffix};"
+        return re.findall(pattern, load(self, path), re.MULTILINE)
+
+    def _check_available_components(self):
+        # configure writes a CONFIG_<NAME>_<GROUP> switch for each component it read from the
+        # declaration files; a declaration the patterns above miss would reject valid names
+        configured = self._enabled_components(include_disabled=True)
+        mismatched = []
+        for group in self._component_flags:
+            available = self._available_components(group)
+            if available is None:
+                continue
+            missed = sorted(set(configured[group]) - set(available))
+            extra = sorted(set(available) - set(configured[group]))
+            if missed or extra:
+                mismatched.append(f"{group}: missed {', '.join(missed) or '-'}, not in configure {', '.join(extra) or '-'}")
+        if mismatched:
+            raise ConanException(f"{self.ref} reads other component names than configure: {'; '.join(mismatched)}")
 
-        def _split_options_string(options_string):
-            return list(filter(None, "".join(options_string.split()).split(",")))
+    def _validate_component_names(self):
+        # configure only warns about names that match nothing, and the build silently lacks the component
+        preset_components = self._preset["components"] if self._preset else {}
+        unknown = []
+        for group in self._component_flags:
+            available = self._available_components(group)
+            if available is None:
+                continue
+            names = preset_components.get(group, []) + self._split_components(self.options.get_safe(f"enable_{group}")) \
+                + self._split_components(self.options.get_safe(f"disable_{group}"))
+            for name in names:
+                if not fnmatch.filter(available, name):
+                    unknown.append(f"{group}: {name}")
+        if unknown:
+            raise ConanInvalidConfiguration(
+                f"{self.ref} doesn't have these components: {', '.join(unknown)}")
 
-        options_string = str(options_list)
-        return [_format_options_list_item(flag_name, item) for item in _split_options_string(options_string)]
+    def _split_and_format_options_string(self, flag_name, options_list):
+        return [f"--{flag_name}={item}" for item in self._split_components(options_list)]
 
     def build(self):
-        self._patch_sources()
+        with self._build_phase("patch"):
+            self._patch_sources()
         if self.options.with_libx264:
             # ffmepg expects libx264.pc instead of x264.pc
             with chdir(self, self.generators_folder):
                 shutil.copy("x264.pc", "libx264.pc")
         autotools = Autotools(self)
-        autotools.configure()
-        autotools.make()
+        with self._build_phase("configure"):
+            self._configure_once(autotools.configure, os.path.join(self.build_folder, "ffbuild", "config.mak"),
+                                 [os.path.join(self.source_folder, "configure"), self._patch_stamps_file])
+            if self.options.get_safe("profiling"):
+                self._check_frame_pointers(os.path.join(self.build_folder, "ffbuild", "config.mak"),
+                                           os.path.join(self.build_folder, "config.h"))
+            self._check_available_components()
+            self._scrub_build_paths(os.path.join(self.build_folder, "config.h"))
+        with self._build_phase("build"):
+            autotools.make(args=self._archive_make_args())
+        if self.options.monolithic:
+            with self._build_phase("link_monolithic"):
+                self._link_monolithic()
+        if self._archive_mode == "merged":
+            with self._build_phase("merge_archives"):
+                self._merge_archives()
+        if self._phase_timing and self._time_trace_cflags:
+            self._save_time_trace()
+        if self._phase_timing and self._linker:
+            self._save_link_times()
+        if self.options.checkasm:
+            with self._build_phase("checkasm"):
+                self._run_checkasm()
+        if self.conf.get("user.ffmpeg:fate", check_type=bool) and not self.conf.get("tools.build:skip_test", check_type=bool):
+            with self._build_phase("fate"):
+                self._run_fate()
+
+    def _link_monolithic(self):
+        # Reuse the compiler, flags and per-library EXTRALIBS computed by configure
+        libs = " ".join(self._enabled_libraries)
+        if is_apple_os(self):
+            save(self, os.path.join(self.build_folder, "ffmpeg.exp"),
+                 "".join(f"_{symbol}\n" for symbol in self._monolithic_exports))
+            link_flags = "-dynamiclib -install_name @rpath/$@ -Wl,-exported_symbols_list,ffmpeg.exp"
+            whole_archive = "$(foreach lib,$(MONOLITHIC_LIBS),-Wl,-force_load,$(lib))"
+        else:
+            exports = " ".join(f"{symbol};" for symbol in self._monolithic_exports)
+            save(self, os.path.join(self.build_folder, "ffmpeg.ver"), f"{{\n    global: {exports}\n    local: *;\n}};\n")
+            link_flags = "-shared -Wl,-soname,$@ -Wl,-Bsymbolic -Wl,--version-script,ffmpeg.ver"
+            whole_archive = "-Wl,--whole-archive $(MONOLITHIC_LIBS) -Wl,--no-whole-archive"
+        save(self, os.path.join(self.build_folder, "monolithic.mak"), textwrap.dedent(f"""\
+            include ffbuild/config.mak
+            MONOLITHIC_LIBS = $(foreach lib,{libs},lib$(lib)/$(LIBPREF)$(lib)$(LIBSUF))
+            MONOLITHIC_EXTRALIBS = $(foreach lib,{libs},$(EXTRALIBS-$(lib))) $(EXTRALIBS)
+
+            $(LIBPREF)ffmpeg$(SLIBSUF): $(MONOLITHIC_LIBS)
+            \t$(LD) {link_flags} $(LDFLAGS) $(LDSOFLAGS) $(LD_O) {whole_archive} $(MONOLITHIC_EXTRALIBS)
+        """))
+        autotools = Autotools(self)
+        autotools.make(args=["-f", "monolithic.mak"])
+
+    @property
+    def _archive_mode(self):
+        return str(self.options.get_safe("archive_mode", "normal"))
+
+    def _config_mak_var(self, name):
+        # the tools configure settled on, e.g. the AR that generate() passed as --ar
+        match = re.search(rf"^{name}=(.*)$", load(self, os.path.join(self.build_folder, "ffbuild", "config.mak")), re.MULTILINE)
+        return match[1].strip() if match else None
+
+    def _archive_make_args(self):
+        thin = self._archive_mode == "thin"
+        for lib in self._enabled_libraries:
+            archive = os.path.join(self.build_folder, f"lib{lib}", f"lib{lib}.a")
+            if os.path.isfile(archive):
+                with open(archive, "rb") as f:
+                    # left by a local build with the other archive_mode, make would keep it
+                    if (f.read(8) == b"!<thin>\n") != thin:
+                        os.unlink(archive)
+        # thin archives only reference the object files instead of copying them
+        return [f"ARFLAGS={self._config_mak_var('ARFLAGS')}T"] if thin else []
+
+    def _merge_archives(self):
+        archives = [os.path.join(self.build_folder, f"lib{lib}", f"lib{lib}.a") for lib in self._enabled_libraries]
+        for dependency in self.dependencies.host.values():
+            cpp_info = dependency.cpp_info.aggregated_components()
+            for lib in cpp_info.libs:
+                for libdir in cpp_info.libdirs:
+                    if os.path.isfile(os.path.join(libdir, f"lib{lib}.a")):
+                        archives.append(os.path.join(libdir, f"lib{lib}.a"))
+                        break
+        merged = os.path.join(self.build_folder, "libffmpeg_static.a")
+        if os.path.isfile(merged):
+            os.unlink(merged)
+        if is_apple_os(self):
+            self.run(f'"{XCRun(self).libtool}" -static -o "{merged}" ' + " ".join(f'"{archive}"' for archive in archives))
+        else:
+            # an MRI script keeps every member, even when two archives have objects with the same name
+            script = [f"CREATE {merged}"] + [f"ADDLIB {archive}" for archive in archives] + ["SAVE", "END"]
+            save(self, os.path.join(self.build_folder, "ffmpeg_static.mri"), "\n".join(script) + "\n")
+            self.run(f'{self._config_mak_var("AR")} -M < ffmpeg_static.mri', cwd=self.build_folder)
+
+    def _package_thin_archives(self):
+        # members of a thin archive are stored relative to it, so the installed copies would point
+        # into the package folder; recreate them with the absolute paths of the build folder objects
+        ar = self._config_mak_var("AR")
+        for lib in self._enabled_libraries:
+            output = StringIO()
+            self.run(f"{ar} t lib{lib}.a", stdout=output, cwd=os.path.join(self.build_folder, f"lib{lib}"))
+            members = [os.path.join(self.build_folder, f"lib{lib}", member) for member in output.getvalue().split()]
+            archive = os.path.join(self.package_folder, "lib", f"lib{lib}.a")
+            rm(self, f"lib{lib}.a", os.path.join(self.package_folder, "lib"))
+            self.run(f'{ar} {self._config_mak_var("ARFLAGS")}T "{archive}" ' + " ".join(f'"{member}"' for member in members))
+        self.output.warning(f"{self.ref} thin archives reference {self.build_folder}, "
+                            "the package is only usable on this machine and while that folder exists")
+
+    def _run_checkasm(self):
+        autotools = Autotools(self)
+        autotools.make(target="checkasm")
+        target_exec = self.conf.get("user.ffmpeg:target_exec", check_type=str)
+        if not target_exec and not can_run(self):
+            self.output.warning("checkasm is built but can't run, set 'user.ffmpeg:target_exec' to an emulator")
+            return
+        checkasm = os.path.join("tests", "checkasm", "checkasm")
+        if self.settings.os == "Windows":
+            checkasm += ".exe"
+        command = f"{target_exec} {checkasm}" if target_exec else checkasm
+        # checkasm exits with an error on the first C/SIMD mismatch, which fails the build
+        if self.options.checkasm == "bench":
+            output = StringIO()
+            self.run(f"{command} --bench", stdout=output)
+            self._save_checkasm_bench(output.getvalue())
+        else:
+            self.run(command)
+
+    def _save_checkasm_bench(self, output):
+        # lines look like "<function>_<cpu suffix>: <cycles>", the plain C version has the "c" suffix
+        cycles = {}
+        for line in output.splitlines():
+            match = re.match(r"^(\w+):\s+(\d+(?:\.\d+)?)", line.strip())
+            if match:
+                cycles[match.group(1)] = float(match.group(2))
+        reference = {name[:-2]: value for name, value in cycles.items() if name.endswith("_c")}
+        by_length = sorted(reference, key=len, reverse=True)
+        functions = {}
+        for name, value in cycles.items():
+            base = next((base for base in by_length if name.startswith(f"{base}_")), None)
+            if base is None:
+                continue
+            suffix = name[len(base) + 1:]
+            function = functions.setdefault(base, {"cycles": {}, "speedup": {}})
+            function["cycles"][suffix] = value
+            if suffix != "c" and value > 0:
+                function["speedup"][suffix] = round(reference[base] / value, 2)
+        report = {
+            "version": str(self.version),
+            "arch": str(self.settings.arch),
+            "cpu_tier": str(self.options.get_safe("cpu_tier")),
+            "linux_perf": bool(self.conf.get("user.ffmpeg:linux_perf", check_type=bool)),
+            "functions": functions,
+        }
+        save(self, os.path.join(self.build_folder, "checkasm_bench.json"), json.dumps(report, indent=2, sort_keys=True))
+        speedups = sorted(max(function["speedup"].values()) for function in functions.values() if function["speedup"])
+        if speedups:
+            self.output.info(f"checkasm: {len(speedups)} functions with SIMD versions, "
+                             f"median best speedup {speedups[len(speedups) // 2]:.2f}x")
+
+    def _fate_tests(self):
+        # Without SAMPLES, fate-list only contains tests that need no external samples, and its
+        # lists are conditional on the CONFIG_* of the enabled components
+        output = StringIO()
+        self.run("make fate-list", stdout=output)
+        tests = [line.strip() for line in output.getvalue().splitlines() if line.strip().startswith("fate-")]
+        patterns = self.conf.get("user.ffmpeg:fate_tests", default=["*"], check_type=list)
+        # fate-source checks the source tree, checkasm has its own option
+        excluded = ["fate-source", "fate-checkasm*"]
+        return [test for test in tests
+                if any(fnmatch.fnmatch(test, pattern) for pattern in patterns)
+                and not any(fnmatch.fnmatch(test, pattern) for pattern in excluded)]
+
+    def _run_fate(self):
+        if self._settings_build.os == "Windows":
+            self.output.warning("FATE timing isn't supported on Windows build machines")
+            return
+        if not self.conf.get("user.ffmpeg:target_exec", check_type=str) and not can_run(self):
+            self.output.warning("FATE can't run, set 'user.ffmpeg:target_exec' to an emulator")
+            return
+        tests = self._fate_tests()
+        if not tests:
+            self.output.warning("FATE: no offline test matches 'user.ffmpeg:fate_tests'")
+            return
+        # make runs every recipe line through $(SHELL), the wrapper times each fate-run.sh call
+        timings_log = os.path.join(self.build_folder, "fate_timings.log")
+        timer = os.path.join(self.build_folder, "fate_timer.py")
+        save(self, timings_log, "")
+        save(self, timer, textwrap.dedent(f"""\
+            #!{sys.executable}
+            import re, subprocess, sys, time
+            start = time.perf_counter()
+            status = subprocess.call(["/bin/sh"] + sys.argv[1:])
+            match = re.search(r"fate-run\\.sh\\s+(fate-[\\w.+-]+)", " ".join(sys.argv[1:]))
+            if match:
+                with open({timings_log!r}, "a") as log:
+                    log.write(f"{{match.group(1)}} {{time.perf_counter() - start:.4f}} {{status}}\\n")
+            sys.exit(status)
+        """))
+        os.chmod(timer, 0o755)
+        autotools = Autotools(self)
+        try:
+            autotools.make(target=" ".join(tests), args=["-k", f"SHELL={timer}"])
+        except ConanException:
+            pass  # failures are reported below, with the timings of every test that ran
+        results = {}
+        for line in load(self, timings_log).splitlines():
+            name, seconds, status = line.split()
+            results[name] = {"seconds": float(seconds), "status": "pass" if status == "0" else "fail"}
+        failed = sorted(name for name in tests if results.get(name, {}).get("status") != "pass")
+        report = {
+            "version": str(self.version),
+            "tests": results,
+            "total_seconds": round(sum(result["seconds"] for result in results.values()), 3),
+            "failed": failed,
+        }
+        save(self, os.path.join(self.build_folder, "fate_timings.json"), json.dumps(report, indent=2, sort_keys=True))
+        for name in sorted(results, key=lambda name: results[name]["seconds"], reverse=True)[:10]:
+            self.output.info(f"FATE: {name} {results[name]['seconds']:.2f}s")
+        self.output.info(f"FATE: {len(tests) - len(failed)}/{len(tests)} tests passed in {report['total_seconds']:.1f}s, "
+                         f"timings in {os.path.join(self.build_folder, 'fate_timings.json')}")
+        self.output.info("benchmark: " + json.dumps({"name": "fate", "version": report["version"], "tests": len(tests),
+                                                     "failed": len(failed), "total_seconds": report["total_seconds"]}))
+        if failed:
+            raise ConanException(f"FATE: {len(failed)} tests failed: {', '.join(failed)}")
 
     def package(self):
         copy(self, "LICENSE.md", src=self.source_folder, dst=os.path.join(self.package_folder, "licenses"))
         autotools = Autotools(self)
-        autotools.install()
+        with self._build_phase("install"):
+            # install runs ranlib on the copied archives, whose thin members would not resolve there
+            autotools.install(args=["RANLIB=true"] if self._archive_mode == "thin" else None)
         rmdir(self, os.path.join(self.package_folder, "lib", "pkgconfig"))
         rmdir(self, os.path.join(self.package_folder, "share"))
+        if self.options.shared and self.options.monolithic:
+            # static archives were only built for linking libffmpeg
+            rm(self, "*.a", os.path.join(self.package_folder, "lib"))
+        if self.options.monolithic:
+            libdir = os.path.join(self.package_folder, "lib")
+            copy(self, "libffmpeg.so", src=self.build_folder, dst=libdir, keep_path=False)
+            copy(self, "libffmpeg.dylib", src=self.build_folder, dst=libdir, keep_path=False)
+        if self._archive_mode == "merged":
+            rm(self, "*.a", os.path.join(self.package_folder, "lib"))
+            copy(self, "libffmpeg_static.a", src=self.build_folder, dst=os.path.join(self.package_folder, "lib"))
+        elif self._archive_mode == "thin":
+            self._package_thin_archives()
         if is_msvc(self):
             if self.options.shared:
                 # ffmpeg created `.lib` files in the `/bin` folder
@@ -775,6 +1366,48 @@ class FFMpegConan(ConanFile):
                 with chdir(self, os.path.join(self.package_folder, "lib")):
                     for lib in glob.glob("*.a"):
                         rename(self, lib, lib[3:-2] + ".lib")
+        if self.options.preset:
+            self._save_preset_report()
+        if self.options.checkasm == "bench":
+            copy(self, "checkasm_bench.json", src=self.build_folder, dst=os.path.join(self.package_folder, "res"))
+        self._normalize_archives()
+        if self.options.get_safe("debug_symbols"):
+            with self._build_phase("split_debug_symbols"):
+                self._split_debug_symbols()
+        self._report_build_phases()
+
+    def _enabled_components(self, include_disabled=False):
+        # since 6.0, component switches live in config_components.h instead of config.h
+        value = "[01]" if include_disabled else "1"
+        pattern = re.compile(rf"#define CONFIG_(\w+)_(ENCODER|DECODER|HWACCEL|MUXER|DEMUXER|PARSER|BSF|PROTOCOL|INDEV|OUTDEV|FILTER) {value}\b")
+        groups = {
+            "ENCODER": "encoders", "DECODER": "decoders", "HWACCEL": "hardware_accelerators",
+            "MUXER": "muxers", "DEMUXER": "demuxers", "PARSER": "parsers", "BSF": "bitstream_filters",
+            "PROTOCOL": "protocols", "INDEV": "input_devices", "OUTDEV": "output_devices", "FILTER": "filters",
+        }
+        enabled = {group: [] for group in groups.values()}
+        for header in ("config.h", "config_components.h"):
+            path = os.path.join(self.build_folder, header)
+            if os.path.isfile(path):
+                for match in pattern.finditer(load(self, path)):
+                    enabled[groups[match[2]]].append(match[1].lower())
+        return {group: sorted(set(names)) for group, names in enabled.items()}
+
+    def _save_preset_report(self):
+        sizes = {}
+        for folder in ("lib", "bin"):
+            path = os.path.join(self.package_folder, folder)
+            if os.path.isdir(path):
+                for fn in sorted(os.listdir(path)):
+                    if os.path.isfile(os.path.join(path, fn)) and not os.path.islink(os.path.join(path, fn)):
+                        sizes[f"{folder}/{fn}"] = os.path.getsize(os.path.join(path, fn))
+        report = {
+            "preset": str(self.options.preset),
+            "components": self._enabled_components(),
+            "sizes": sizes,
+            "total_size": sum(sizes.values()),
+        }
+        save(self, os.path.join(self.package_folder, "res", "preset_report.json"), json.dumps(report, indent=2))
 
     def _read_component_version(self, component_name):
         # since 5.1, major version may be defined in version_major.h instead of version.h
@@ -808,13 +1441,24 @@ class FFMpegConan(ConanFile):
             if self.options.with_sdl:
                 self.cpp_info.components["programs"].requires = ["sdl::libsdl2"]
 
+        single_library = self.options.monolithic or self._archive_mode == "merged"
+        if single_library:
+            # a single library carries every component; the per-library components below only
+            # keep their names (and headers) so that existing consumers still resolve
+            ffmpeg = self.cpp_info.components["ffmpeg"]
+            ffmpeg.set_property("pkg_config_name", "libffmpeg")
+            ffmpeg.libs = ["ffmpeg"] if self.options.monolithic else ["ffmpeg_static"]
+
         def _add_component(name, dependencies):
             component = self.cpp_info.components[name]
             component.set_property("pkg_config_name", f"lib{name}")
             self._set_component_version(name)
-            component.libs = [name]
+            if single_library:
+                component.requires = ["ffmpeg"]
+            else:
+                component.libs = [name]
             if name != "avutil":
-                component.requires = ["avutil"]
+                component.requires.append("avutil")
             for dep in dependencies:
                 if self.options.get_safe(dep):
                     component.requires.append(dep)
@@ -823,6 +1467,15 @@ class FFMpegConan(ConanFile):
             return component
 
         avutil = _add_component("avutil", [])
+        if self.options.section_gc:
+            # every component requires avutil, so consumers get the section GC link flags transitively
+            avutil.exelinkflags.extend(self._section_gc_ldflags)
+            avutil.sharedlinkflags.extend(self._section_gc_ldflags)
+        if self.options.get_safe("wasm_threads"):
+            # objects without -pthread can't be linked into a module with shared memory
+            avutil.cflags.append("-pthread")
+            avutil.cxxflags.append("-pthread")
+            avutil.exelinkflags.extend(self._wasm_ldflags)
         if self.options.avdevice:
             avdevice = _add_component("avdevice", ["avfilter", "swscale", "avformat", "avcodec", "swresample", "postproc"])
         if self.options.avfilter:
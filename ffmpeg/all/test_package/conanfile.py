@@ -1,12 +1,19 @@
 from conan import ConanFile
+from conan.errors import ConanException
 from conan.tools.build import can_run
-from conan.tools.cmake import CMake, cmake_layout
+from conan.tools.cmake import CMake, CMakeToolchain, cmake_layout
+from io import StringIO
+import glob
+import json
 import os
+import sys
 
 
 class TestPackageConan(ConanFile):
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.TestPackageHelpers"
     settings = "os", "arch", "compiler", "build_type"
-    generators = "CMakeDeps", "CMakeToolchain", "VirtualRunEnv"
+    generators = "CMakeDeps", "VirtualRunEnv"
     test_type = "explicit"
 
     def layout(self):
@@ -15,12 +22,118 @@ class TestPackageConan(ConanFile):
     def requirements(self):
         self.requires(self.tested_reference_str)
 
+    def generate(self):
+        tc = CMakeToolchain(self)
+        tc.cache_variables["SECTION_GC"] = bool(self.dependencies["ffmpeg"].options.section_gc)
+        tc.extra_exelinkflags.extend(self._linker_ldflags)
+        tc.generate()
+
     def build(self):
         cmake = CMake(self)
         cmake.configure()
         cmake.build()
 
+    def _report_section_gc(self):
+        with_gc = self._executable("test_package")
+        without_gc = self._executable("test_package_no_gc")
+        if self.settings.os == "Emscripten":
+            # the .js loader is the same either way, the code is in the .wasm
+            with_gc, without_gc = (os.path.splitext(path)[0] + ".wasm" for path in (with_gc, without_gc))
+        if not os.path.isfile(without_gc):
+            self.output.info(f"section_gc: test_package is {os.path.getsize(with_gc)} bytes")
+            return
+        size_gc = os.path.getsize(with_gc)
+        size_no_gc = os.path.getsize(without_gc)
+        reduction = 100.0 * (size_no_gc - size_gc) / size_no_gc if size_no_gc else 0.0
+        self.output.info(f"section_gc: test_package is {size_gc} bytes, {size_no_gc} bytes without "
+                         f"section garbage collection ({reduction:.1f}% smaller)")
+
+    def _report_fast_load(self):
+        # reads the ELF files only, so it also runs when cross-building
+        libraries = []
+        for dependency in self.dependencies.host.values():
+            for libdir in dependency.cpp_info.aggregated_components().libdirs:
+                libraries.extend(sorted(glob.glob(os.path.join(libdir, "*.so"))))
+        if not libraries:
+            return
+        script = self._repo_script("elf_report.py")
+        args = ["--require-gnu-hash"]
+        if self.settings.os == "Android":
+            args.append("--min-page-size=16384")
+        self.run(" ".join([f'"{sys.executable}"', f'"{script}"'] + args + [f'"{lib}"' for lib in libraries]))
+
+    def _run_startup_bench(self):
+        bench = self._executable("startup_bench")
+        if not os.path.isfile(bench):
+            return
+        output = StringIO()
+        self.run(self._command("startup_bench"), stdout=output, env="conanrun")
+        result = json.loads(output.getvalue().strip().splitlines()[-1])
+        ffmpeg = self.dependencies["ffmpeg"]
+        result["name"] = "startup"
+        result["hardcoded_tables"] = bool(ffmpeg.options.hardcoded_tables)
+        result["profiling"] = bool(ffmpeg.options.get_safe("profiling"))
+        # size side of the trade-off: the tables move from .bss into .rodata
+        result["library_sizes"] = {}
+        for libdir in ffmpeg.cpp_info.aggregated_components().libdirs:
+            for library in sorted(glob.glob(os.path.join(libdir, "*"))):
+                if os.path.isfile(library) and not os.path.islink(library):
+                    result["library_sizes"][os.path.basename(library)] = os.path.getsize(library)
+        result["library_total_size"] = sum(result["library_sizes"].values())
+        for path, sample in result["paths"].items():
+            self.output.info(f"startup: {path} opened {sample['ms_to_open']:.2f} ms after process start "
+                             f"({sample['ms_to_main']:.2f} ms to main), {sample['minflt_to_open']} minor page faults")
+        self.output.info(f"startup: hardcoded_tables={result['hardcoded_tables']}, "
+                         f"ffmpeg libraries {result['library_total_size']} bytes")
+        self.output.info(f"benchmark: {json.dumps(result, sort_keys=True)}")
+
+    def _run_memory_bench(self):
+        bench = self._executable("memory_bench")
+        if not os.path.isfile(bench):
+            return
+        threads = self.conf.get("user.ffmpeg:memory_threads", default=[1, 4], check_type=list)
+        output = StringIO()
+        # the encoders leave their packets in the working folder, for the decoders and the muxer
+        self.run(" ".join([self._command("memory_bench")] + [str(count) for count in threads]), stdout=output, env="conanrun", cwd=self.build_folder)
+        result = json.loads(output.getvalue().strip().splitlines()[-1])
+        ffmpeg = self.dependencies["ffmpeg"]
+        result["name"] = "memory"
+        result["version"] = str(ffmpeg.ref.version)
+        result["shared"] = bool(ffmpeg.options.shared)
+        budget = self.conf.get("user.ffmpeg:session_budget_mb", check_type=int)
+        result["session_budget_mb"] = budget
+        over_budget = []
+        for path, sessions in result["paths"].items():
+            for thread_count, session in sessions.items():
+                if "error" in session:
+                    self.output.warning(f"memory: {path} with {thread_count} threads failed: {session['error']}")
+                    continue
+                peak = session["peak_heap_bytes"]
+                session["sessions_per_gib"] = (1 << 30) // peak if peak else None
+                self.output.info(f"memory: {path} ({session['codec']}, {thread_count} threads) peaks at {peak / 1024:.0f} KiB "
+                                 f"of heap, {session['context_bytes'] / 1024:.0f} KiB once open, "
+                                 f"{session['allocations_per_frame']:.1f} allocations per frame, "
+                                 f"{session['rss_peak_kb'] - session['rss_start_kb']} KiB of RSS")
+                if budget and peak > budget << 20:
+                    over_budget.append(f"{path} with {thread_count} threads ({peak / (1 << 20):.1f} MiB)")
+        for path, session in result["max_alloc"].items():
+            if "error" not in session:
+                self.output.warning(f"memory: {path} ran with av_max_alloc({session['max_alloc']}), "
+                                    f"below its largest allocation")
+            elif session["error"] == "crashed":
+                self.output.warning(f"memory: {path} crashed with av_max_alloc({session['max_alloc']})")
+        with open(os.path.join(self.build_folder, "memory_footprint.json"), "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+        self.output.info(f"benchmark: {json.dumps(result, sort_keys=True)}")
+        if over_budget:
+            raise ConanException(f"memory: over the {budget} MiB session budget: {', '.join(over_budget)}")
+
     def test(self):
+        if self.dependencies["ffmpeg"].options.get_safe("fast_load"):
+            self._report_fast_load()
         if can_run(self):
-            bin_path = os.path.join(self.cpp.build.bindirs[0], "test_package")
-            self.run(bin_path, env="conanrun")
+            self.run(self._command("test_package"), env="conanrun")
+            if self.dependencies["ffmpeg"].options.section_gc:
+                self._report_section_gc()
+            self._run_startup_bench()
+            self._run_memory_bench()
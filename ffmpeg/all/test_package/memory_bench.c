@@ -0,0 +1,848 @@
+/*
+ * Measures the memory of one session of each encode, decode and mux path: the benchmark
+ * re-executes itself once per path and thread count, so every child starts from a fresh heap and
+ * a fresh peak RSS. The child replaces malloc, free and friends, which is where av_malloc() and
+ * av_free() end up, and counts the allocations and live heap bytes of the session.
+ * The encoders write their packets to memory_bench_<path>.pkt, the decoders and the FLV muxer
+ * read them back, so the encoders run first.
+ * Output is one JSON line, read by test_package/conanfile.py.
+ */
+#define _GNU_SOURCE
+#include <libavcodec/avcodec.h>
+#ifdef HAVE_FFMPEG_AVFORMAT
+#include <libavformat/avformat.h>
+#endif
+#include <libavutil/channel_layout.h>
+#include <libavutil/mem.h>
+#include <libavutil/opt.h>
+
+#include <dlfcn.h>
+#include <errno.h>
+#include <malloc.h>
+#include <math.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+#define VIDEO_FRAMES 48
+#define AUDIO_FRAMES 86
+#define MAX_THREAD_COUNTS 8
+
+typedef struct Path {
+    const char *name;
+    const char *codecs[2];  /* the first one that is built in is used */
+    enum { ENCODE, DECODE, MUX } kind;
+    const char *input;      /* packets of this path are decoded or muxed */
+    const char *input2;
+} Path;
+
+static const Path paths[] = {
+    { "h264_encode", { "libx264" },             ENCODE },
+    { "aac_encode",  { "aac", "libfdk_aac" },   ENCODE },
+    { "mp3_encode",  { "libmp3lame" },          ENCODE },
+    { "h264_decode", { "h264" },                DECODE, "h264_encode" },
+    { "aac_decode",  { "aac", "libfdk_aac" },   DECODE, "aac_encode" },
+    { "mp3_decode",  { "mp3float", "mp3" },     DECODE, "mp3_encode" },
+    { "flv_mux",     { NULL },                  MUX,    "h264_encode", "aac_encode" },
+};
+
+/* ---- allocation hooks ---- */
+
+typedef struct Stats {
+    int counting;
+    long long allocations;
+    long long reallocations;
+    long long frees;
+    long long live;
+    long long peak;
+    long long largest_aligned;  /* av_malloc() allocates with posix_memalign() */
+} Stats;
+
+static Stats stats;
+
+#if defined(__GLIBC__)
+extern void *__libc_malloc(size_t size);
+extern void *__libc_calloc(size_t count, size_t size);
+extern void *__libc_realloc(void *ptr, size_t size);
+extern void *__libc_memalign(size_t alignment, size_t size);
+extern void __libc_free(void *ptr);
+#define real_malloc __libc_malloc
+#define real_calloc __libc_calloc
+#define real_realloc __libc_realloc
+#define real_memalign __libc_memalign
+#define real_free __libc_free
+#define resolve() 1
+#else
+/* bionic and musl: the allocator of the next object, their dlsym() doesn't allocate */
+static void *(*real_malloc)(size_t);
+static void *(*real_calloc)(size_t, size_t);
+static void *(*real_realloc)(void *, size_t);
+static void *(*real_memalign)(size_t, size_t);
+static void (*real_free)(void *);
+
+static int resolve(void)
+{
+    if (!real_free) {
+        real_malloc = (void *(*)(size_t))dlsym(RTLD_NEXT, "malloc");
+        real_calloc = (void *(*)(size_t, size_t))dlsym(RTLD_NEXT, "calloc");
+        real_realloc = (void *(*)(void *, size_t))dlsym(RTLD_NEXT, "realloc");
+        real_memalign = (void *(*)(size_t, size_t))dlsym(RTLD_NEXT, "memalign");
+        real_free = (void (*)(void *))dlsym(RTLD_NEXT, "free");
+    }
+    return real_free != NULL;
+}
+#endif
+
+static void account(long long delta)
+{
+    long long live = __atomic_add_fetch(&stats.live, delta, __ATOMIC_RELAXED);
+    long long peak = __atomic_load_n(&stats.peak, __ATOMIC_RELAXED);
+    while (live > peak && !__atomic_compare_exchange_n(&stats.peak, &peak, live, 1, __ATOMIC_RELAXED, __ATOMIC_RELAXED))
+        ;
+}
+
+/*
+ * The blocks allocated while counting. Only those are subtracted again when they are freed or
+ * reallocated: blocks from before the session (the dynamic loader, stdio, ffmpeg's static
+ * init) were never added to live. An open addressing set in static memory, because the
+ * allocator can't allocate; a freed slot becomes a tombstone that the next insert reuses.
+ */
+#define TRACKED_BITS 20
+#define TRACKED_SLOTS (1 << TRACKED_BITS)
+#define TOMBSTONE ((void *)1)
+
+static void *tracked[TRACKED_SLOTS];
+static int tracked_count;
+static char tracked_lock;
+
+static size_t tracked_slot(void *ptr)
+{
+    return (size_t)(((unsigned long long)(uintptr_t)ptr * 0x9E3779B97F4A7C15ull) >> (64 - TRACKED_BITS));
+}
+
+static void lock_tracked(void)
+{
+    while (__atomic_test_and_set(&tracked_lock, __ATOMIC_ACQUIRE))
+        ;
+}
+
+static void unlock_tracked(void)
+{
+    __atomic_clear(&tracked_lock, __ATOMIC_RELEASE);
+}
+
+/* 0 when the set is full, the block is then left out of live */
+static int track(void *ptr)
+{
+    size_t slot = tracked_slot(ptr);
+    int added = 0;
+
+    lock_tracked();
+    if (tracked_count < TRACKED_SLOTS / 4 * 3) {
+        while (tracked[slot] && tracked[slot] != TOMBSTONE)
+            slot = (slot + 1) & (TRACKED_SLOTS - 1);
+        tracked[slot] = ptr;
+        tracked_count++;
+        added = 1;
+    }
+    unlock_tracked();
+    return added;
+}
+
+/* 1 when the block was allocated while counting */
+static int untrack(void *ptr)
+{
+    size_t slot = tracked_slot(ptr);
+    int found = 0;
+
+    lock_tracked();
+    while (tracked[slot]) {
+        if (tracked[slot] == ptr) {
+            tracked[slot] = TOMBSTONE;
+            tracked_count--;
+            found = 1;
+            break;
+        }
+        slot = (slot + 1) & (TRACKED_SLOTS - 1);
+    }
+    unlock_tracked();
+    return found;
+}
+
+static void *allocated(void *ptr, size_t size, int aligned)
+{
+    if (ptr && __atomic_load_n(&stats.counting, __ATOMIC_RELAXED)) {
+        __atomic_add_fetch(&stats.allocations, 1, __ATOMIC_RELAXED);
+        if (track(ptr))
+            account((long long)malloc_usable_size(ptr));
+        if (aligned) {
+            long long largest = __atomic_load_n(&stats.largest_aligned, __ATOMIC_RELAXED);
+            while ((long long)size > largest && !__atomic_compare_exchange_n(&stats.largest_aligned, &largest, (long long)size,
+                                                                            1, __ATOMIC_RELAXED, __ATOMIC_RELAXED))
+                ;
+        }
+    }
+    return ptr;
+}
+
+void *malloc(size_t size)
+{
+    return resolve() ? allocated(real_malloc(size), size, 0) : NULL;
+}
+
+void *calloc(size_t count, size_t size)
+{
+    return resolve() ? allocated(real_calloc(count, size), count * size, 0) : NULL;
+}
+
+void *memalign(size_t alignment, size_t size)
+{
+    return resolve() ? allocated(real_memalign(alignment, size), size, 0) : NULL;
+}
+
+void *aligned_alloc(size_t alignment, size_t size)
+{
+    return memalign(alignment, size);
+}
+
+int posix_memalign(void **ptr, size_t alignment, size_t size)
+{
+    if (!alignment || (alignment & (alignment - 1)) || alignment % sizeof(void *))
+        return EINVAL;
+    *ptr = resolve() ? allocated(real_memalign(alignment, size), size, 1) : NULL;
+    return *ptr ? 0 : ENOMEM;
+}
+
+void *realloc(void *ptr, size_t size)
+{
+    long long before = 0;
+    int was_tracked;
+    void *result;
+
+    if (!resolve())
+        return NULL;
+    if (!ptr || !__atomic_load_n(&stats.counting, __ATOMIC_RELAXED))
+        return ptr ? real_realloc(ptr, size) : malloc(size);
+    was_tracked = untrack(ptr);
+    if (was_tracked)
+        before = (long long)malloc_usable_size(ptr);
+    result = real_realloc(ptr, size);
+    if (!result && size) {
+        /* failed, the old block is still there */
+        if (was_tracked)
+            track(ptr);
+        return NULL;
+    }
+    __atomic_add_fetch(&stats.reallocations, 1, __ATOMIC_RELAXED);
+    /* a block from before the session counts from here on as a new one */
+    if (result && track(result))
+        account((long long)malloc_usable_size(result) - before);
+    else
+        account(-before);
+    return result;
+}
+
+void free(void *ptr)
+{
+    if (!ptr || !resolve())
+        return;
+    if (__atomic_load_n(&stats.counting, __ATOMIC_RELAXED)) {
+        __atomic_add_fetch(&stats.frees, 1, __ATOMIC_RELAXED);
+        if (untrack(ptr))
+            account(-(long long)malloc_usable_size(ptr));
+    }
+    real_free(ptr);
+}
+
+/* VmRSS (current) or VmHWM (peak) in KiB, from /proc/self/status */
+static long rss_kb(const char *field)
+{
+    char line[128];
+    long kb = 0;
+    FILE *status = fopen("/proc/self/status", "r");
+
+    if (!status)
+        return 0;
+    while (fgets(line, sizeof(line), status))
+        if (strncmp(line, field, strlen(field)) == 0 && line[strlen(field)] == ':')
+            kb = atol(line + strlen(field) + 1);
+    fclose(status);
+    return kb;
+}
+
+/* ---- packet files ---- */
+
+typedef struct StreamHeader {
+    int width, height, sample_rate, channels, frame_size;
+    int time_base_num, time_base_den;
+    int extradata_size;
+} StreamHeader;
+
+typedef struct PacketHeader {
+    int size, flags;
+    long long pts, dts, duration;
+} PacketHeader;
+
+/* stdio allocates its buffers on the first read or write, these keep them out of the sessions */
+static char file_buffers[2][1 << 16];
+
+static FILE *open_packets(const char *path, const char *mode, int slot)
+{
+    char name[64];
+    FILE *file;
+
+    snprintf(name, sizeof(name), "memory_bench_%s.pkt", path);
+    if ((file = fopen(name, mode)))
+        setvbuf(file, file_buffers[slot], _IOFBF, sizeof(file_buffers[slot]));
+    return file;
+}
+
+static void write_header(FILE *out, const AVCodecContext *ctx)
+{
+    StreamHeader header = { ctx->width, ctx->height, ctx->sample_rate, 0, ctx->frame_size,
+                            ctx->time_base.num, ctx->time_base.den, ctx->extradata_size };
+#if LIBAVUTIL_VERSION_INT >= AV_VERSION_INT(57, 28, 100)
+    header.channels = ctx->ch_layout.nb_channels;
+#else
+    header.channels = ctx->channels;
+#endif
+    fwrite(&header, sizeof(header), 1, out);
+    if (ctx->extradata_size)
+        fwrite(ctx->extradata, 1, ctx->extradata_size, out);
+}
+
+static int read_header(FILE *in, StreamHeader *header, uint8_t **extradata)
+{
+    *extradata = NULL;
+    if (fread(header, sizeof(*header), 1, in) != 1 || header->extradata_size < 0)
+        return AVERROR_INVALIDDATA;
+    if (!header->extradata_size)
+        return 0;
+    *extradata = av_mallocz(header->extradata_size + AV_INPUT_BUFFER_PADDING_SIZE);
+    if (!*extradata)
+        return AVERROR(ENOMEM);
+    return fread(*extradata, 1, header->extradata_size, in) == (size_t)header->extradata_size ? 0 : AVERROR_INVALIDDATA;
+}
+
+static void write_packet(FILE *out, const AVPacket *pkt)
+{
+    PacketHeader header = { pkt->size, pkt->flags, pkt->pts, pkt->dts, pkt->duration };
+
+    fwrite(&header, sizeof(header), 1, out);
+    fwrite(pkt->data, 1, pkt->size, out);
+}
+
+/* 1 when a packet was read, 0 at the end of the file */
+static int read_packet(FILE *in, AVPacket *pkt)
+{
+    PacketHeader header;
+    int ret;
+
+    if (fread(&header, sizeof(header), 1, in) != 1)
+        return 0;
+    if ((ret = av_new_packet(pkt, header.size)) < 0)
+        return ret;
+    if (fread(pkt->data, 1, header.size, in) != (size_t)header.size)
+        return AVERROR_INVALIDDATA;
+    pkt->flags = header.flags;
+    pkt->pts = header.pts;
+    pkt->dts = header.dts;
+    pkt->duration = header.duration;
+    return 1;
+}
+
+/* ---- sessions ---- */
+
+typedef struct Result {
+    int frames;
+    long long open_allocations;
+    long long context_bytes;
+    long long frame_allocations;
+    long long steady_bytes;
+} Result;
+
+static void fill_video(AVFrame *frame, int index)
+{
+    int x, y;
+
+    for (y = 0; y < frame->height; y++)
+        for (x = 0; x < frame->width; x++)
+            frame->data[0][y * frame->linesize[0] + x] = x + y + index * 3;
+    for (y = 0; y < frame->height / 2; y++)
+        for (x = 0; x < frame->width / 2; x++) {
+            frame->data[1][y * frame->linesize[1] + x] = 128 + y + index * 2;
+            frame->data[2][y * frame->linesize[2] + x] = 64 + x + index * 5;
+        }
+}
+
+static void fill_audio(AVFrame *frame, int channels, int index)
+{
+    int planar = av_sample_fmt_is_planar(frame->format);
+    int c, i;
+
+    for (c = 0; c < channels; c++)
+        for (i = 0; i < frame->nb_samples; i++) {
+            double t = (double)(index * frame->nb_samples + i) / frame->sample_rate;
+            double sample = 0.5 * sin(2 * M_PI * (440.0 + 110.0 * c) * t);
+            int slot = planar ? i : i * channels + c;
+            uint8_t *data = frame->data[planar ? c : 0];
+
+            switch (frame->format) {
+            case AV_SAMPLE_FMT_FLT:
+            case AV_SAMPLE_FMT_FLTP: ((float *)data)[slot] = (float)sample; break;
+            case AV_SAMPLE_FMT_S16:
+            case AV_SAMPLE_FMT_S16P: ((int16_t *)data)[slot] = (int16_t)(sample * 32767); break;
+            case AV_SAMPLE_FMT_S32:
+            case AV_SAMPLE_FMT_S32P: ((int32_t *)data)[slot] = (int32_t)(sample * 2147483647.0); break;
+            default: break;
+            }
+        }
+}
+
+static void setup_frame(AVFrame *frame, const AVCodecContext *ctx)
+{
+    if (ctx->codec_type == AVMEDIA_TYPE_VIDEO) {
+        frame->format = ctx->pix_fmt;
+        frame->width = ctx->width;
+        frame->height = ctx->height;
+        return;
+    }
+    frame->format = ctx->sample_fmt;
+    frame->sample_rate = ctx->sample_rate;
+    frame->nb_samples = ctx->frame_size ? ctx->frame_size : 1024;
+#if LIBAVUTIL_VERSION_INT >= AV_VERSION_INT(57, 28, 100)
+    av_channel_layout_copy(&frame->ch_layout, &ctx->ch_layout);
+#else
+    frame->channel_layout = ctx->channel_layout;
+    frame->channels = ctx->channels;
+#endif
+}
+
+static int drain_packets(AVCodecContext *ctx, AVPacket *pkt, FILE *out)
+{
+    int ret;
+
+    while ((ret = avcodec_receive_packet(ctx, pkt)) >= 0) {
+        if (out)
+            write_packet(out, pkt);
+        av_packet_unref(pkt);
+    }
+    return ret == AVERROR(EAGAIN) || ret == AVERROR_EOF ? 0 : ret;
+}
+
+static int drain_frames(AVCodecContext *ctx, AVFrame *frame, int *frames)
+{
+    int ret;
+
+    while ((ret = avcodec_receive_frame(ctx, frame)) >= 0) {
+        (*frames)++;
+        av_frame_unref(frame);
+    }
+    return ret == AVERROR(EAGAIN) || ret == AVERROR_EOF ? 0 : ret;
+}
+
+static int encode(const AVCodec *codec, int threads, FILE *out, Result *result)
+{
+    AVCodecContext *ctx = avcodec_alloc_context3(codec);
+    AVFrame *frame = av_frame_alloc();
+    AVPacket *pkt = av_packet_alloc();
+    int channels = 2, count, i, ret;
+
+    if (!ctx || !frame || !pkt) {
+        ret = AVERROR(ENOMEM);
+        goto end;
+    }
+    ctx->thread_count = threads;
+    ctx->flags |= AV_CODEC_FLAG_GLOBAL_HEADER;  /* the FLV muxer wants the extradata */
+    if (codec->type == AVMEDIA_TYPE_VIDEO) {
+        ctx->width = 1280;
+        ctx->height = 720;
+        ctx->pix_fmt = AV_PIX_FMT_YUV420P;
+        ctx->time_base = (AVRational){ 1, 30 };
+        ctx->framerate = (AVRational){ 30, 1 };
+        ctx->gop_size = 30;
+        ctx->bit_rate = 2000000;
+        av_opt_set(ctx->priv_data, "preset", "veryfast", 0);
+    } else {
+        ctx->sample_fmt = codec->sample_fmts ? codec->sample_fmts[0] : AV_SAMPLE_FMT_FLTP;
+        ctx->sample_rate = 44100;
+        ctx->bit_rate = 128000;
+        ctx->time_base = (AVRational){ 1, 44100 };
+#if LIBAVUTIL_VERSION_INT >= AV_VERSION_INT(57, 28, 100)
+        av_channel_layout_default(&ctx->ch_layout, channels);
+#else
+        ctx->channel_layout = AV_CH_LAYOUT_STEREO;
+        ctx->channels = channels;
+#endif
+    }
+    if ((ret = avcodec_open2(ctx, codec, NULL)) < 0)
+        goto end;
+    result->open_allocations = stats.allocations;
+    result->context_bytes = stats.live;
+
+    if (out)
+        write_header(out, ctx);
+    count = codec->type == AVMEDIA_TYPE_VIDEO ? VIDEO_FRAMES : AUDIO_FRAMES;
+    for (i = 0; i < count; i++) {
+        /* a new buffer per frame, as a capture pipeline hands them over */
+        setup_frame(frame, ctx);
+        if ((ret = av_frame_get_buffer(frame, 0)) < 0)
+            goto end;
+        if (codec->type == AVMEDIA_TYPE_VIDEO)
+            fill_video(frame, i);
+        else
+            fill_audio(frame, channels, i);
+        frame->pts = codec->type == AVMEDIA_TYPE_VIDEO ? i : (int64_t)i * frame->nb_samples;
+        ret = avcodec_send_frame(ctx, frame);
+        av_frame_unref(frame);
+        if (ret < 0 || (ret = drain_packets(ctx, pkt, out)) < 0)
+            goto end;
+    }
+    if ((ret = avcodec_send_frame(ctx, NULL)) < 0 || (ret = drain_packets(ctx, pkt, out)) < 0)
+        goto end;
+    result->frames = count;
+    result->frame_allocations = stats.allocations - result->open_allocations;
+    result->steady_bytes = stats.live;
+
+end:
+    av_packet_free(&pkt);
+    av_frame_free(&frame);
+    avcodec_free_context(&ctx);
+    return ret;
+}
+
+static int decode(const AVCodec *codec, int threads, FILE *in, Result *result)
+{
+    AVCodecContext *ctx = NULL;
+    AVFrame *frame = NULL;
+    AVPacket *pkt = NULL;
+    StreamHeader header;
+    uint8_t *extradata = NULL;
+    int frames = 0, ret;
+
+    if ((ret = read_header(in, &header, &extradata)) < 0)
+        goto end;
+    ctx = avcodec_alloc_context3(codec);
+    frame = av_frame_alloc();
+    pkt = av_packet_alloc();
+    if (!ctx || !frame || !pkt) {
+        ret = AVERROR(ENOMEM);
+        goto end;
+    }
+    ctx->thread_count = threads;
+    ctx->extradata = extradata;
+    ctx->extradata_size = header.extradata_size;
+    extradata = NULL;
+    if (codec->type == AVMEDIA_TYPE_AUDIO) {
+        ctx->sample_rate = header.sample_rate;
+#if LIBAVUTIL_VERSION_INT >= AV_VERSION_INT(57, 28, 100)
+        av_channel_layout_default(&ctx->ch_layout, header.channels);
+#else
+        ctx->channels = header.channels;
+#endif
+    }
+    if ((ret = avcodec_open2(ctx, codec, NULL)) < 0)
+        goto end;
+    result->open_allocations = stats.allocations;
+    result->context_bytes = stats.live;
+
+    while ((ret = read_packet(in, pkt)) > 0) {
+        ret = avcodec_send_packet(ctx, pkt);
+        av_packet_unref(pkt);
+        if (ret < 0 || (ret = drain_frames(ctx, frame, &frames)) < 0)
+            goto end;
+    }
+    if (ret < 0 || (ret = avcodec_send_packet(ctx, NULL)) < 0 || (ret = drain_frames(ctx, frame, &frames)) < 0)
+        goto end;
+    result->frames = frames;
+    result->frame_allocations = stats.allocations - result->open_allocations;
+    result->steady_bytes = stats.live;
+
+end:
+    av_freep(&extradata);
+    av_packet_free(&pkt);
+    av_frame_free(&frame);
+    avcodec_free_context(&ctx);
+    return ret;
+}
+
+#ifdef HAVE_FFMPEG_AVFORMAT
+#if LIBAVFORMAT_VERSION_MAJOR >= 61
+static int discard(void *opaque, const uint8_t *buf, int size)
+#else
+static int discard(void *opaque, uint8_t *buf, int size)
+#endif
+{
+    (void)opaque;
+    (void)buf;
+    return size;
+}
+
+static int mux(FILE **in, Result *result)
+{
+    AVFormatContext *fmt = NULL;
+    AVIOContext *io = NULL;
+    AVPacket *pkt = NULL;
+    unsigned char *buffer = NULL;
+    AVRational time_bases[2];
+    int packets = 0, done[2] = { 0, 0 }, i, ret;
+
+    if ((ret = avformat_alloc_output_context2(&fmt, NULL, "flv", NULL)) < 0)
+        goto end;
+    buffer = av_malloc(4096);
+    io = buffer ? avio_alloc_context(buffer, 4096, 1, NULL, NULL, discard, NULL) : NULL;
+    pkt = av_packet_alloc();
+    if (!io || !pkt) {
+        ret = AVERROR(ENOMEM);
+        goto end;
+    }
+    buffer = NULL;
+    fmt->pb = io;
+    for (i = 0; i < 2; i++) {
+        AVStream *st = avformat_new_stream(fmt, NULL);
+        StreamHeader header;
+        uint8_t *extradata;
+
+        if (!st) {
+            ret = AVERROR(ENOMEM);
+            goto end;
+        }
+        if ((ret = read_header(in[i], &header, &extradata)) < 0)
+            goto end;
+        st->codecpar->extradata = extradata;
+        st->codecpar->extradata_size = header.extradata_size;
+        time_bases[i] = (AVRational){ header.time_base_num, header.time_base_den };
+        st->time_base = time_bases[i];
+        if (header.width) {
+            st->codecpar->codec_type = AVMEDIA_TYPE_VIDEO;
+            st->codecpar->codec_id = AV_CODEC_ID_H264;
+            st->codecpar->width = header.width;
+            st->codecpar->height = header.height;
+        } else {
+            st->codecpar->codec_type = AVMEDIA_TYPE_AUDIO;
+            st->codecpar->codec_id = AV_CODEC_ID_AAC;
+            st->codecpar->sample_rate = header.sample_rate;
+            st->codecpar->frame_size = header.frame_size;
+#if LIBAVUTIL_VERSION_INT >= AV_VERSION_INT(57, 28, 100)
+            av_channel_layout_default(&st->codecpar->ch_layout, header.channels);
+#else
+            st->codecpar->channels = header.channels;
+#endif
+        }
+    }
+    if ((ret = avformat_write_header(fmt, NULL)) < 0)
+        goto end;
+    result->open_allocations = stats.allocations;
+    result->context_bytes = stats.live;
+
+    /* the video and audio packets take turns, av_interleaved_write_frame() sorts them by time */
+    while (!done[0] || !done[1]) {
+        for (i = 0; i < 2; i++) {
+            if (done[i])
+                continue;
+            if ((ret = read_packet(in[i], pkt)) < 0)
+                goto end;
+            if (!ret) {
+                done[i] = 1;
+                continue;
+            }
+            pkt->stream_index = i;
+            /* avformat_write_header() sets the FLV time base, 1/1000 */
+            av_packet_rescale_ts(pkt, time_bases[i], fmt->streams[i]->time_base);
+            if ((ret = av_interleaved_write_frame(fmt, pkt)) < 0)
+                goto end;
+            packets++;
+        }
+    }
+    if ((ret = av_write_trailer(fmt)) < 0)
+        goto end;
+    result->frames = packets;
+    result->frame_allocations = stats.allocations - result->open_allocations;
+    result->steady_bytes = stats.live;
+
+end:
+    av_packet_free(&pkt);
+    if (io)
+        av_freep(&io->buffer);
+    avio_context_free(&io);
+    av_free(buffer);
+    avformat_free_context(fmt);
+    return ret;
+}
+#endif
+
+static const AVCodec *find_codec(const Path *path)
+{
+    const AVCodec *codec = NULL;
+    int i;
+
+    for (i = 0; i < 2 && path->codecs[i] && !codec; i++)
+        codec = path->kind == ENCODE ? avcodec_find_encoder_by_name(path->codecs[i])
+                                     : avcodec_find_decoder_by_name(path->codecs[i]);
+    return codec;
+}
+
+/* prints the JSON object of one session, returns 2 when the path is not built in */
+static int run_child(const Path *path, int threads, int record, size_t max_alloc)
+{
+    const AVCodec *codec = NULL;
+    Result result = { 0 };
+    char error[AV_ERROR_MAX_STRING_SIZE] = "";
+    FILE *files[2] = { NULL, NULL };
+    long rss_start;
+    int i, ret;
+
+    if (path->kind != MUX && !(codec = find_codec(path)))
+        return 2;
+#ifndef HAVE_FFMPEG_AVFORMAT
+    if (path->kind == MUX)
+        return 2;
+#endif
+    if (path->kind == ENCODE && record && !(files[0] = open_packets(path->name, "wb", 0)))
+        return 1;
+    for (i = 0; i < 2 && path->kind != ENCODE; i++) {
+        const char *input = i ? path->input2 : path->input;
+
+        if (input && !(files[i] = open_packets(input, "rb", i))) {
+            if (files[0])
+                fclose(files[0]);
+            return 2;  /* no packets: the encoder of the input is not built in */
+        }
+    }
+    if (max_alloc)
+        av_max_alloc(max_alloc);
+    rss_start = rss_kb("VmRSS");
+    __atomic_store_n(&stats.counting, 1, __ATOMIC_RELAXED);
+    if (path->kind == ENCODE)
+        ret = encode(codec, threads, files[0], &result);
+    else if (path->kind == DECODE)
+        ret = decode(codec, threads, files[0], &result);
+    else
+#ifdef HAVE_FFMPEG_AVFORMAT
+        ret = mux(files, &result);
+#else
+        ret = AVERROR(ENOSYS);
+#endif
+    __atomic_store_n(&stats.counting, 0, __ATOMIC_RELAXED);
+    for (i = 0; i < 2; i++)
+        if (files[i])
+            fclose(files[i]);
+    if (ret < 0)
+        av_strerror(ret, error, sizeof(error));
+
+    printf("{\"codec\": \"%s\", \"threads\": %d, \"frames\": %d, \"open_allocations\": %lld, "
+           "\"allocations_per_frame\": %.2f, \"reallocations\": %lld, \"context_bytes\": %lld, "
+           "\"steady_bytes\": %lld, \"peak_heap_bytes\": %lld, \"retained_bytes\": %lld, "
+           "\"largest_av_allocation\": %lld, \"rss_start_kb\": %ld, \"rss_peak_kb\": %ld",
+           codec ? codec->name : "flv", threads, result.frames, result.open_allocations,
+           result.frames ? (double)result.frame_allocations / result.frames : 0.0, stats.reallocations,
+           result.context_bytes, result.steady_bytes, stats.peak, stats.live, stats.largest_aligned,
+           rss_start, rss_kb("VmHWM"));
+    if (max_alloc)
+        printf(", \"max_alloc\": %zu", max_alloc);
+    if (ret < 0)
+        printf(", \"error\": \"%s\"", error);
+    printf("}\n");
+    return 0;
+}
+
+/* runs one session in a fresh process, 0 with the JSON object in line, 2 if skipped, -1 if it crashed */
+static int spawn(const char *self, int index, int threads, int record, size_t max_alloc, char *line, size_t size)
+{
+    char path[8], thread_count[16], record_arg[8], limit[32];
+    int fds[2], status;
+    FILE *out;
+    pid_t pid;
+
+    if (pipe(fds) != 0)
+        return -1;
+    snprintf(path, sizeof(path), "%d", index);
+    snprintf(thread_count, sizeof(thread_count), "%d", threads);
+    snprintf(record_arg, sizeof(record_arg), "%d", record);
+    snprintf(limit, sizeof(limit), "%zu", max_alloc);
+    fflush(stdout);
+    pid = fork();
+    if (pid == 0) {
+        dup2(fds[1], STDOUT_FILENO);
+        close(fds[0]);
+        close(fds[1]);
+        execl(self, self, "--child", path, thread_count, record_arg, limit, (char *)NULL);
+        _exit(127);
+    }
+    close(fds[1]);
+    out = fdopen(fds[0], "r");
+    line[0] = '\0';
+    if (!fgets(line, (int)size, out))
+        line[0] = '\0';
+    fclose(out);
+    waitpid(pid, &status, 0);
+    if (!WIFEXITED(status))
+        return -1;
+    if (WEXITSTATUS(status) == 2)
+        return 2;
+    line[strcspn(line, "\n")] = '\0';
+    return WEXITSTATUS(status) == 0 && line[0] == '{' ? 0 : -1;
+}
+
+int main(int argc, char **argv)
+{
+    int thread_counts[MAX_THREAD_COUNTS] = { 1 }, counts = 0, first_path = 1, first_limit = 1;
+    char line[2048];
+    long long largest[sizeof(paths) / sizeof(paths[0])] = { 0 };
+    size_t i;
+    int t;
+
+    if (argc == 6 && strcmp(argv[1], "--child") == 0)
+        return run_child(&paths[atoi(argv[2])], atoi(argv[3]), atoi(argv[4]), (size_t)strtoull(argv[5], NULL, 10));
+
+    /* memory_bench [thread count...], 1 by default */
+    for (t = 1; t < argc && counts < MAX_THREAD_COUNTS; t++)
+        thread_counts[counts++] = atoi(argv[t]);
+    counts = counts ? counts : 1;
+
+    printf("{\"paths\": {");
+    for (i = 0; i < sizeof(paths) / sizeof(paths[0]); i++) {
+        int first_run = 1;
+
+        /* muxing does no threading of its own */
+        for (t = 0; t < (paths[i].kind == MUX ? 1 : counts); t++) {
+            int status = spawn(argv[0], (int)i, thread_counts[t], t == 0, 0, line, sizeof(line));
+            char *largest_field;
+
+            if (status == 2)
+                break;
+            if (first_run)
+                printf("%s\"%s\": {", first_path ? "" : ", ", paths[i].name);
+            printf("%s\"%d\": %s", first_run ? "" : ", ", thread_counts[t], status == 0 ? line : "{\"error\": \"crashed\"}");
+            largest_field = strstr(line, "\"largest_av_allocation\": ");
+            if (status == 0 && t == 0 && largest_field)
+                largest[i] = atoll(largest_field + strlen("\"largest_av_allocation\": "));
+            first_run = 0;
+        }
+        if (!first_run) {
+            printf("}");
+            first_path = 0;
+        }
+    }
+    /* the same sessions again with av_max_alloc() at half their largest allocation: they have to fail cleanly */
+    printf("}, \"max_alloc\": {");
+    for (i = 0; i < sizeof(paths) / sizeof(paths[0]); i++) {
+        int status;
+
+        if (largest[i] < 2)
+            continue;
+        status = spawn(argv[0], (int)i, thread_counts[0], 0, (size_t)largest[i] / 2, line, sizeof(line));
+        if (status == 2)
+            continue;
+        if (status == 0)
+            printf("%s\"%s\": %s", first_limit ? "" : ", ", paths[i].name, line);
+        else
+            printf("%s\"%s\": {\"max_alloc\": %lld, \"error\": \"crashed\"}", first_limit ? "" : ", ", paths[i].name, largest[i] / 2);
+        first_limit = 0;
+    }
+    printf("}}\n");
+    return 0;
+}
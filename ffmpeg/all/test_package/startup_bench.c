@@ -0,0 +1,168 @@
+/*
+ * Measures the cost of reaching the first avcodec_open2() of a codec in a fresh process:
+ * the benchmark re-executes itself once per codec path and run, and the child reports the time
+ * and page faults from fork()/exec() to main() and to the end of avcodec_open2().
+ * Output is one JSON line, read by test_package/conanfile.py.
+ */
+#include <libavcodec/avcodec.h>
+#include <libavutil/channel_layout.h>
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+#include <time.h>
+#include <unistd.h>
+
+#define RUNS 5
+
+typedef struct CodecPath {
+    const char *name;
+    const char *codec;
+    int encoder;
+} CodecPath;
+
+static const CodecPath paths[] = {
+    { "aac_decoder",  "aac",     0 },
+    { "mp3_decoder",  "mp3float", 0 },
+    { "h264_decoder", "h264",    0 },
+    { "av1_decoder",  "libdav1d", 0 },
+    { "aac_encoder",  "aac",     1 },
+    { "h264_encoder", "libx264", 1 },
+};
+
+typedef struct Sample {
+    double ms_to_main;
+    double ms_to_open;
+    long minflt_to_main;
+    long minflt_to_open;
+    long majflt_to_open;
+} Sample;
+
+static long long now_ns(void)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+}
+
+static int open_codec(const CodecPath *path)
+{
+    const AVCodec *codec = path->encoder ? avcodec_find_encoder_by_name(path->codec)
+                                         : avcodec_find_decoder_by_name(path->codec);
+    AVCodecContext *ctx;
+    int ret;
+
+    if (!codec)
+        return AVERROR_ENCODER_NOT_FOUND;
+    ctx = avcodec_alloc_context3(codec);
+    if (!ctx)
+        return AVERROR(ENOMEM);
+    if (path->encoder && codec->type == AVMEDIA_TYPE_AUDIO) {
+        ctx->sample_fmt = AV_SAMPLE_FMT_FLTP;
+        ctx->sample_rate = 44100;
+        ctx->bit_rate = 128000;
+#if LIBAVUTIL_VERSION_INT >= AV_VERSION_INT(57, 28, 100)
+        av_channel_layout_default(&ctx->ch_layout, 2);
+#else
+        ctx->channel_layout = AV_CH_LAYOUT_STEREO;
+        ctx->channels = 2;
+#endif
+    } else if (path->encoder) {
+        ctx->width = 1280;
+        ctx->height = 720;
+        ctx->pix_fmt = AV_PIX_FMT_YUV420P;
+        ctx->time_base = (AVRational){ 1, 30 };
+    }
+    ret = avcodec_open2(ctx, codec, NULL);
+    avcodec_free_context(&ctx);
+    return ret;
+}
+
+static int run_child(long long start_ns, const CodecPath *path)
+{
+    struct rusage at_main, at_open;
+    double ms_to_main, ms_to_open;
+    int ret;
+
+    getrusage(RUSAGE_SELF, &at_main);
+    ms_to_main = (now_ns() - start_ns) / 1e6;
+    ret = open_codec(path);
+    ms_to_open = (now_ns() - start_ns) / 1e6;
+    getrusage(RUSAGE_SELF, &at_open);
+    if (ret < 0)
+        return 2;
+    printf("%f %f %ld %ld %ld\n", ms_to_main, ms_to_open, at_main.ru_minflt, at_open.ru_minflt, at_open.ru_majflt);
+    return 0;
+}
+
+static int spawn(const char *self, int index, Sample *sample)
+{
+    char start[32], path[8], line[256];
+    int fds[2], status;
+    FILE *out;
+    pid_t pid;
+
+    if (pipe(fds) != 0)
+        return -1;
+    snprintf(start, sizeof(start), "%lld", now_ns());
+    snprintf(path, sizeof(path), "%d", index);
+    fflush(stdout);
+    pid = fork();
+    if (pid == 0) {
+        dup2(fds[1], STDOUT_FILENO);
+        close(fds[0]);
+        close(fds[1]);
+        execl(self, self, "--child", start, path, (char *)NULL);
+        _exit(127);
+    }
+    close(fds[1]);
+    out = fdopen(fds[0], "r");
+    line[0] = '\0';
+    if (!fgets(line, sizeof(line), out))
+        line[0] = '\0';
+    fclose(out);
+    waitpid(pid, &status, 0);
+    if (!WIFEXITED(status) || WEXITSTATUS(status) != 0)
+        return -1;
+    return sscanf(line, "%lf %lf %ld %ld %ld", &sample->ms_to_main, &sample->ms_to_open,
+                  &sample->minflt_to_main, &sample->minflt_to_open, &sample->majflt_to_open) == 5 ? 0 : -1;
+}
+
+static int compare_samples(const void *a, const void *b)
+{
+    double x = ((const Sample *)a)->ms_to_open, y = ((const Sample *)b)->ms_to_open;
+    return (x > y) - (x < y);
+}
+
+int main(int argc, char **argv)
+{
+    size_t i;
+    int first = 1;
+
+    if (argc == 4 && strcmp(argv[1], "--child") == 0)
+        return run_child(atoll(argv[2]), &paths[atoi(argv[3])]);
+
+    printf("{\"runs\": %d, \"paths\": {", RUNS);
+    for (i = 0; i < sizeof(paths) / sizeof(paths[0]); i++) {
+        Sample samples[RUNS], median;
+        int run;
+
+        for (run = 0; run < RUNS; run++) {
+            if (spawn(argv[0], (int)i, &samples[run]) != 0)
+                break;
+        }
+        if (run < RUNS)
+            continue;  /* codec not built in, or failed to open */
+        qsort(samples, RUNS, sizeof(Sample), compare_samples);
+        median = samples[RUNS / 2];
+        printf("%s\"%s\": {\"ms_to_main\": %.3f, \"ms_to_open\": %.3f, \"minflt_to_main\": %ld, "
+               "\"minflt_to_open\": %ld, \"majflt_to_open\": %ld}",
+               first ? "" : ", ", paths[i].name, median.ms_to_main, median.ms_to_open,
+               median.minflt_to_main, median.minflt_to_open, median.majflt_to_open);
+        first = 0;
+    }
+    printf("}}\n");
+    return 0;
+}
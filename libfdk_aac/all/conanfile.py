@@ -2,15 +2,16 @@ from conan import ConanFile
 from conan.tools.apple import fix_apple_shared_install_name, is_apple_os
 from conan.tools.cmake import CMake, CMakeToolchain, cmake_layout
 from conan.tools.env import VirtualBuildEnv
-from conan.tools.files import chdir, copy, get, rename, replace_in_file, rm, rmdir
+from conan.tools.files import chdir, copy, get, load, rename, replace_in_file, rm, rmdir, save
 from conan.tools.gnu import Autotools, AutotoolsToolchain
 from conan.tools.layout import basic_layout
 from conan.tools.microsoft import is_msvc, NMakeToolchain
 from conan.tools.build import cross_building
 from conan.tools.scm import Version
-from conan.errors import ConanInvalidConfiguration
+from conan.errors import ConanException, ConanInvalidConfiguration
 import os
 
+
 required_conan_version = ">=1.55.0"
 
 
@@ -23,14 +24,34 @@ class LibFDKAACConan(ConanFile):
     homepage = "https://sourceforge.net/projects/opencore-amr/"
     topics = ("multimedia", "audio", "fraunhofer", "aac", "decoder", "encoding", "decoding")
     package_type = "library"
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.RecipeHelpers"
     settings = "os", "arch", "compiler", "build_type"
     options = {
         "shared": [True, False],
         "fPIC": [True, False],
+        "encoder": [True, False],
+        "decoder": [True, False],
+        "section_gc": [True, False],
+        "fast_load": [True, False],
+        "cpu_tier": [None, "x86-64-v2", "x86-64-v3", "x86-64-v4", "armv8.2-a+dotprod", "armv8.2-a+dotprod+i8mm"],
+        "debug_symbols": [None, "split", "split_line_tables"],
+        "profiling": [True, False],
+        "wasm_simd": [True, False],
+        "wasm_threads": [True, False],
     }
     default_options = {
         "shared": False,
         "fPIC": True,
+        "encoder": True,
+        "decoder": True,
+        "section_gc": False,
+        "fast_load": False,
+        "cpu_tier": None,
+        "debug_symbols": None,
+        "profiling": False,
+        "wasm_simd": True,
+        "wasm_threads": False,
     }
 
     @property
@@ -41,13 +62,43 @@ class LibFDKAACConan(ConanFile):
     def _use_cmake(self):
         return Version(self.version) >= "2.0.2"
 
+    @property
+    def _module_sources(self):
+        # source lists of the CMake build, by the part of the library that needs them; libFDK, libSYS
+        # and libPCMutils are always built
+        return {
+            "encoder": ["AACENC_SRC", "SBRENC_SRC", "SACENC_SRC", "MPEGTPENC_SRC"],
+            "decoder": ["AACDEC_SRC", "SBRDEC_SRC", "SACDEC_SRC", "MPEGTPDEC_SRC", "ARITHCODING_SRC", "DRCDEC_SRC"],
+        }
+
+    @property
+    def _module_symbol_prefixes(self):
+        return {"encoder": "aacEnc", "decoder": "aacDecoder_"}
+
+    @property
+    def _module_headers(self):
+        return {"encoder": "aacenc_lib.h", "decoder": "aacdecoder_lib.h"}
+
+    @property
+    def _disabled_modules(self):
+        return [module for module in ("encoder", "decoder") if not self.options.get_safe(module)]
+
     def config_options(self):
         if self.settings.os == "Windows":
             del self.options.fPIC
+        self._config_build_options()
 
     def configure(self):
         if self.options.shared:
             self.options.rm_safe("fPIC")
+        self._configure_build_options()
+
+    def validate(self):
+        self._validate_build_options()
+        if not self.options.encoder and not self.options.decoder:
+            raise ConanInvalidConfiguration(f"{self.ref} needs encoder=True or decoder=True")
+        if self._disabled_modules and not self._use_cmake:
+            raise ConanInvalidConfiguration(f"{self.ref} encoder=False and decoder=False need the CMake build of 2.0.2 or later")
 
     def validate_build(self):
         if cross_building(self) and self.settings.os == "Android":
@@ -71,9 +122,11 @@ class LibFDKAACConan(ConanFile):
                     self.tool_requires("msys2/cci.latest")
 
     def source(self):
-        get(self, **self.conan_data["sources"][self.version], strip_root=True)
+        with self._build_phase("source"):
+            get(self, **self.conan_data["sources"][self.version], strip_root=True)
 
     def generate(self):
+        self._save_reproducible_env()
         if self._use_cmake:
             generator = None
             if self.settings.os == "iOS":
@@ -86,74 +139,194 @@ class LibFDKAACConan(ConanFile):
             tc.variables["BUILD_PROGRAMS"] = False
             tc.variables["FDK_AAC_INSTALL_CMAKE_CONFIG_MODULE"] = False
             tc.variables["FDK_AAC_INSTALL_PKGCONFIG_MODULE"] = False
+            if self.options.section_gc:
+                tc.extra_cflags.extend(self._section_gc_cflags)
+                tc.extra_cxxflags.extend(self._section_gc_cflags)
+                if self.options.shared:
+                    tc.extra_sharedlinkflags.extend(self._section_gc_ldflags)
+            if self.options.get_safe("fast_load"):
+                tc.extra_cflags.extend(self._fast_load_cflags)
+                tc.extra_cxxflags.extend(self._fast_load_cflags)
+                tc.extra_sharedlinkflags.extend(self._fast_load_ldflags)
+                # the CMake build exports every symbol, limit it to fdk-aac.sym like the autotools build does
+                version_script = self._write_version_script()
+                if version_script:
+                    tc.extra_sharedlinkflags.append(f"-Wl,--version-script={version_script}")
+            if self.options.get_safe("cpu_tier"):
+                tc.extra_cflags.extend(self._cpu_tier_cflags)
+                tc.extra_cxxflags.extend(self._cpu_tier_cflags)
+            if self.options.get_safe("debug_symbols"):
+                tc.extra_cflags.extend(self._debug_symbols_cflags)
+                tc.extra_cxxflags.extend(self._debug_symbols_cflags)
+                tc.extra_sharedlinkflags.extend(self._debug_symbols_ldflags)
+            if self.options.get_safe("profiling"):
+                tc.extra_cflags.extend(self._profiling_cflags)
+                tc.extra_cxxflags.extend(self._profiling_cflags)
+            tc.extra_cflags.extend(self._reproducible_cflags)
+            tc.extra_cxxflags.extend(self._reproducible_cflags)
+            tc.extra_cflags.extend(self._wasm_cflags)
+            tc.extra_cxxflags.extend(self._wasm_cflags)
+            tc.extra_exelinkflags.extend(self._wasm_ldflags)
+            if self._phase_timing:
+                tc.extra_cflags.extend(self._time_trace_cflags)
+                tc.extra_cxxflags.extend(self._time_trace_cflags)
+            linker_ldflags = self._linker_ldflags + self._link_timer_ldflags()
+            tc.extra_sharedlinkflags.extend(linker_ldflags)
+            tc.extra_exelinkflags.extend(linker_ldflags)
             tc.generate()
         elif is_msvc(self):
             tc = NMakeToolchain(self)
+            if self.options.section_gc:
+                tc.extra_cflags.extend(self._section_gc_cflags)
+                tc.extra_cxxflags.extend(self._section_gc_cflags)
+                if self.options.shared:
+                    tc.extra_ldflags.extend(self._section_gc_ldflags)
+            if self.options.get_safe("cpu_tier"):
+                tc.extra_cflags.extend(self._cpu_tier_cflags)
+                tc.extra_cxxflags.extend(self._cpu_tier_cflags)
             tc.generate()
         else:
             env = VirtualBuildEnv(self)
             env.generate()
             tc = AutotoolsToolchain(self)
+            if self.options.section_gc:
+                tc.extra_cflags.extend(self._section_gc_cflags)
+                tc.extra_cxxflags.extend(self._section_gc_cflags)
+                if self.options.shared:
+                    tc.extra_ldflags.extend(self._section_gc_ldflags)
+            if self.options.get_safe("fast_load"):
+                # exports stay limited to fdk-aac.sym by libtool
+                tc.extra_cflags.extend(self._fast_load_cflags)
+                tc.extra_cxxflags.extend(self._fast_load_cflags)
+                tc.extra_ldflags.extend(self._fast_load_ldflags)
+            if self.options.get_safe("cpu_tier"):
+                tc.extra_cflags.extend(self._cpu_tier_cflags)
+                tc.extra_cxxflags.extend(self._cpu_tier_cflags)
+            if self.options.get_safe("debug_symbols"):
+                tc.extra_cflags.extend(self._debug_symbols_cflags)
+                tc.extra_cxxflags.extend(self._debug_symbols_cflags)
+                tc.extra_ldflags.extend(self._debug_symbols_ldflags)
+            if self.options.get_safe("profiling"):
+                tc.extra_cflags.extend(self._profiling_cflags)
+                tc.extra_cxxflags.extend(self._profiling_cflags)
+            tc.extra_cflags.extend(self._reproducible_cflags)
+            tc.extra_cxxflags.extend(self._reproducible_cflags)
+            tc.extra_cflags.extend(self._wasm_cflags)
+            tc.extra_cxxflags.extend(self._wasm_cflags)
+            tc.extra_ldflags.extend(self._wasm_ldflags)
+            if self._phase_timing:
+                tc.extra_cflags.extend(self._time_trace_cflags)
+                tc.extra_cxxflags.extend(self._time_trace_cflags)
+            tc.extra_ldflags.extend(self._linker_ldflags + self._link_timer_ldflags())
             tc.generate()
 
+    def _write_version_script(self):
+        symbols_file = os.path.join(self.source_folder, "fdk-aac.sym")
+        if not os.path.isfile(symbols_file):
+            return None
+        # the symbols of a part that isn't built would be undefined, which lld refuses in a version script
+        disabled = tuple(self._module_symbol_prefixes[module] for module in self._disabled_modules)
+        symbols = [line.strip() for line in load(self, symbols_file).splitlines()
+                   if line.strip() and not (disabled and line.strip().startswith(disabled))]
+        version_script = os.path.join(self.generators_folder, "fdk-aac.ver")
+        save(self, version_script, "{\n    global: %s\n    local: *;\n};\n" % " ".join(f"{symbol};" for symbol in symbols))
+        return version_script.replace("\\", "/")
+
+    def _remove_modules(self):
+        cmakelists = os.path.join(self.source_folder, "CMakeLists.txt")
+        content = load(self, cmakelists)
+        emptied = []
+        for module in self._disabled_modules:
+            for sources in self._module_sources[module]:
+                if f"set({sources}" not in content:
+                    raise ConanException(f"{self.ref} CMakeLists.txt has no {sources} list, can't build without the {module}")
+                emptied.append(f"set({sources})")
+        if emptied:
+            self._replace_in_file_once(cmakelists, "add_library(fdk-aac",
+                                       "\n".join(emptied) + "\nadd_library(fdk-aac")
+
     def build(self):
         if self._use_cmake:
+            self._remove_modules()
             cmake = CMake(self)
-            cmake.configure()
-            cmake.build()
+            with self._build_phase("configure"):
+                cmake.configure()
+            with self._build_phase("build"):
+                cmake.build()
         elif is_msvc(self):
             makefile_vc = os.path.join(self.source_folder, "Makefile.vc")
-            replace_in_file(self, makefile_vc, "CFLAGS   = /nologo /W3 /Ox /MT", "CFLAGS   = /nologo")
-            replace_in_file(self, makefile_vc, "MKDIR_FLAGS = -p", "MKDIR_FLAGS =")
+            self._replace_in_file_once(makefile_vc, "CFLAGS   = /nologo /W3 /Ox /MT", "CFLAGS   = /nologo")
+            self._replace_in_file_once(makefile_vc, "MKDIR_FLAGS = -p", "MKDIR_FLAGS =")
             # Build either shared or static, and don't build utility (it always depends on static lib)
-            replace_in_file(self, makefile_vc, "copy $(PROGS) $(bindir)", "")
-            replace_in_file(self, makefile_vc, "copy $(LIB_DEF) $(libdir)", "")
+            self._replace_in_file_once(makefile_vc, "copy $(PROGS) $(bindir)", "")
+            self._replace_in_file_once(makefile_vc, "copy $(LIB_DEF) $(libdir)", "")
             if self.options.shared:
-                replace_in_file(
-                    self, makefile_vc,
+                self._replace_in_file_once(
+                    makefile_vc,
                     "all: $(LIB_DEF) $(STATIC_LIB) $(SHARED_LIB) $(IMP_LIB) $(PROGS)",
                     "all: $(LIB_DEF) $(SHARED_LIB) $(IMP_LIB)",
                 )
-                replace_in_file(self, makefile_vc, "copy $(STATIC_LIB) $(libdir)", "")
+                self._replace_in_file_once(makefile_vc, "copy $(STATIC_LIB) $(libdir)", "")
             else:
-                replace_in_file(
-                    self, makefile_vc,
+                self._replace_in_file_once(
+                    makefile_vc,
                     "all: $(LIB_DEF) $(STATIC_LIB) $(SHARED_LIB) $(IMP_LIB) $(PROGS)",
                     "all: $(STATIC_LIB)",
                 )
-                replace_in_file(self, makefile_vc, "copy $(IMP_LIB) $(libdir)", "")
-                replace_in_file(self, makefile_vc, "copy $(SHARED_LIB) $(bindir)", "")
-            with chdir(self, self.source_folder):
+                self._replace_in_file_once(makefile_vc, "copy $(IMP_LIB) $(libdir)", "")
+                self._replace_in_file_once(makefile_vc, "copy $(SHARED_LIB) $(bindir)", "")
+            with chdir(self, self.source_folder), self._build_phase("build"):
                 self.run("nmake -f Makefile.vc")
         else:
             autotools = Autotools(self)
-            autotools.autoreconf()
-            if self.settings.os == "Android" and self._settings_build.os == "Windows":
-                # remove escape for quotation marks, to make ndk on windows happy
-                replace_in_file(
-                    self, os.path.join(self.source_folder, "configure"),
-                    "s/[	 `~#$^&*(){}\\\\|;'\\\''\"<>?]/\\\\&/g", "s/[	 `~#$^&*(){}\\\\|;<>?]/\\\\&/g",
-                )
-            autotools.configure()
-            autotools.make()
+
+            def configure():
+                autotools.autoreconf()
+                if self.settings.os == "Android" and self._settings_build.os == "Windows":
+                    # remove escape for quotation marks, to make ndk on windows happy
+                    replace_in_file(
+                        self, os.path.join(self.source_folder, "configure"),
+                        "s/[	 `~#$^&*(){}\\\\|;'\\\''\"<>?]/\\\\&/g", "s/[	 `~#$^&*(){}\\\\|;<>?]/\\\\&/g",
+                    )
+                autotools.configure()
+
+            # autoreconf regenerates configure, so it only runs together with it
+            with self._build_phase("configure"):
+                self._configure_once(configure, os.path.join(self.build_folder, "Makefile"),
+                                     [os.path.join(self.source_folder, name) for name in ("configure.ac", "Makefile.am")])
+            with self._build_phase("build"):
+                autotools.make()
+        if self._phase_timing and self._time_trace_cflags:
+            self._save_time_trace()
+        if self._phase_timing and self._linker:
+            self._save_link_times()
 
     def package(self):
         copy(self, "NOTICE", src=self.source_folder, dst=os.path.join(self.package_folder, "licenses"))
         if self._use_cmake:
             cmake = CMake(self)
-            cmake.install()
+            with self._build_phase("install"):
+                cmake.install()
+            for module in self._disabled_modules:
+                rm(self, self._module_headers[module], os.path.join(self.package_folder, "include", "fdk-aac"))
         elif is_msvc(self):
-            with chdir(self, self.source_folder):
+            with chdir(self, self.source_folder), self._build_phase("install"):
                 self.run(f"nmake -f Makefile.vc prefix=\"{self.package_folder}\" install")
             if self.options.shared:
                 rename(self, os.path.join(self.package_folder, "lib", "fdk-aac.dll.lib"),
                              os.path.join(self.package_folder, "lib", "fdk-aac.lib"))
         else:
             autotools = Autotools(self)
-            autotools.install()
+            with self._build_phase("install"):
+                autotools.install()
             rmdir(self, os.path.join(self.package_folder, "lib", "pkgconfig"))
             rm(self, "*.la", os.path.join(self.package_folder, "lib"))
             fix_apple_shared_install_name(self)
+        self._normalize_archives()
+        if self.options.get_safe("debug_symbols"):
+            with self._build_phase("split_debug_symbols"):
+                self._split_debug_symbols()
+        self._report_build_phases()
 
     def package_info(self):
         self.cpp_info.set_property("cmake_file_name", "fdk-aac")
@@ -164,6 +337,18 @@ class LibFDKAACConan(ConanFile):
         self.cpp_info.components["fdk-aac"].libs = ["fdk-aac"]
         if self.settings.os in ["Linux", "FreeBSD", "Android"]:
             self.cpp_info.components["fdk-aac"].system_libs.append("m")
+        if self.options.section_gc:
+            self.cpp_info.components["fdk-aac"].exelinkflags.extend(self._section_gc_ldflags)
+            self.cpp_info.components["fdk-aac"].sharedlinkflags.extend(self._section_gc_ldflags)
+        if self.options.get_safe("wasm_threads"):
+            self.cpp_info.components["fdk-aac"].cflags.append("-pthread")
+            self.cpp_info.components["fdk-aac"].cxxflags.append("-pthread")
+            self.cpp_info.components["fdk-aac"].exelinkflags.extend(self._wasm_ldflags)
+        # one library either way; FDK-AAC::encoder and FDK-AAC::decoder only exist when that part is built
+        for module in ("encoder", "decoder"):
+            if self.options.get_safe(module, True):
+                self.cpp_info.components[module].requires = ["fdk-aac"]
+                self.cpp_info.components[module].set_property("cmake_target_name", f"FDK-AAC::{module}")
 
         # TODO: to remove in conan v2 once cmake_find_package_* generators removed
         self.cpp_info.filenames["cmake_find_package"] = "fdk-aac"
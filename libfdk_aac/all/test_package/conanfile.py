@@ -1,12 +1,17 @@
 from conan import ConanFile
 from conan.tools.build import can_run
-from conan.tools.cmake import CMake, cmake_layout
+from conan.tools.cmake import CMake, CMakeToolchain, cmake_layout
+from io import StringIO
+import glob
+import json
 import os
 
 
 class TestPackageConan(ConanFile):
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.TestPackageHelpers"
     settings = "os", "arch", "compiler", "build_type"
-    generators = "CMakeToolchain", "CMakeDeps", "VirtualRunEnv"
+    generators = "CMakeDeps", "VirtualRunEnv"
     test_type = "explicit"
 
     def layout(self):
@@ -15,12 +20,43 @@ class TestPackageConan(ConanFile):
     def requirements(self):
         self.requires(self.tested_reference_str)
 
+    def generate(self):
+        tc = CMakeToolchain(self)
+        tc.extra_exelinkflags.extend(self._linker_ldflags)
+        tc.generate()
+
     def build(self):
         cmake = CMake(self)
         cmake.configure()
         cmake.build()
 
+    def _run_bench(self):
+        output = StringIO()
+        self.run(self._command("encode_bench"), stdout=output, env="conanrun")
+        result = json.loads(output.getvalue().strip().splitlines()[-1])
+        result["name"] = "libfdk_aac"
+        result["profiling"] = bool(self.dependencies["libfdk_aac"].options.get_safe("profiling"))
+        self.output.info(f"libfdk_aac: encodes {result['realtime_x']:.1f}x realtime")
+        self.output.info(f"benchmark: {json.dumps(result, sort_keys=True)}")
+
+    def _report_modules(self):
+        # size side of encoder=False/decoder=False, build time comes from user.build:phase_timing
+        fdk = self.dependencies["libfdk_aac"]
+        report = {"name": "libfdk_aac_modules", "encoder": bool(fdk.options.get_safe("encoder", True)),
+                  "decoder": bool(fdk.options.get_safe("decoder", True)), "shared": bool(fdk.options.shared),
+                  "library_sizes": {}}
+        for libdir in fdk.cpp_info.aggregated_components().libdirs + fdk.cpp_info.aggregated_components().bindirs:
+            for library in glob.glob(os.path.join(libdir, "*fdk-aac*")):
+                if os.path.isfile(library) and not os.path.islink(library):
+                    report["library_sizes"][os.path.basename(library)] = os.path.getsize(library)
+        report["library_total_size"] = sum(report["library_sizes"].values())
+        self.output.info(f"libfdk_aac: encoder={report['encoder']}, decoder={report['decoder']}, "
+                         f"libraries {report['library_total_size']} bytes")
+        self.output.info(f"benchmark: {json.dumps(report, sort_keys=True)}")
+
     def test(self):
+        self._report_modules()
         if can_run(self):
-            bin_path = os.path.join(self.cpp.build.bindirs[0], "test_package")
-            self.run(bin_path, env="conanrun")
+            self.run(self._command("test_package"), env="conanrun")
+            if os.path.isfile(self._executable("encode_bench")):
+                self._run_bench()
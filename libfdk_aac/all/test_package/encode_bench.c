@@ -0,0 +1,86 @@
+/*
+ * Encodes a synthetic minute of 44.1 kHz stereo to 128 kbit/s AAC-LC and prints one JSON line
+ * with the encode speed.
+ */
+#include <fdk-aac/aacenc_lib.h>
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+
+#define RATE 44100
+#define SECONDS 60
+
+static double now(void)
+{
+    struct timespec ts;
+#ifdef _WIN32
+    timespec_get(&ts, TIME_UTC);
+#else
+    /* monotonic, unlike TIME_UTC; timespec_get() also needs Android API 29 and iOS 13 */
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+#endif
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+int main(void)
+{
+    static INT_PCM pcm[2048 * 2];
+    static UCHAR aac[8192];
+    HANDLE_AACENCODER encoder;
+    AACENC_InfoStruct info;
+    AACENC_BufDesc in_buf = {0}, out_buf = {0};
+    AACENC_InArgs in_args = {0};
+    AACENC_OutArgs out_args = {0};
+    void *in_ptr = pcm, *out_ptr = aac;
+    INT in_id = IN_AUDIO_DATA, in_size, in_el_size = sizeof(INT_PCM);
+    INT out_id = OUT_BITSTREAM_DATA, out_size = sizeof(aac), out_el_size = 1;
+    unsigned int seed = 1;
+    long long bytes = 0, samples = 0;
+    double start, seconds;
+    int i;
+
+    if (aacEncOpen(&encoder, 0, 2) != AACENC_OK)
+        return EXIT_FAILURE;
+    if (aacEncoder_SetParam(encoder, AACENC_AOT, AOT_AAC_LC) != AACENC_OK
+        || aacEncoder_SetParam(encoder, AACENC_SAMPLERATE, RATE) != AACENC_OK
+        || aacEncoder_SetParam(encoder, AACENC_CHANNELMODE, MODE_2) != AACENC_OK
+        || aacEncoder_SetParam(encoder, AACENC_BITRATE, 128000) != AACENC_OK
+        || aacEncoder_SetParam(encoder, AACENC_TRANSMUX, TT_MP4_ADTS) != AACENC_OK
+        || aacEncEncode(encoder, NULL, NULL, NULL, NULL) != AACENC_OK
+        || aacEncInfo(encoder, &info) != AACENC_OK)
+        return EXIT_FAILURE;
+
+    in_size = info.frameLength * 2 * sizeof(INT_PCM);
+    in_buf.numBufs = 1;
+    in_buf.bufs = &in_ptr;
+    in_buf.bufferIdentifiers = &in_id;
+    in_buf.bufSizes = &in_size;
+    in_buf.bufElSizes = &in_el_size;
+    out_buf.numBufs = 1;
+    out_buf.bufs = &out_ptr;
+    out_buf.bufferIdentifiers = &out_id;
+    out_buf.bufSizes = &out_size;
+    out_buf.bufElSizes = &out_el_size;
+
+    start = now();
+    while (samples < (long long)RATE * SECONDS) {
+        /* two sawtooth tones plus a little noise */
+        for (i = 0; i < (int)info.frameLength; i++) {
+            long long t = samples + i;
+            seed = seed * 1103515245u + 12345u;
+            pcm[2 * i] = (INT_PCM)(((t * 220) % RATE) * 16384 / RATE - 8192 + (int)(seed >> 24));
+            pcm[2 * i + 1] = (INT_PCM)(((t * 330) % RATE) * 16384 / RATE - 8192 + (int)(seed >> 24));
+        }
+        in_args.numInSamples = info.frameLength * 2;
+        if (aacEncEncode(encoder, &in_buf, &out_buf, &in_args, &out_args) != AACENC_OK)
+            return EXIT_FAILURE;
+        bytes += out_args.numOutBytes;
+        samples += info.frameLength;
+    }
+    seconds = now() - start;
+    aacEncClose(&encoder);
+
+    printf("{\"seconds\": %.4f, \"realtime_x\": %.2f, \"bytes\": %lld}\n", seconds, SECONDS / seconds, bytes);
+    return EXIT_SUCCESS;
+}
@@ -1,5 +1,10 @@
+#ifdef HAVE_FDK_AAC_ENCODER
 #include <fdk-aac/aacenc_lib.h>
+#endif
+#ifdef HAVE_FDK_AAC_DECODER
 #include <fdk-aac/aacdecoder_lib.h>
+#endif
+#include <fdk-aac/FDK_audio.h>
 #include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
@@ -8,16 +13,21 @@ int main()
 {
     LIB_INFO info[FDK_MODULE_LAST];
     memset(&info, 0, sizeof(info));
-    int ret = aacDecoder_GetLibInfo(info);
+    int ret;
+#ifdef HAVE_FDK_AAC_DECODER
+    ret = aacDecoder_GetLibInfo(info);
     if (0 != ret) {
         fprintf(stderr, "aacDecoder_GetLibInfo failed with %u\n", ret);
         return EXIT_FAILURE;
     }
+#endif
+#ifdef HAVE_FDK_AAC_ENCODER
     ret = aacEncGetLibInfo(info);
     if (0 != ret) {
         fprintf(stderr, "aacEncGetLibInfo failed with %u\n", ret);
         return EXIT_FAILURE;
     }
+#endif
 
     for (int i = 0; i < FDK_MODULE_LAST; ++i) {
         if (FDK_AACDEC == info[i].module_id || FDK_AACENC == info[i].module_id) {
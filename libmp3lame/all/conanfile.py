@@ -1,13 +1,14 @@
 from conan import ConanFile
 from conan.tools.apple import fix_apple_shared_install_name
 from conan.tools.env import VirtualBuildEnv
-from conan.tools.files import apply_conandata_patches, chdir, copy, export_conandata_patches, get, rename, replace_in_file, rm, rmdir
+from conan.tools.files import chdir, copy, export_conandata_patches, get, rename, rm, rmdir
 from conan.tools.gnu import Autotools, AutotoolsToolchain
 from conan.tools.layout import basic_layout
 from conan.tools.microsoft import is_msvc, NMakeToolchain
 import os
 import shutil
 
+
 required_conan_version = ">=1.55.0"
 
 
@@ -20,14 +21,30 @@ class LibMP3LameConan(ConanFile):
     topics = "multimedia", "audio", "mp3", "decoder", "encoding", "decoding"
     license = "LGPL-2.0"
 
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.RecipeHelpers"
     settings = "os", "arch", "compiler", "build_type"
     options = {
         "shared": [True, False],
         "fPIC": [True, False],
+        "section_gc": [True, False],
+        "fast_load": [True, False],
+        "cpu_tier": [None, "x86-64-v2", "x86-64-v3", "x86-64-v4", "armv8.2-a+dotprod", "armv8.2-a+dotprod+i8mm"],
+        "debug_symbols": [None, "split", "split_line_tables"],
+        "profiling": [True, False],
+        "wasm_simd": [True, False],
+        "wasm_threads": [True, False],
     }
     default_options = {
         "shared": False,
         "fPIC": True,
+        "section_gc": False,
+        "fast_load": False,
+        "cpu_tier": None,
+        "debug_symbols": None,
+        "profiling": False,
+        "wasm_simd": True,
+        "wasm_threads": False,
     }
 
     @property
@@ -44,10 +61,12 @@ class LibMP3LameConan(ConanFile):
     def config_options(self):
         if self.settings.os == "Windows":
             del self.options.fPIC
+        self._config_build_options()
 
     def configure(self):
         if self.options.shared:
             self.options.rm_safe("fPIC")
+        self._configure_build_options()
         self.settings.rm_safe("compiler.cppstd")
         self.settings.rm_safe("compiler.libcxx")
 
@@ -62,50 +81,85 @@ class LibMP3LameConan(ConanFile):
                 if not self.conf.get("tools.microsoft.bash:path", check_type=str):
                     self.tool_requires("msys2/cci.latest")
 
+    def validate(self):
+        self._validate_build_options()
+
     def source(self):
-        get(self, **self.conan_data["sources"][self.version], strip_root=True)
+        with self._build_phase("source"):
+            get(self, **self.conan_data["sources"][self.version], strip_root=True)
 
     def generate(self):
+        self._save_reproducible_env()
         if is_msvc(self) or self._is_clang_cl:
             tc = NMakeToolchain(self)
+            if self.options.section_gc:
+                tc.extra_cflags.extend(self._section_gc_cflags)
+                if self.options.shared:
+                    tc.extra_ldflags.extend(self._section_gc_ldflags)
+            if self.options.get_safe("cpu_tier"):
+                tc.extra_cflags.extend(self._cpu_tier_cflags)
             tc.generate()
         else:
             env = VirtualBuildEnv(self)
             env.generate()
             tc = AutotoolsToolchain(self)
             tc.configure_args.append("--disable-frontend")
+            if self.settings.os == "Emscripten":
+                # the config.sub shipped with lame doesn't know wasm32, the C code doesn't depend on the host
+                tc.update_configure_args({"--host": "i686-linux", "--build": None})
             if self.settings.compiler == "clang" and self.settings.arch in ["x86", "x86_64"]:
                 tc.extra_cxxflags.extend(["-mmmx", "-msse"])
             if self.settings.os == "iOS":
                 tc.extra_cflags.extend(["-Wno-implicit-function-declaration"])
+            if self.options.section_gc:
+                tc.extra_cflags.extend(self._section_gc_cflags)
+                if self.options.shared:
+                    tc.extra_ldflags.extend(self._section_gc_ldflags)
+            if self.options.get_safe("fast_load"):
+                # exports stay limited to include/libmp3lame.sym by libtool
+                tc.extra_cflags.extend(self._fast_load_cflags)
+                tc.extra_ldflags.extend(self._fast_load_ldflags)
+            if self.options.get_safe("cpu_tier"):
+                tc.extra_cflags.extend(self._cpu_tier_cflags)
+            if self.options.get_safe("debug_symbols"):
+                tc.extra_cflags.extend(self._debug_symbols_cflags)
+                tc.extra_ldflags.extend(self._debug_symbols_ldflags)
+            if self.options.get_safe("profiling"):
+                tc.extra_cflags.extend(self._profiling_cflags)
+            tc.extra_cflags.extend(self._reproducible_cflags)
+            tc.extra_cflags.extend(self._wasm_cflags)
+            tc.extra_ldflags.extend(self._wasm_ldflags)
+            if self._phase_timing:
+                tc.extra_cflags.extend(self._time_trace_cflags)
+            tc.extra_ldflags.extend(self._linker_ldflags + self._link_timer_ldflags())
             tc.generate()
 
     def _build_vs(self):
         with chdir(self, self.source_folder):
             shutil.copy2("configMS.h", "config.h")
             # Honor vc runtime
-            replace_in_file(self, "Makefile.MSVC", "CC_OPTS = $(CC_OPTS) /MT", "")
+            self._replace_in_file_once("Makefile.MSVC", "CC_OPTS = $(CC_OPTS) /MT", "")
             # Do not hardcode LTO
-            replace_in_file(self, "Makefile.MSVC", " /GL", "")
-            replace_in_file(self, "Makefile.MSVC", " /LTCG", "")
-            replace_in_file(self, "Makefile.MSVC", "ADDL_OBJ = bufferoverflowU.lib", "")
+            self._replace_in_file_once("Makefile.MSVC", " /GL", "")
+            self._replace_in_file_once("Makefile.MSVC", " /LTCG", "")
+            self._replace_in_file_once("Makefile.MSVC", "ADDL_OBJ = bufferoverflowU.lib", "")
             command = "nmake -f Makefile.MSVC comp=msvc"
             if self._is_clang_cl:
                 compilers_from_conf = self.conf.get("tools.build:compiler_executables", default={}, check_type=dict)
                 buildenv_vars = VirtualBuildEnv(self).vars()
                 cl = compilers_from_conf.get("c", buildenv_vars.get("CC", "clang-cl"))
                 link = buildenv_vars.get("LD", "lld-link")
-                replace_in_file(self, "Makefile.MSVC", "CC = cl", f"CC = {cl}")
-                replace_in_file(self, "Makefile.MSVC", "LN = link", f"LN = {link}")
+                self._replace_in_file_once("Makefile.MSVC", "CC = cl", f"CC = {cl}")
+                self._replace_in_file_once("Makefile.MSVC", "LN = link", f"LN = {link}")
                 # what is /GAy? MSDN doesn't know it
                 # clang-cl: error: no such file or directory: '/GAy'
                 # https://docs.microsoft.com/en-us/cpp/build/reference/ga-optimize-for-windows-application?view=msvc-170
-                replace_in_file(self, "Makefile.MSVC", "/GAy", "/GA")
+                self._replace_in_file_once("Makefile.MSVC", "/GAy", "/GA")
             if self.settings.arch == "x86_64":
-                replace_in_file(self, "Makefile.MSVC", "MACHINE = /machine:I386", "MACHINE =/machine:X64")
+                self._replace_in_file_once("Makefile.MSVC", "MACHINE = /machine:I386", "MACHINE =/machine:X64")
                 command += " MSVCVER=Win64 asm=yes"
             elif self.settings.arch == "armv8":
-                replace_in_file(self, "Makefile.MSVC", "MACHINE = /machine:I386", "MACHINE =/machine:ARM64")
+                self._replace_in_file_once("Makefile.MSVC", "MACHINE = /machine:I386", "MACHINE =/machine:ARM64")
                 command += " MSVCVER=Win64"
             else:
                 command += " asm=yes"
@@ -120,17 +174,26 @@ class LibMP3LameConan(ConanFile):
             if gnu_config:
                 copy(self, os.path.basename(gnu_config), src=os.path.dirname(gnu_config), dst=self.source_folder)
         autotools = Autotools(self)
-        autotools.configure()
-        autotools.make()
+        with self._build_phase("configure"):
+            self._configure_once(autotools.configure, os.path.join(self.build_folder, "Makefile"),
+                                 [os.path.join(self.source_folder, "configure"), self._patch_stamps_file])
+        with self._build_phase("build"):
+            autotools.make()
 
     def build(self):
-        apply_conandata_patches(self)
-        replace_in_file(self, os.path.join(self.source_folder, "include", "libmp3lame.sym"), "lame_init_old\n", "")
+        with self._build_phase("patch"):
+            self._apply_conandata_patches_once()
+            self._replace_in_file_once(os.path.join(self.source_folder, "include", "libmp3lame.sym"), "lame_init_old\n", "")
 
         if is_msvc(self) or self._is_clang_cl:
-            self._build_vs()
+            with self._build_phase("build"):
+                self._build_vs()
         else:
             self._build_autotools()
+        if self._phase_timing and self._time_trace_cflags:
+            self._save_time_trace()
+        if self._phase_timing and self._linker:
+            self._save_link_times()
 
     def package(self):
         copy(self, pattern="LICENSE", src=self.source_folder, dst=os.path.join(self.package_folder,"licenses"))
@@ -144,12 +207,25 @@ class LibMP3LameConan(ConanFile):
                          os.path.join(self.package_folder, "lib", "mp3lame.lib"))
         else:
             autotools = Autotools(self)
-            autotools.install()
+            with self._build_phase("install"):
+                autotools.install()
             rmdir(self, os.path.join(self.package_folder, "share"))
             rm(self, "*.la", os.path.join(self.package_folder, "lib"))
             fix_apple_shared_install_name(self)
+        self._normalize_archives()
+        if self.options.get_safe("debug_symbols"):
+            with self._build_phase("split_debug_symbols"):
+                self._split_debug_symbols()
+        self._report_build_phases()
 
     def package_info(self):
         self.cpp_info.libs = ["mp3lame"]
+        if self.options.section_gc:
+            self.cpp_info.exelinkflags.extend(self._section_gc_ldflags)
+            self.cpp_info.sharedlinkflags.extend(self._section_gc_ldflags)
         if self.settings.os in ["Linux", "FreeBSD"]:
             self.cpp_info.system_libs = ["m"]
+        if self.options.get_safe("wasm_threads"):
+            self.cpp_info.cflags.append("-pthread")
+            self.cpp_info.cxxflags.append("-pthread")
+            self.cpp_info.exelinkflags.extend(self._wasm_ldflags)
@@ -1,12 +1,15 @@
 from conan import ConanFile
 from conan.tools.build import can_run
-from conan.tools.cmake import cmake_layout, CMake
-import os
+from conan.tools.cmake import cmake_layout, CMake, CMakeToolchain
+from io import StringIO
+import json
 
 
 class TestPackageConan(ConanFile):
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.TestPackageHelpers"
     settings = "os", "arch", "compiler", "build_type"
-    generators = "CMakeDeps", "CMakeToolchain", "VirtualRunEnv"
+    generators = "CMakeDeps", "VirtualRunEnv"
     test_type = "explicit"
 
     def layout(self):
@@ -15,12 +18,26 @@ class TestPackageConan(ConanFile):
     def requirements(self):
         self.requires(self.tested_reference_str)
 
+    def generate(self):
+        tc = CMakeToolchain(self)
+        tc.extra_exelinkflags.extend(self._linker_ldflags)
+        tc.generate()
+
     def build(self):
         cmake = CMake(self)
         cmake.configure()
         cmake.build()
 
+    def _run_bench(self):
+        output = StringIO()
+        self.run(self._command("encode_bench"), stdout=output, env="conanrun")
+        result = json.loads(output.getvalue().strip().splitlines()[-1])
+        result["name"] = "libmp3lame"
+        result["profiling"] = bool(self.dependencies["libmp3lame"].options.get_safe("profiling"))
+        self.output.info(f"libmp3lame: encodes {result['realtime_x']:.1f}x realtime")
+        self.output.info(f"benchmark: {json.dumps(result, sort_keys=True)}")
+
     def test(self):
         if can_run(self):
-            bin_path = os.path.join(self.cpp.build.bindirs[0], "test_package")
-            self.run(bin_path, env="conanrun")
+            self.run(self._command("test_package"), env="conanrun")
+            self._run_bench()
@@ -0,0 +1,69 @@
+/*
+ * Encodes a synthetic minute of 44.1 kHz stereo to 128 kbit/s MP3 and prints one JSON line with
+ * the encode speed.
+ */
+#include <lame/lame.h>
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+
+#define RATE 44100
+#define SECONDS 60
+#define FRAME 1152
+
+static double now(void)
+{
+    struct timespec ts;
+#ifdef _WIN32
+    timespec_get(&ts, TIME_UTC);
+#else
+    /* monotonic, unlike TIME_UTC; timespec_get() also needs Android API 29 and iOS 13 */
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+#endif
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+int main(void)
+{
+    static short pcm[FRAME * 2];
+    static unsigned char mp3[FRAME * 5 / 4 + 7200];
+    lame_t lame = lame_init();
+    unsigned int seed = 1;
+    long long bytes = 0;
+    double start, seconds;
+    int frame, i, written;
+
+    if (!lame)
+        return EXIT_FAILURE;
+    lame_set_in_samplerate(lame, RATE);
+    lame_set_num_channels(lame, 2);
+    lame_set_brate(lame, 128);
+    lame_set_quality(lame, 2);
+    if (lame_init_params(lame) < 0)
+        return EXIT_FAILURE;
+
+    start = now();
+    for (frame = 0; frame < RATE * SECONDS / FRAME; frame++) {
+        /* two sawtooth tones plus a little noise */
+        for (i = 0; i < FRAME; i++) {
+            int t = frame * FRAME + i;
+            seed = seed * 1103515245u + 12345u;
+            pcm[2 * i] = (short)(((t * 220) % RATE) * 16384 / RATE - 8192 + (int)(seed >> 24));
+            pcm[2 * i + 1] = (short)(((t * 330) % RATE) * 16384 / RATE - 8192 + (int)(seed >> 24));
+        }
+        written = lame_encode_buffer_interleaved(lame, pcm, FRAME, mp3, sizeof(mp3));
+        if (written < 0)
+            return EXIT_FAILURE;
+        bytes += written;
+    }
+    written = lame_encode_flush(lame, mp3, sizeof(mp3));
+    if (written < 0)
+        return EXIT_FAILURE;
+    bytes += written;
+    seconds = now() - start;
+    lame_close(lame);
+
+    printf("{\"seconds\": %.4f, \"realtime_x\": %.2f, \"bytes\": %lld}\n", seconds, SECONDS / seconds, bytes);
+    return EXIT_SUCCESS;
+}
@@ -1,13 +1,15 @@
 from conan import ConanFile
+from conan.errors import ConanInvalidConfiguration
 from conan.tools.apple import is_apple_os, XCRun, fix_apple_shared_install_name
 from conan.tools.build import cross_building
 from conan.tools.env import Environment, VirtualBuildEnv
-from conan.tools.files import copy, rename, get, rmdir
+from conan.tools.files import chdir, copy, rename, mkdir, rmdir
 from conan.tools.gnu import Autotools, AutotoolsToolchain
 from conan.tools.layout import basic_layout
 from conan.tools.microsoft import check_min_vs, is_msvc, unix_path
 import os
 
+
 required_conan_version = ">=1.57.0"
 
 
@@ -21,16 +23,40 @@ class LibX264Conan(ConanFile):
     topics = ("video", "encoding")
     license = "GPL-2.0"
 
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.RecipeHelpers"
     settings = "os", "arch", "compiler", "build_type"
     options = {
         "shared": [True, False],
         "fPIC": [True, False],
         "bit_depth": [8, 10, "all"],
+        "bit_depth_components": [True, False],
+        "chroma_format": ["all", 400, 420, 422, 444],
+        "interlaced": [True, False],
+        "with_opencl": [True, False],
+        "section_gc": [True, False],
+        "fast_load": [True, False],
+        "cpu_tier": [None, "x86-64-v2", "x86-64-v3", "x86-64-v4", "armv8.2-a+dotprod", "armv8.2-a+dotprod+i8mm"],
+        "debug_symbols": [None, "split", "split_line_tables"],
+        "profiling": [True, False],
+        "wasm_simd": [True, False],
+        "wasm_threads": [True, False],
     }
     default_options = {
         "shared": False,
         "fPIC": True,
         "bit_depth": "all",
+        "bit_depth_components": False,
+        "chroma_format": "all",
+        "interlaced": True,
+        "with_opencl": True,
+        "section_gc": False,
+        "fast_load": False,
+        "cpu_tier": None,
+        "debug_symbols": None,
+        "profiling": False,
+        "wasm_simd": True,
+        "wasm_threads": False,
     }
 
     # otherwise build fails with: ln: failed to create symbolic link './Makefile' -> '../../../../../../../../../../../../../j/w/prod/buildsinglereference@2/.conan/data/libx264/cci.20220602/_/_/build/622692a7dbc145becf87f01b017e2a0d93cc644e/src/Makefile': File name too long
@@ -43,10 +69,14 @@ class LibX264Conan(ConanFile):
     def config_options(self):
         if self.settings.os == "Windows":
             del self.options.fPIC
+        self._config_build_options()
 
     def configure(self):
         if self.options.shared:
             self.options.rm_safe("fPIC")
+        self._configure_build_options()
+        if self.options.bit_depth != "all":
+            self.options.rm_safe("bit_depth_components")
         self.settings.rm_safe("compiler.libcxx")
         self.settings.rm_safe("compiler.cppstd")
 
@@ -65,10 +95,17 @@ class LibX264Conan(ConanFile):
             if not self.conf.get("tools.microsoft.bash:path", check_type=str):
                 self.tool_requires("msys2/cci.latest")
 
+    def validate(self):
+        if self.options.get_safe("bit_depth_components") and self.settings.os == "Windows":
+            raise ConanInvalidConfiguration(f"{self.ref} bit_depth_components is not supported on Windows")
+        self._validate_build_options()
+
     def source(self):
-        get(self, **self.conan_data["sources"][self.version], strip_root=True)
+        with self._build_phase("source"):
+            self._get_sources()
 
     def generate(self):
+        self._save_reproducible_env()
         env = VirtualBuildEnv(self)
         env.generate()
 
@@ -92,8 +129,24 @@ class LibX264Conan(ConanFile):
             args["--enable-pic"] = ""
         if self.settings.build_type == "Debug":
             args["--enable-debug"] = ""
+        if self.options.chroma_format != "all":
+            args["--chroma-format"] = self.options.chroma_format
+        if not self.options.interlaced:
+            args["--disable-interlaced"] = ""
+        if not self.options.with_opencl:
+            args["--disable-opencl"] = ""
+        # only used by the x264 CLI, which is never built
+        for cli_input in ("swscale", "lavf", "ffms", "lsmash"):
+            args[f"--disable-{cli_input}"] = ""
         if self.settings.os == "iOS":
             args["--disable-asm"] = ""
+        if self.settings.os == "Emscripten":
+            # config.sub doesn't know wasm32-local-emscripten, i686-gnu picks the generic C code paths
+            args["--build"] = None
+            args["--host"] = "i686-gnu"
+            args["--disable-asm"] = ""
+            if not self.options.wasm_threads:
+                args["--disable-thread"] = ""
         if is_apple_os(self) and self.settings.arch == "armv8":
             # bitstream-a.S:29:18: error: unknown token in expression
             # extra_asflags.append("-arch arm64")
@@ -162,6 +215,29 @@ class LibX264Conan(ConanFile):
         # when linked against glibc >= 2.31
         extra_cflags += ["-fno-finite-math-only"]
 
+        if self.options.section_gc:
+            extra_cflags.extend(self._section_gc_cflags)
+            if self.options.shared:
+                extra_ldflags.extend(self._section_gc_ldflags)
+        if self.options.get_safe("fast_load"):
+            # x264.h marks the public API with X264_API, everything else can be hidden
+            extra_cflags.extend(self._fast_load_cflags + ["-fvisibility=hidden"])
+            extra_ldflags.extend(self._fast_load_ldflags)
+        if self.options.get_safe("cpu_tier"):
+            # only compiler-generated code, the hand-written asm is still dispatched at runtime
+            extra_cflags.extend(self._cpu_tier_cflags)
+        if self.options.get_safe("debug_symbols"):
+            extra_cflags.extend(self._debug_symbols_cflags)
+            extra_ldflags.extend(self._debug_symbols_ldflags)
+        if self.options.get_safe("profiling"):
+            extra_cflags.extend(self._profiling_cflags)
+        extra_cflags.extend(self._reproducible_cflags)
+        extra_cflags.extend(self._wasm_cflags)
+        extra_ldflags.extend(self._wasm_ldflags)
+        if self._phase_timing:
+            extra_cflags.extend(self._time_trace_cflags)
+        extra_ldflags.extend(self._linker_ldflags + self._link_timer_ldflags())
+
         if extra_asflags:
             args["--extra-asflags"] = " ".join(extra_asflags)
         if extra_cflags:
@@ -171,31 +247,99 @@ class LibX264Conan(ConanFile):
         tc.update_configure_args(args)
         tc.generate()
 
+    @property
+    def _bit_depth_library_suffix(self):
+        if not self.options.shared:
+            return ".a"
+        return ".dylib" if is_apple_os(self) else ".so"
+
     def build(self):
+        if self.options.get_safe("profiling"):
+            self._keep_frame_pointers(os.path.join(self.source_folder, "configure"))
         autotools = Autotools(self)
-        autotools.configure()
-        autotools.make()
+        with self._build_phase("configure"):
+            self._configure_once(autotools.configure, os.path.join(self.build_folder, "config.mak"),
+                                 [os.path.join(self.source_folder, "configure")])
+            if self.options.get_safe("profiling"):
+                self._check_frame_pointers(os.path.join(self.build_folder, "config.mak"))
+        with self._build_phase("build"):
+            autotools.make()
+        if self.options.get_safe("bit_depth_components"):
+            # one more out-of-tree build per bit depth, the library is renamed through the make
+            # variables so that the shared library's soname/install name matches its file name
+            for bit_depth in (8, 10):
+                library = f"libx264-{bit_depth}bit{self._bit_depth_library_suffix}"
+                mkdir(self, os.path.join(self.build_folder, f"bit_depth_{bit_depth}"))
+                with chdir(self, os.path.join(self.build_folder, f"bit_depth_{bit_depth}")):
+                    autotools = Autotools(self)
+                    with self._build_phase(f"configure_{bit_depth}bit"):
+                        args = [f"--bit-depth={bit_depth}"]
+                        self._configure_once(lambda: autotools.configure(args=args),
+                                             os.path.join(self.build_folder, f"bit_depth_{bit_depth}", "config.mak"),
+                                             [os.path.join(self.source_folder, "configure")], args=args)
+                        if self.options.get_safe("profiling"):
+                            self._check_frame_pointers(os.path.join(self.build_folder, f"bit_depth_{bit_depth}", "config.mak"))
+                    with self._build_phase(f"build_{bit_depth}bit"):
+                        autotools.make(args=[f"LIBX264={library}", f"SONAME={library}"])
+        if self._phase_timing and self._time_trace_cflags:
+            self._save_time_trace()
+        if self._phase_timing and self._linker:
+            self._save_link_times()
 
     def package(self):
         copy(self, pattern="COPYING", src=self.source_folder, dst=os.path.join(self.package_folder, "licenses"))
         autotools = Autotools(self)
-        autotools.install()
+        with self._build_phase("install"):
+            autotools.install()
         rmdir(self, os.path.join(self.package_folder, "lib", "pkgconfig"))
         if is_msvc(self):
             ext = ".dll.lib" if self.options.shared else ".lib"
             rename(self, os.path.join(self.package_folder, "lib", f"libx264{ext}"),
                          os.path.join(self.package_folder, "lib", "x264.lib"))
+        if self.options.get_safe("bit_depth_components"):
+            for bit_depth in (8, 10):
+                library = f"libx264-{bit_depth}bit{self._bit_depth_library_suffix}"
+                copy(self, library, src=os.path.join(self.build_folder, f"bit_depth_{bit_depth}"),
+                     dst=os.path.join(self.package_folder, "lib"))
         fix_apple_shared_install_name(self)
+        self._normalize_archives()
+        if self.options.get_safe("debug_symbols"):
+            with self._build_phase("split_debug_symbols"):
+                self._split_debug_symbols()
+        self._report_build_phases()
 
     def package_info(self):
-        self.cpp_info.set_property("pkg_config_name", "x264")
-        self.cpp_info.libs = ["x264"]
-        if is_msvc(self) and self.options.shared:
-            self.cpp_info.defines.append("X264_API_IMPORTS")
-        if self.settings.os in ["FreeBSD", "Linux"]:
-            self.cpp_info.system_libs.extend(["dl", "pthread", "m"])
-        elif self.settings.os == "Android":
-            self.cpp_info.system_libs.extend(["dl", "m"])
+        if self.options.get_safe("bit_depth_components"):
+            self.cpp_info.set_property("pkg_config_name", "x264")
+            # libx264::libx264 and x264.pc are the combined library only: the aggregated target of all
+            # components gets another name, and a component .pc named like the root one replaces it.
+            # The single bit depth libraries are opt-in, through libx264::x264-<N>bit or x264-<N>bit.pc
+            self.cpp_info.set_property("cmake_target_name", "libx264::libx264_all_bit_depths")
+            libraries = {"libx264": "x264", "x264-8bit": "x264-8bit", "x264-10bit": "x264-10bit"}
+            cpp_infos = []
+            for component_name, library in libraries.items():
+                component = self.cpp_info.components[component_name]
+                component.set_property("pkg_config_name", "x264" if component_name == "libx264" else component_name)
+                component.libs = [library]
+                cpp_infos.append(component)
+        else:
+            self.cpp_info.set_property("pkg_config_name", "x264")
+            self.cpp_info.libs = ["x264"]
+            cpp_infos = [self.cpp_info]
+        for cpp_info in cpp_infos:
+            if self.options.section_gc:
+                cpp_info.exelinkflags.extend(self._section_gc_ldflags)
+                cpp_info.sharedlinkflags.extend(self._section_gc_ldflags)
+            if is_msvc(self) and self.options.shared:
+                cpp_info.defines.append("X264_API_IMPORTS")
+            if self.settings.os in ["FreeBSD", "Linux"]:
+                cpp_info.system_libs.extend(["dl", "pthread", "m"])
+            elif self.settings.os == "Android":
+                cpp_info.system_libs.extend(["dl", "m"])
+            if self.options.get_safe("wasm_threads"):
+                cpp_info.cflags.append("-pthread")
+                cpp_info.cxxflags.append("-pthread")
+                cpp_info.exelinkflags.extend(self._wasm_ldflags)
 
         # TODO: to remove in conan v2 once pkg_config generator removed
         self.cpp_info.names["pkg_config"] = "x264"
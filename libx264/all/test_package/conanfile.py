@@ -1,12 +1,18 @@
 from conan import ConanFile
+from conan.errors import ConanException
 from conan.tools.build import can_run
-from conan.tools.cmake import cmake_layout, CMake
+from conan.tools.cmake import cmake_layout, CMake, CMakeToolchain
+from io import StringIO
+import glob
+import json
 import os
 
 
 class TestPackageConan(ConanFile):
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.TestPackageHelpers"
     settings = "os", "arch", "compiler", "build_type"
-    generators = "CMakeDeps", "CMakeToolchain", "VirtualRunEnv"
+    generators = "CMakeDeps", "VirtualRunEnv"
     test_type = "explicit"
 
     def layout(self):
@@ -15,12 +21,59 @@ class TestPackageConan(ConanFile):
     def requirements(self):
         self.requires(self.tested_reference_str)
 
+    def generate(self):
+        tc = CMakeToolchain(self)
+        tc.extra_exelinkflags.extend(self._linker_ldflags)
+        tc.generate()
+
     def build(self):
         cmake = CMake(self)
         cmake.configure()
         cmake.build()
 
+    def _encode(self, bench, bit_depth, chroma_format):
+        output = StringIO()
+        try:
+            self.run(f"{bench} {bit_depth} {chroma_format}", stdout=output, env="conanrun")
+        except ConanException:
+            return None  # bit depth not built into this library
+        return json.loads(output.getvalue().strip().splitlines()[-1])
+
+    def _report_variant(self):
+        x264 = self.dependencies["libx264"]
+        bit_depth = str(x264.options.bit_depth)
+        chroma_format = str(x264.options.chroma_format)
+        if chroma_format == "all":
+            chroma_format = "420"
+        libraries = {}
+        for libdir in x264.cpp_info.aggregated_components().libdirs + x264.cpp_info.aggregated_components().bindirs:
+            for library in glob.glob(os.path.join(libdir, "*x264*")):
+                if os.path.isfile(library) and not os.path.islink(library):
+                    libraries[os.path.basename(library)] = os.path.getsize(library)
+        report = {
+            "name": "libx264",
+            "options": {option: str(x264.options.get_safe(option))
+                        for option in ("shared", "bit_depth", "chroma_format", "interlaced", "with_opencl",
+                                       "bit_depth_components", "profiling")},
+            "library_sizes": libraries,
+            "encode": {},
+        }
+        bit_depths = ["8", "10"] if bit_depth == "all" else [bit_depth]
+        benches = [("libx264", "encode_bench", bit_depths)]
+        benches += [(f"x264-{depth}bit", f"encode_bench_{depth}bit", [depth]) for depth in ("8", "10")]
+        for target, bench, depths in benches:
+            if not os.path.isfile(self._executable(bench)):
+                continue
+            for depth in depths:
+                result = self._encode(self._command(bench), depth, chroma_format)
+                if result:
+                    report["encode"][f"{target}/{depth}bit"] = result
+                    self.output.info(f"libx264: {target} {depth}-bit {chroma_format} encodes {result['fps']:.1f} fps")
+        for name, size in sorted(libraries.items()):
+            self.output.info(f"libx264: {name} is {size} bytes")
+        self.output.info(f"benchmark: {json.dumps(report, sort_keys=True)}")
+
     def test(self):
         if can_run(self):
-            bin_path = os.path.join(self.cpp.build.bindirs[0], "test_package")
-            self.run(bin_path, env="conanrun")
+            self.run(self._command("test_package"), env="conanrun")
+            self._report_variant()
@@ -0,0 +1,117 @@
+/*
+ * Encodes a synthetic clip single-threaded and prints one JSON line with the encode speed.
+ * usage: encode_bench <bit depth> <chroma format: 400|420|422|444>
+ */
+#include <stdint.h>
+#include "x264.h"
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#define WIDTH 1280
+#define HEIGHT 720
+#define FRAMES 120
+
+static double now(void)
+{
+    struct timespec ts;
+#ifdef _WIN32
+    timespec_get(&ts, TIME_UTC);
+#else
+    /* monotonic, unlike TIME_UTC; timespec_get() also needs Android API 29 and iOS 13 */
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+#endif
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+static int chroma_csp(const char *chroma_format)
+{
+#ifdef X264_CSP_I400
+    if (strcmp(chroma_format, "400") == 0)
+        return X264_CSP_I400;
+#endif
+    if (strcmp(chroma_format, "422") == 0)
+        return X264_CSP_I422;
+    if (strcmp(chroma_format, "444") == 0)
+        return X264_CSP_I444;
+    return X264_CSP_I420;
+}
+
+static void fill_plane(x264_image_t *img, int plane, int frame, int bit_depth)
+{
+    int csp = img->i_csp & X264_CSP_MASK;
+    int width = plane && (csp == X264_CSP_I420 || csp == X264_CSP_I422) ? WIDTH / 2 : WIDTH;
+    int height = plane && csp == X264_CSP_I420 ? HEIGHT / 2 : HEIGHT;
+    int x, y;
+
+    for (y = 0; y < height; y++) {
+        for (x = 0; x < width; x++) {
+            int value = ((x + frame * 4) ^ (y + plane * 32)) & 0xff;
+            if (bit_depth > 8)
+                ((uint16_t *)(img->plane[plane] + y * img->i_stride[plane]))[x] = (uint16_t)(value << 2);
+            else
+                img->plane[plane][y * img->i_stride[plane] + x] = (uint8_t)value;
+        }
+    }
+}
+
+int main(int argc, char **argv)
+{
+    int bit_depth = argc > 1 ? atoi(argv[1]) : 8;
+    const char *chroma_format = argc > 2 ? argv[2] : "420";
+    int csp = chroma_csp(chroma_format);
+    x264_param_t param;
+    x264_picture_t pic, pic_out;
+    x264_nal_t *nals;
+    x264_t *encoder;
+    long long bytes = 0;
+    double start, seconds;
+    int i, plane, nal_count, frame_size;
+
+    if (x264_param_default_preset(&param, "veryfast", NULL) < 0)
+        return 2;
+    param.i_threads = 1;
+    param.i_width = WIDTH;
+    param.i_height = HEIGHT;
+    param.i_fps_num = 30;
+    param.i_fps_den = 1;
+    param.i_csp = csp;
+#if X264_BUILD >= 153
+    param.i_bitdepth = bit_depth;
+#endif
+    if (bit_depth > 8)
+        csp |= X264_CSP_HIGH_DEPTH;
+
+    encoder = x264_encoder_open(&param);
+    if (!encoder)
+        return 2;  /* this bit depth or chroma format isn't built in */
+    if (x264_picture_alloc(&pic, csp, WIDTH, HEIGHT) < 0)
+        return 2;
+
+    start = now();
+    for (i = 0; i < FRAMES; i++) {
+        for (plane = 0; plane < pic.img.i_plane; plane++)
+            fill_plane(&pic.img, plane, i, bit_depth);
+        pic.i_pts = i;
+        frame_size = x264_encoder_encode(encoder, &nals, &nal_count, &pic, &pic_out);
+        if (frame_size < 0)
+            return 1;
+        bytes += frame_size;
+    }
+    while (x264_encoder_delayed_frames(encoder)) {
+        frame_size = x264_encoder_encode(encoder, &nals, &nal_count, NULL, &pic_out);
+        if (frame_size < 0)
+            return 1;
+        bytes += frame_size;
+    }
+    seconds = now() - start;
+
+    x264_picture_clean(&pic);
+    x264_encoder_close(encoder);
+    printf("{\"bit_depth\": %d, \"chroma_format\": \"%s\", \"frames\": %d, \"width\": %d, \"height\": %d, "
+           "\"seconds\": %.4f, \"fps\": %.2f, \"bytes\": %lld}\n",
+           bit_depth, chroma_format, FRAMES, WIDTH, HEIGHT, seconds, FRAMES / seconds, bytes);
+    return 0;
+}
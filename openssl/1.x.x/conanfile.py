@@ -15,8 +15,10 @@ from contextlib import contextmanager
 import fnmatch
 import json
 import os
+import re
 import textwrap
 
+
 required_conan_version = ">=1.53.0"
 
 
@@ -29,6 +31,8 @@ class OpenSSLConan(ConanFile):
     topics = ("openssl", "ssl", "tls", "encryption", "security")
     description = "A toolkit for the Transport Layer Security (TLS) and Secure Sockets Layer (SSL) protocols"
 
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.RecipeHelpers"
     settings = "os", "arch", "compiler", "build_type"
     options = {
         "no_threads": [True, False],
@@ -89,9 +93,19 @@ class OpenSSLConan(ConanFile):
         "capieng_dialog": [True, False],
         "enable_capieng": [True, False],
         "openssldir": [None, "ANY"],
+        "section_gc": [True, False],
+        "fast_load": [True, False],
+        "cpu_tier": [None, "x86-64-v2", "x86-64-v3", "x86-64-v4", "armv8.2-a+dotprod", "armv8.2-a+dotprod+i8mm"],
+        "debug_symbols": [None, "split", "split_line_tables"],
+        "profiling": [True, False],
+        "wasm_simd": [True, False],
+        "wasm_threads": [True, False],
     }
     default_options = {key: False for key in options.keys()}
     default_options["fPIC"] = True
+    default_options["cpu_tier"] = None
+    default_options["debug_symbols"] = None
+    default_options["wasm_simd"] = True
     default_options["openssldir"] = None
 
     @property
@@ -120,6 +134,7 @@ class OpenSSLConan(ConanFile):
         else:
             del self.options.capieng_dialog
             del self.options.enable_capieng
+        self._config_build_options()
 
         if self.settings.os == "Emscripten":
             self.options.no_asm = True
@@ -130,6 +145,7 @@ class OpenSSLConan(ConanFile):
     def configure(self):
         if self.options.shared:
             self.options.rm_safe("fPIC")
+        self._configure_build_options()
         self.settings.rm_safe("compiler.libcxx")
         self.settings.rm_safe("compiler.cppstd")
 
@@ -137,9 +153,14 @@ class OpenSSLConan(ConanFile):
         basic_layout(self, src_folder="src")
 
     def validate(self):
+        self._validate_build_options()
+
         if self.settings.os == "Emscripten":
-            if not all((self.options.no_asm, self.options.no_threads, self.options.no_stdio, self.options.no_tests)):
-                raise ConanInvalidConfiguration("os=Emscripten requires openssl:{no_asm,no_threads,no_stdio,no_tests}=True")
+            if not all((self.options.no_asm, self.options.no_stdio, self.options.no_tests)):
+                raise ConanInvalidConfiguration("os=Emscripten requires openssl:{no_asm,no_stdio,no_tests}=True")
+            if bool(self.options.no_threads) == bool(self.options.wasm_threads):
+                raise ConanInvalidConfiguration("os=Emscripten requires openssl:no_threads=False with wasm_threads=True, "
+                                                "and openssl:no_threads=True otherwise")
 
     def build_requirements(self):
         if self._settings_build.os == "Windows":
@@ -153,9 +174,11 @@ class OpenSSLConan(ConanFile):
                     self.tool_requires("msys2/cci.latest")
 
     def source(self):
-        get(self, **self.conan_data["sources"][self.version], strip_root=True)
+        with self._build_phase("source"):
+            get(self, **self.conan_data["sources"][self.version], strip_root=True)
 
     def generate(self):
+        self._save_reproducible_env()
         VirtualBuildEnv(self).generate()
 
         tc = AutotoolsToolchain(self)
@@ -163,6 +186,27 @@ class OpenSSLConan(ConanFile):
             tc.extra_cflags = [f"-isysroot {XCRun(self).sdk_path}"]
             tc.extra_cxxflags = [f"-isysroot {XCRun(self).sdk_path}"]
             tc.extra_ldflags = [f"-isysroot {XCRun(self).sdk_path}"]
+        if self.options.section_gc:
+            tc.extra_cflags.extend(self._section_gc_cflags)
+            if self.options.shared:
+                tc.extra_ldflags.extend(self._section_gc_ldflags)
+        if self.options.get_safe("fast_load"):
+            # exports stay controlled by the libcrypto/libssl version scripts
+            tc.extra_cflags.extend(self._fast_load_cflags)
+            tc.extra_ldflags.extend(self._fast_load_ldflags)
+        if self.options.get_safe("cpu_tier"):
+            tc.extra_cflags.extend(self._cpu_tier_cflags)
+        if self.options.get_safe("debug_symbols"):
+            tc.extra_cflags.extend(self._debug_symbols_cflags)
+            tc.extra_ldflags.extend(self._debug_symbols_ldflags)
+        if self.options.get_safe("profiling"):
+            tc.extra_cflags.extend(self._profiling_cflags)
+        tc.extra_cflags.extend(self._reproducible_cflags)
+        tc.extra_cflags.extend(self._wasm_cflags)
+        tc.extra_ldflags.extend(self._wasm_ldflags)
+        if self._phase_timing:
+            tc.extra_cflags.extend(self._time_trace_cflags)
+        tc.extra_ldflags.extend(self._linker_ldflags + self._link_timer_ldflags())
         env = tc.environment()
         env.define("PERL", self._perl)
         tc.generate(env)
@@ -385,7 +429,7 @@ class OpenSSLConan(ConanFile):
             possible_values = self.options.possible_values
         for option_name in possible_values:
             activated = self.options.get_safe(option_name)
-            if activated and option_name not in ["fPIC", "openssldir", "capieng_dialog", "enable_capieng"]:
+            if activated and option_name not in ["fPIC", "openssldir", "capieng_dialog", "enable_capieng", "section_gc", "fast_load", "cpu_tier", "debug_symbols", "profiling", "wasm_simd", "wasm_threads"]:
                 self.output.info("activated option: %s" % option_name)
                 args.append(option_name.replace("_", "-"))
         return args
@@ -495,7 +539,8 @@ class OpenSSLConan(ConanFile):
             yield
 
     def build(self):
-        apply_conandata_patches(self)
+        with self._build_phase("patch"):
+            apply_conandata_patches(self)
         autotools = Autotools(self)
         self._create_targets()
         with self._make_context():
@@ -509,14 +554,23 @@ class OpenSSLConan(ConanFile):
                 if self._use_nmake:
                     self._replace_runtime_in_file(os.path.join("Configurations", "10-main.conf"))
 
-                self.run(f'{self._perl} ./Configure {args}')
+                with self._build_phase("configure"):
+                    self.run(f'{self._perl} ./Configure {args}')
 
                 self._patch_install_name()
 
-                if self._use_nmake:
-                    self.run("nmake /F Makefile")
-                else:
-                    autotools.make()
+                with self._build_phase("build"):
+                    if self._use_nmake:
+                        self.run("nmake /F Makefile")
+                    else:
+                        # generated first, so that make sees it up to date after the scrub
+                        autotools.make(target="crypto/buildinf.h")
+                        self._scrub_build_info()
+                        autotools.make()
+        if self._phase_timing and self._time_trace_cflags:
+            self._save_time_trace()
+        if self._phase_timing and self._linker:
+            self._save_link_times()
 
     def _patch_install_name(self):
         if is_apple_os(self) and self.options.shared:
@@ -533,15 +587,30 @@ class OpenSSLConan(ConanFile):
             replace_in_file(self, filename, "/{} ".format(e), "/{} ".format(runtime), strict=False)
             replace_in_file(self, filename, "/{}\"".format(e), "/{}\"".format(runtime), strict=False)
 
+    def _scrub_build_info(self):
+        # OpenSSL_version(OPENSSL_CFLAGS) returns the compiler command line, with the paths of this
+        # build in it. util/mkbuildinf.pl writes it as an array of chars, 16 per line
+        buildinf = os.path.join(self.source_folder, "crypto", "buildinf.h")
+        content = load(self, buildinf)
+        match = re.search(r"compiler_flags\[\] = \{\n(.*?)'\\0'", content, re.DOTALL)
+        if not match:
+            return
+        flags = "".join(char[-1] for char in re.findall(r"'(\\.|[^\\])',", match[1]))
+        for path, mapped in self._reproducible_paths.items():
+            flags = flags.replace(path, mapped)
+        chars = [f"'\\{char}'," if char in "\\'" else f"'{char}'," for char in flags]
+        lines = ["    " + "".join(chars[i:i + 16]) for i in range(0, len(chars), 16)]
+        save(self, buildinf, content[:match.start(1)] + "\n".join(lines) + content[match.end(1):])
+
     def package(self):
         copy(self, "*LICENSE", self.source_folder, os.path.join(self.package_folder, "licenses"), keep_path=False)
         if self._use_nmake:
-            with chdir(self, self.source_folder):
+            with chdir(self, self.source_folder), self._build_phase("install"):
                 self.run(f"nmake -f Makefile install_sw DESTDIR={self.package_folder}")
             rm(self, "*.pdb", self.package_folder, recursive=True)
         else:
             autotools = Autotools(self)
-            with chdir(self, self.source_folder):
+            with chdir(self, self.source_folder), self._build_phase("install"):
                 args = [f"DESTDIR={unix_path(self, self.package_folder)}"]
                 autotools.make(target="install_sw", args=args)
 
@@ -558,6 +627,11 @@ class OpenSSLConan(ConanFile):
         self._create_cmake_module_variables(
             os.path.join(self.package_folder, self._module_file_rel_path)
         )
+        self._normalize_archives()
+        if self.options.get_safe("debug_symbols"):
+            with self._build_phase("split_debug_symbols"):
+                self._split_debug_symbols()
+        self._report_build_phases()
 
     def _create_cmake_module_variables(self, module_file):
         content = textwrap.dedent("""\
@@ -622,6 +696,9 @@ class OpenSSLConan(ConanFile):
             self.cpp_info.components["crypto"].libs = ["crypto"]
 
         self.cpp_info.components["ssl"].requires = ["crypto"]
+        if self.options.section_gc:
+            self.cpp_info.components["crypto"].exelinkflags.extend(self._section_gc_ldflags)
+            self.cpp_info.components["crypto"].sharedlinkflags.extend(self._section_gc_ldflags)
 
         if self.settings.os == "Windows":
             self.cpp_info.components["crypto"].system_libs.extend(["crypt32", "ws2_32", "advapi32", "user32", "bcrypt"])
@@ -636,6 +713,11 @@ class OpenSSLConan(ConanFile):
             self.cpp_info.components["ssl"].system_libs.append("atomic")
             self.cpp_info.components["crypto"].system_libs.append("socket")
             self.cpp_info.components["ssl"].system_libs.append("socket")
+        elif self.settings.os == "Emscripten" and self.options.wasm_threads:
+            for component in ("crypto", "ssl"):
+                self.cpp_info.components[component].cflags.append("-pthread")
+                self.cpp_info.components[component].cxxflags.append("-pthread")
+                self.cpp_info.components[component].exelinkflags.extend(self._wasm_ldflags)
 
         # TODO: to remove in conan v2 once cmake_find_package* generators removed
         self.cpp_info.names["cmake_find_package"] = "OpenSSL"
@@ -2,7 +2,7 @@ from conan import ConanFile
 from conan.errors import ConanInvalidConfiguration
 from conan.tools.apple import fix_apple_shared_install_name, is_apple_os, XCRun
 from conan.tools.build import build_jobs
-from conan.tools.files import chdir, copy, get, replace_in_file, rm, rmdir, save
+from conan.tools.files import chdir, copy, get, load, replace_in_file, rm, rmdir, save
 from conan.tools.gnu import AutotoolsToolchain
 from conan.tools.layout import basic_layout
 from conan.tools.microsoft import is_msvc, msvc_runtime_flag, unix_path
@@ -10,8 +10,10 @@ from conan.tools.scm import Version
 
 import fnmatch
 import os
+import re
 import textwrap
 
+
 required_conan_version = ">=1.57.0"
 
 
@@ -24,6 +26,8 @@ class OpenSSLConan(ConanFile):
     topics = ("ssl", "tls", "encryption", "security")
     description = "A toolkit for the Transport Layer Security (TLS) and Secure Sockets Layer (SSL) protocols"
     package_type = "library"
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.RecipeHelpers"
     settings = "os", "arch", "compiler", "build_type"
     options = {
         "shared": [True, False],
@@ -90,9 +94,19 @@ class OpenSSLConan(ConanFile):
         "no_zlib": [True, False],
         "openssldir": [None, "ANY"],
         "tls_security_level": [None, 0, 1, 2, 3, 4, 5],
+        "section_gc": [True, False],
+        "fast_load": [True, False],
+        "cpu_tier": [None, "x86-64-v2", "x86-64-v3", "x86-64-v4", "armv8.2-a+dotprod", "armv8.2-a+dotprod+i8mm"],
+        "debug_symbols": [None, "split", "split_line_tables"],
+        "profiling": [True, False],
+        "wasm_simd": [True, False],
+        "wasm_threads": [True, False],
     }
     default_options = {key: False for key in options.keys()}
     default_options["fPIC"] = True
+    default_options["cpu_tier"] = None
+    default_options["debug_symbols"] = None
+    default_options["wasm_simd"] = True
     default_options["no_md2"] = True
     default_options["openssldir"] = None
     default_options["tls_security_level"] = None
@@ -120,6 +134,7 @@ class OpenSSLConan(ConanFile):
             self.options.rm_safe("enable_capieng")
         else:
             self.options.rm_safe("fPIC")
+        self._config_build_options()
 
         if self.settings.os == "Emscripten":
             self.options.no_asm = True
@@ -129,6 +144,7 @@ class OpenSSLConan(ConanFile):
     def configure(self):
         if self.options.shared:
             self.options.rm_safe("fPIC")
+        self._configure_build_options()
         self.settings.rm_safe("compiler.libcxx")
         self.settings.rm_safe("compiler.cppstd")
 
@@ -140,9 +156,14 @@ class OpenSSLConan(ConanFile):
             self.requires("zlib/[>=1.2.11 <2]")
 
     def validate(self):
+        self._validate_build_options()
+
         if self.settings.os == "Emscripten":
-            if not all((self.options.no_asm, self.options.no_threads, self.options.no_stdio)):
-                raise ConanInvalidConfiguration("os=Emscripten requires openssl:{no_asm,no_threads,no_stdio}=True")
+            if not all((self.options.no_asm, self.options.no_stdio)):
+                raise ConanInvalidConfiguration("os=Emscripten requires openssl:{no_asm,no_stdio}=True")
+            if bool(self.options.no_threads) == bool(self.options.wasm_threads):
+                raise ConanInvalidConfiguration("os=Emscripten requires openssl:no_threads=False with wasm_threads=True, "
+                                                "and openssl:no_threads=True otherwise")
 
         if self.settings.os == "iOS" and self.options.shared:
             raise ConanInvalidConfiguration("OpenSSL 3 does not support building shared libraries for iOS")
@@ -159,7 +180,8 @@ class OpenSSLConan(ConanFile):
                     self.tool_requires("msys2/cci.latest")
 
     def source(self):
-        get(self, **self.conan_data["sources"][self.version], strip_root=True)
+        with self._build_phase("source"):
+            get(self, **self.conan_data["sources"][self.version], strip_root=True)
 
     @property
     def _target(self):
@@ -344,7 +366,8 @@ class OpenSSLConan(ConanFile):
     def _get_default_openssl_dir(self):
         if self.settings.os == "Linux":
             return "/etc/ssl"
-        return os.path.join(self.package_folder, "res")
+        # relative to --prefix=/, like in 1.x: the package folder of the build is temporary anyway
+        return "res"
 
     def _adjust_path(self, path):
         if self._use_nmake:
@@ -411,12 +434,13 @@ class OpenSSLConan(ConanFile):
             ])
 
         for option_name in self.default_options.keys():
-            if self.options.get_safe(option_name, False) and option_name not in ("shared", "fPIC", "openssldir", "tls_security_level", "capieng_dialog", "enable_capieng", "zlib", "no_fips", "no_md2"):
+            if self.options.get_safe(option_name, False) and option_name not in ("shared", "fPIC", "openssldir", "tls_security_level", "capieng_dialog", "enable_capieng", "zlib", "no_fips", "no_md2", "section_gc", "fast_load", "cpu_tier", "debug_symbols", "profiling", "wasm_simd", "wasm_threads"):
                 self.output.info(f"Activated option: {option_name}")
                 args.append(option_name.replace("_", "-"))
         return args
 
     def generate(self):
+        self._save_reproducible_env()
         tc = AutotoolsToolchain(self)
         env = tc.environment()
         env.define_path("PERL", self._perl)
@@ -424,6 +448,27 @@ class OpenSSLConan(ConanFile):
             xcrun = XCRun(self)
             env.define_path("CROSS_SDK", os.path.basename(xcrun.sdk_path))
             env.define_path("CROSS_TOP", os.path.dirname(os.path.dirname(xcrun.sdk_path)))
+        if self.options.section_gc:
+            tc.extra_cflags.extend(self._section_gc_cflags)
+            if self.options.shared:
+                tc.extra_ldflags.extend(self._section_gc_ldflags)
+        if self.options.get_safe("fast_load"):
+            # exports stay controlled by the libcrypto/libssl version scripts
+            tc.extra_cflags.extend(self._fast_load_cflags)
+            tc.extra_ldflags.extend(self._fast_load_ldflags)
+        if self.options.get_safe("cpu_tier"):
+            tc.extra_cflags.extend(self._cpu_tier_cflags)
+        if self.options.get_safe("debug_symbols"):
+            tc.extra_cflags.extend(self._debug_symbols_cflags)
+            tc.extra_ldflags.extend(self._debug_symbols_ldflags)
+        if self.options.get_safe("profiling"):
+            tc.extra_cflags.extend(self._profiling_cflags)
+        tc.extra_cflags.extend(self._reproducible_cflags)
+        tc.extra_cflags.extend(self._wasm_cflags)
+        tc.extra_ldflags.extend(self._wasm_ldflags)
+        if self._phase_timing:
+            tc.extra_cflags.extend(self._time_trace_cflags)
+        tc.extra_ldflags.extend(self._linker_ldflags + self._link_timer_ldflags())
 
         self._create_targets(tc.cflags, tc.cxxflags, tc.defines, tc.ldflags)
         tc.generate(env)
@@ -512,7 +557,8 @@ class OpenSSLConan(ConanFile):
             if self._use_nmake:
                 self._replace_runtime_in_file(os.path.join("Configurations", "10-main.conf"))
 
-            self.run(f"{self._perl} ./Configure {args}", env="conanbuild")
+            with self._build_phase("configure"):
+                self.run(f"{self._perl} ./Configure {args}", env="conanbuild")
             if self._use_nmake:
                 # When `--prefix=/`, the scripts derive `\` without escaping, which
                 # causes issues on Windows
@@ -521,7 +567,12 @@ class OpenSSLConan(ConanFile):
                     # replace backslashes in paths with forward slashes
                     mkinstallvars_pl = os.path.join(self.source_folder, "util", "mkinstallvars.pl")
                     replace_in_file(self, mkinstallvars_pl, "$ENV{$k} = $v;", """$v =~ s|\\\\|/|g; $ENV{$k} = $v;""")
-            self._run_make()
+            with self._build_phase("build"):
+                if not self._use_nmake:
+                    # generated first, so that make sees it up to date after the scrub
+                    self._run_make(targets=["crypto/buildinf.h"], parallel=False)
+                    self._scrub_build_info()
+                self._run_make()
 
     def _make_install(self):
         with chdir(self, self.source_folder):
@@ -531,6 +582,10 @@ class OpenSSLConan(ConanFile):
         self._make()
         configdata_pm = self._adjust_path(os.path.join(self.source_folder, "configdata.pm"))
         self.run(f"{self._perl} {configdata_pm} --dump")
+        if self._phase_timing and self._time_trace_cflags:
+            self._save_time_trace()
+        if self._phase_timing and self._linker:
+            self._save_link_times()
 
     @property
     def _make_program(self):
@@ -542,9 +597,25 @@ class OpenSSLConan(ConanFile):
             replace_in_file(self, filename, f"/{e} ", f"/{runtime} ", strict=False)
             replace_in_file(self, filename, f"/{e}\"", f"/{runtime}\"", strict=False)
 
+    def _scrub_build_info(self):
+        # OpenSSL_version(OPENSSL_CFLAGS) returns the compiler command line, with the paths of this
+        # build in it. util/mkbuildinf.pl writes it as an array of chars, 16 per line
+        buildinf = os.path.join(self.source_folder, "crypto", "buildinf.h")
+        content = load(self, buildinf)
+        match = re.search(r"compiler_flags\[\] = \{\n(.*?)'\\0'", content, re.DOTALL)
+        if not match:
+            return
+        flags = "".join(char[-1] for char in re.findall(r"'(\\.|[^\\])',", match[1]))
+        for path, mapped in self._reproducible_paths.items():
+            flags = flags.replace(path, mapped)
+        chars = [f"'\\{char}'," if char in "\\'" else f"'{char}'," for char in flags]
+        lines = ["    " + "".join(chars[i:i + 16]) for i in range(0, len(chars), 16)]
+        save(self, buildinf, content[:match.start(1)] + "\n".join(lines) + content[match.end(1):])
+
     def package(self):
         copy(self, "*LICENSE*", src=self.source_folder, dst=os.path.join(self.package_folder, "licenses"))
-        self._make_install()
+        with self._build_phase("install"):
+            self._make_install()
         if is_apple_os(self):
             fix_apple_shared_install_name(self)
 
@@ -573,6 +644,11 @@ class OpenSSLConan(ConanFile):
         self._create_cmake_module_variables(
             os.path.join(self.package_folder, self._module_file_rel_path)
         )
+        self._normalize_archives()
+        if self.options.get_safe("debug_symbols"):
+            with self._build_phase("split_debug_symbols"):
+                self._split_debug_symbols()
+        self._report_build_phases()
 
     def _create_cmake_module_variables(self, module_file):
         content = textwrap.dedent("""\
@@ -646,6 +722,9 @@ class OpenSSLConan(ConanFile):
             self.cpp_info.components["crypto"].libs = ["crypto"]
 
         self.cpp_info.components["ssl"].requires = ["crypto"]
+        if self.options.section_gc:
+            self.cpp_info.components["crypto"].exelinkflags.extend(self._section_gc_ldflags)
+            self.cpp_info.components["crypto"].sharedlinkflags.extend(self._section_gc_ldflags)
 
         if not self.options.no_zlib:
             self.cpp_info.components["crypto"].requires.append("zlib::zlib")
@@ -663,6 +742,11 @@ class OpenSSLConan(ConanFile):
             self.cpp_info.components["ssl"].system_libs.append("atomic")
             self.cpp_info.components["crypto"].system_libs.append("socket")
             self.cpp_info.components["ssl"].system_libs.append("socket")
+        elif self.settings.os == "Emscripten" and self.options.wasm_threads:
+            for component in ("crypto", "ssl"):
+                self.cpp_info.components[component].cflags.append("-pthread")
+                self.cpp_info.components[component].cxxflags.append("-pthread")
+                self.cpp_info.components[component].exelinkflags.extend(self._wasm_ldflags)
 
         self.cpp_info.components["crypto"].set_property("cmake_target_name", "OpenSSL::Crypto")
         self.cpp_info.components["crypto"].set_property("pkg_config_name", "libcrypto")
@@ -1,10 +1,14 @@
 from conan import ConanFile
 from conan.tools.build import can_run
 from conan.tools.cmake import cmake_layout, CMake, CMakeToolchain
+from io import StringIO
+import json
 import os
 
 
 class TestPackageConan(ConanFile):
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.TestPackageHelpers"
     settings = "os", "arch", "compiler", "build_type"
     generators = "CMakeDeps", "VirtualRunEnv"
     test_type = "explicit"
@@ -25,6 +29,7 @@ class TestPackageConan(ConanFile):
         tc.cache_variables["OPENSSL_WITH_LEGACY"] = self._with_legacy()
         tc.cache_variables["OPENSSL_WITH_MD4"] = not self.dependencies["openssl"].options.no_md4
         tc.cache_variables["OPENSSL_WITH_RIPEMD160"] = not self.dependencies["openssl"].options.no_rmd160
+        tc.extra_exelinkflags.extend(self._linker_ldflags)
         tc.generate()
 
     def build(self):
@@ -32,7 +37,17 @@ class TestPackageConan(ConanFile):
         cmake.configure()
         cmake.build()
 
+    def _run_bench(self):
+        output = StringIO()
+        self.run(os.path.join(self.cpp.build.bindirs[0], "throughput_bench"), stdout=output, env="conanrun")
+        result = json.loads(output.getvalue().strip().splitlines()[-1])
+        result["name"] = "openssl"
+        result["profiling"] = bool(self.dependencies["openssl"].options.get_safe("profiling"))
+        self.output.info(f"openssl: sha256 {result['sha256_mb_s']:.1f} MB/s, aes-128-gcm {result['aes_128_gcm_mb_s']:.1f} MB/s")
+        self.output.info(f"benchmark: {json.dumps(result, sort_keys=True)}")
+
     def test(self):
         if can_run(self):
             bin_path = os.path.join(self.cpp.build.bindirs[0], "test_package")
             self.run(bin_path, env="conanrun")
+            self._run_bench()
@@ -0,0 +1,63 @@
+/*
+ * Hashes (SHA-256) and encrypts (AES-128-GCM) 64 MiB through EVP and prints one JSON line with
+ * the throughput of both.
+ */
+#include <openssl/evp.h>
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+
+#define SIZE (64 << 20)
+#define CHUNK (16 << 10)
+
+static double now(void)
+{
+    struct timespec ts;
+#ifdef _WIN32
+    timespec_get(&ts, TIME_UTC);
+#else
+    /* monotonic, unlike TIME_UTC; timespec_get() also needs Android API 29 and iOS 13 */
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+#endif
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+int main(void)
+{
+    static unsigned char input[CHUNK], output[CHUNK + 16];
+    static const unsigned char key[16] = "0123456789abcdef", iv[12] = "0123456789ab";
+    unsigned char digest[EVP_MAX_MD_SIZE], tag[16];
+    unsigned int digest_len;
+    int i, out_len;
+    double start, sha256_s, gcm_s;
+    EVP_MD_CTX *md = EVP_MD_CTX_new();
+    EVP_CIPHER_CTX *cipher = EVP_CIPHER_CTX_new();
+
+    if (!md || !cipher)
+        return EXIT_FAILURE;
+    for (i = 0; i < CHUNK; i++)
+        input[i] = (unsigned char)(i * 131);
+
+    start = now();
+    if (EVP_DigestInit_ex(md, EVP_sha256(), NULL) != 1)
+        return EXIT_FAILURE;
+    for (i = 0; i < SIZE / CHUNK; i++)
+        EVP_DigestUpdate(md, input, CHUNK);
+    EVP_DigestFinal_ex(md, digest, &digest_len);
+    sha256_s = now() - start;
+
+    start = now();
+    if (EVP_EncryptInit_ex(cipher, EVP_aes_128_gcm(), NULL, key, iv) != 1)
+        return EXIT_FAILURE;
+    for (i = 0; i < SIZE / CHUNK; i++)
+        EVP_EncryptUpdate(cipher, output, &out_len, input, CHUNK);
+    EVP_EncryptFinal_ex(cipher, output, &out_len);
+    EVP_CIPHER_CTX_ctrl(cipher, EVP_CTRL_GCM_GET_TAG, sizeof(tag), tag);
+    gcm_s = now() - start;
+
+    EVP_MD_CTX_free(md);
+    EVP_CIPHER_CTX_free(cipher);
+    printf("{\"sha256_mb_s\": %.2f, \"aes_128_gcm_mb_s\": %.2f}\n", SIZE / sha256_s / 1e6, SIZE / gcm_s / 1e6);
+    return EXIT_SUCCESS;
+}
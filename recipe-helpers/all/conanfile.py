@@ -0,0 +1,642 @@
+from conan import ConanFile
+from conan.errors import ConanException, ConanInvalidConfiguration
+from conan.tools.apple import is_apple_os, XCRun
+from conan.tools.env import Environment, VirtualBuildEnv
+from conan.tools.files import apply_conandata_patches, download, get, load, mkdir, replace_in_file, save
+from conan.tools.microsoft import is_msvc
+from conan.tools.scm import Version
+from contextlib import contextmanager
+import glob
+import hashlib
+import itertools
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+
+
+required_conan_version = ">=1.57.0"
+
+
+class RecipeHelpers:
+    # Base class of the library recipes in this repository, through
+    #
+    #     python_requires = "recipe-helpers/1.0"
+    #     python_requires_extend = "recipe-helpers.RecipeHelpers"
+    #
+    # It implements the options every recipe has (section_gc, fast_load, cpu_tier, debug_symbols,
+    # profiling, wasm_simd, wasm_threads) and the user.build:* confs. A recipe declares the options,
+    # passes the flags below to its build system and calls the _*_build_options() methods from
+    # config_options(), configure() and validate().
+
+    def _config_build_options(self):
+        if self.settings.os not in ["Linux", "FreeBSD", "Android"]:
+            self.options.rm_safe("fast_load")
+        if self.settings.arch not in ["x86_64", "armv8"]:
+            self.options.rm_safe("cpu_tier")
+        if not is_apple_os(self) and self.settings.os not in ["Linux", "FreeBSD", "Android"]:
+            self.options.rm_safe("debug_symbols")
+        if is_msvc(self):
+            self.options.rm_safe("profiling")
+        if self.settings.os != "Emscripten":
+            self.options.rm_safe("wasm_simd")
+            self.options.rm_safe("wasm_threads")
+
+    def _configure_build_options(self):
+        if not self.options.shared:
+            self.options.rm_safe("fast_load")
+
+    def _validate_build_options(self):
+        cpu_tier = self.options.get_safe("cpu_tier")
+        if cpu_tier and str(cpu_tier).startswith("x86-64") != (self.settings.arch == "x86_64"):
+            raise ConanInvalidConfiguration(f"{self.ref} cpu_tier={cpu_tier} doesn't match arch={self.settings.arch}")
+        if self.settings.os == "Emscripten" and self.options.shared:
+            raise ConanInvalidConfiguration(f"{self.ref} shared=True is not supported on Emscripten, wasm modules link statically")
+        icf = self.conf.get("user.build:icf", check_type=str)
+        if icf and self._linker and self._linker not in ["gold", "lld", "mold"]:
+            raise ConanInvalidConfiguration(f"user.build:icf={icf} needs gold, lld or mold, not {self._linker}")
+
+    @property
+    def _section_gc_cflags(self):
+        if is_msvc(self):
+            return ["/Gy", "/Gw"]
+        return ["-ffunction-sections", "-fdata-sections"]
+
+    @property
+    def _section_gc_ldflags(self):
+        if is_msvc(self):
+            return ["/OPT:REF"]
+        if is_apple_os(self):
+            return ["-Wl,-dead_strip"]
+        return ["-Wl,--gc-sections"]
+
+    @property
+    def _fast_load_cflags(self):
+        return ["-fno-semantic-interposition"]
+
+    @property
+    def _fast_load_ldflags(self):
+        flags = ["-Wl,--hash-style=gnu"]
+        if self.settings.os == "Android":
+            api_level = int(str(self.settings.get_safe("os.api_level") or 0))
+            flags.append("-Wl,-z,max-page-size=16384")
+            if api_level >= 30:
+                flags.append("-Wl,--pack-dyn-relocs=android+relr")
+            elif api_level >= 28:
+                flags.extend(["-Wl,--pack-dyn-relocs=android+relr", "-Wl,--use-android-relr-tags"])
+            elif api_level >= 23:
+                flags.append("-Wl,--pack-dyn-relocs=android")
+        elif self._linker_accepts("-Wl,-z,pack-relative-relocs"):
+            # DT_RELR needs glibc >= 2.36 at run time, the libraries then depend on GLIBC_ABI_DT_RELR
+            flags.append("-Wl,-z,pack-relative-relocs")
+        else:
+            self.output.warning("the linker doesn't support -z pack-relative-relocs (binutils >= 2.38 or "
+                                "lld >= 15), relative relocations are not packed")
+        return flags
+
+    def _linker_accepts(self, *flags):
+        # links an empty shared library with the C compiler of the build environment; old ld.bfd, lld
+        # and gold only warn about an unknown -z option, so warnings are fatal
+        buildenv_vars = VirtualBuildEnv(self).vars()
+        compilers_from_conf = self.conf.get("tools.build:compiler_executables", default={}, check_type=dict)
+        cc = compilers_from_conf.get("c") or buildenv_vars.get("CC") or ("clang" if "clang" in str(self.settings.compiler) else "cc")
+        extra_flags = self.conf.get("tools.build:cflags", default=[], check_type=list)
+        extra_flags += self.conf.get("tools.build:sharedlinkflags", default=[], check_type=list)
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "probe.c")
+            save(self, source, "int probe(void) { return 0; }\n")
+            command = shlex.split(cc) + extra_flags + self._linker_ldflags[:1] + list(flags)
+            command += ["-Wl,--fatal-warnings", "-shared", "-fPIC", source, "-o", os.path.join(tmp, "libprobe.so")]
+            try:
+                with buildenv_vars.apply():
+                    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False)
+            except OSError:
+                return False
+        return result.returncode == 0
+
+    @property
+    def _cpu_tier_cflags(self):
+        cpu_tier = str(self.options.cpu_tier)
+        if is_msvc(self):
+            return {"x86-64-v3": ["/arch:AVX2"], "x86-64-v4": ["/arch:AVX512"]}.get(cpu_tier, [])
+        return [f"-march={cpu_tier}"]
+
+    @property
+    def _debug_symbols_cflags(self):
+        # -g1 is line tables only with both gcc and clang: enough for profilers and stack traces
+        return ["-g1"] if self.options.debug_symbols == "split_line_tables" else ["-g"]
+
+    @property
+    def _debug_symbols_ldflags(self):
+        return [] if is_apple_os(self) else ["-Wl,--build-id=sha1"]
+
+    @property
+    def _profiling_cflags(self):
+        # optimization stays as is; frame pointers in every function (leaf ones included) and unwind
+        # tables valid at any instruction let perf/simpleperf walk call graphs through the library
+        flags = ["-fno-omit-frame-pointer", "-fasynchronous-unwind-tables"]
+        if self.settings.compiler in ("clang", "apple-clang") or self.settings.arch in ("x86", "x86_64", "armv8"):
+            # gcc only has the leaf variant on x86 and aarch64
+            flags.append("-mno-omit-leaf-frame-pointer")
+        return flags
+
+    def _keep_frame_pointers(self, configure):
+        # configure appends -fomit-frame-pointer after --extra-cflags, where it would win. It has to
+        # go before configure runs, not from config.mak afterwards: the compiler probes use those
+        # flags, and on 32-bit x86 they decide whether inline asm may use ebp (HAVE_7REGS)
+        self._replace_in_file_once(configure, "-fomit-frame-pointer", "-fno-omit-frame-pointer", strict=False)
+
+    def _check_frame_pointers(self, config_mak, config_h=None):
+        if "-fomit-frame-pointer" in load(self, config_mak):
+            raise ConanException(f"{self.ref} profiling=True, but {config_mak} still has -fomit-frame-pointer")
+        # gcc refuses an ebp clobber while ebp is the frame pointer, so the probe must have failed
+        if (config_h and self.settings.arch == "x86" and self.settings.compiler == "gcc"
+                and "#define HAVE_EBP_AVAILABLE 1" in load(self, config_h)):
+            raise ConanException(f"{self.ref} profiling=True, but configure probed inline asm without the frame pointer")
+
+    @property
+    def _wasm_cflags(self):
+        # -msimd128 lets clang vectorize loops into wasm SIMD instructions; -pthread compiles for
+        # shared memory (atomics, bulk memory), which every object of a threaded wasm module needs
+        flags = ["-msimd128"] if self.options.get_safe("wasm_simd") else []
+        if self.options.get_safe("wasm_threads"):
+            flags.append("-pthread")
+        return flags
+
+    @property
+    def _wasm_ldflags(self):
+        return ["-pthread"] if self.options.get_safe("wasm_threads") else []
+
+    @property
+    def _compatible_compiler_versions(self):
+        # the same major only (gcc 11 and 11.4, apple-clang 15 and 15.0): an older major can miss
+        # runtime symbols, and shared libraries would load them from the consumer's runtime
+        compiler_version = str(self.settings.compiler.version)
+        major = compiler_version.split(".")[0]
+        return [version for version in self.settings.compiler.version.possible_values()
+                if version != compiler_version and version.split(".")[0] == major]
+
+    def compatibility(self):
+        # binaries built for an older Android API level or Apple deployment target only use a subset
+        # of what newer ones offer, so they serve newer consumers as well
+        if is_msvc(self):
+            return []
+        factors = [[("compiler.version", version) for version in self._compatible_compiler_versions]]
+        api_level = self.settings.get_safe("os.api_level")
+        if self.settings.os == "Android" and api_level:
+            # down to 21, the oldest API level the NDKs in use still build for
+            factors.append([("os.api_level", str(level)) for level in range(int(api_level) - 1, min(int(api_level), 21) - 1, -1)])
+        os_version = self.settings.get_safe("os.version")
+        if is_apple_os(self) and os_version:
+            # older minors of the same major, and the first release of the previous major
+            major = int(os_version.split(".")[0])
+            older = [version for version in self.settings.os.version.possible_values()
+                     if Version(version) < os_version and (int(version.split(".")[0]) == major or version == f"{major - 1}.0")]
+            factors.append([("os.version", version) for version in sorted(older, key=Version, reverse=True)])
+        # every combination, nearest first: the first one found in the cache or a remote is used
+        choices = [[None] + factor for factor in factors]
+        combinations = sorted(itertools.product(*[range(len(choice)) for choice in choices]), key=sum)[1:]
+        return [{"settings": [choices[factor][index] for factor, index in enumerate(combination) if index]}
+                for combination in combinations]
+
+    @property
+    def _reproducible_paths(self):
+        # folders that change from build to build and machine to machine, nested ones first
+        paths = {self.source_folder: f"/conan/src/{self.name}", self.build_folder: f"/conan/build/{self.name}"}
+        for dependency in self.dependencies.values():
+            if dependency.package_folder:
+                paths[dependency.package_folder] = f"/conan/package/{dependency.ref.name}"
+        ndk_path = self.conf.get("tools.android:ndk_path")
+        if self.settings.os == "Android" and ndk_path:
+            paths[ndk_path.rstrip("/\\")] = "/conan/ndk"
+        return dict(sorted(paths.items(), key=lambda item: len(item[0]), reverse=True))
+
+    @property
+    def _reproducible_cflags(self):
+        # __FILE__, assert messages and debug info get fixed paths instead of the build folders
+        if is_msvc(self) or self.settings.get_safe("compiler.runtime"):
+            return []
+        compiler_version = Version(self.settings.compiler.version)
+        file_prefix_map = ((self.settings.compiler == "gcc" and compiler_version >= "8")
+                           or (self.settings.compiler == "clang" and compiler_version >= "10")
+                           or (self.settings.compiler == "apple-clang" and compiler_version >= "12"))
+        flag = "-ffile-prefix-map" if file_prefix_map else "-fdebug-prefix-map"
+        # gcc and clang use the last map that matches, nested folders go last
+        return [f"{flag}={path}={mapped}" for path, mapped in reversed(self._reproducible_paths.items())]
+
+    def _save_reproducible_env(self):
+        env = Environment()
+        # embedded build dates use it instead of the current time, by default 1980-01-01 (the
+        # oldest date a zip entry can hold)
+        env.define("SOURCE_DATE_EPOCH", str(self.conf.get("user.build:source_date_epoch", default=315532800, check_type=int)))
+        if is_apple_os(self):
+            # ar, libtool and ld64 write zeros instead of the current time
+            env.define("ZERO_AR_DATE", "1")
+        env.vars(self, scope="build").save_script("conanbuild_reproducible")
+
+    def _normalize_archives(self):
+        # what ar's D modifier does, whatever ar the toolchain has: member headers get zero
+        # timestamps, owners and groups, so the same objects always give the same archive
+        for archive in sorted(glob.glob(os.path.join(self.package_folder, "lib", "**", "*.a"), recursive=True)):
+            if os.path.islink(archive):
+                continue
+            with open(archive, "rb") as f:
+                content = bytearray(f.read())
+            if not content.startswith(b"!<arch>\n"):
+                continue  # thin archives only hold paths
+            offset = 8
+            while offset + 60 <= len(content):
+                name = bytes(content[offset:offset + 16]).rstrip()
+                for start, end in ((16, 28), (28, 34), (34, 40)):
+                    if content[offset + start:offset + end].strip():
+                        content[offset + start:offset + end] = b"0".ljust(end - start)
+                if name not in (b"/", b"//", b"/SYM64/"):
+                    content[offset + 40:offset + 48] = b"644".ljust(8)
+                size = int(content[offset + 48:offset + 58])
+                offset += 60 + size + size % 2
+            with open(archive, "wb") as f:
+                f.write(content)
+
+    @property
+    def _objcopy(self):
+        objcopy = VirtualBuildEnv(self).vars().get("OBJCOPY")
+        ndk_path = self.conf.get("tools.android:ndk_path")
+        if not objcopy and self.settings.os == "Android" and ndk_path:
+            objcopy = next(iter(glob.glob(os.path.join(ndk_path, "toolchains", "llvm", "prebuilt", "*", "bin", "llvm-objcopy*"))), None)
+        return objcopy or "objcopy"
+
+    def _split_debug_symbols(self):
+        # debug info goes to the package metadata, which is only downloaded on request
+        debug_folder = os.path.join(self.package_metadata_folder, "debug")
+        mkdir(self, debug_folder)
+        binaries = glob.glob(os.path.join(self.package_folder, "lib", "**"), recursive=True)
+        binaries += glob.glob(os.path.join(self.package_folder, "bin", "**"), recursive=True)
+        stripped_archives = False
+        for binary in sorted(binaries):
+            if os.path.islink(binary) or not os.path.isfile(binary):
+                continue
+            with open(binary, "rb") as f:
+                magic = f.read(8)
+            debug_file = os.path.join(debug_folder, os.path.basename(binary))
+            if magic.startswith(b"\x7fELF"):
+                self.run(f'"{self._objcopy}" --only-keep-debug "{binary}" "{debug_file}.debug"')
+                self.run(f'"{self._objcopy}" --strip-debug --add-gnu-debuglink="{debug_file}.debug" "{binary}"')
+            elif magic[:4] in (b"\xcf\xfa\xed\xfe", b"\xce\xfa\xed\xfe", b"\xca\xfe\xba\xbe"):
+                xcrun = XCRun(self)
+                self.run(f'"{xcrun.find("dsymutil")}" "{binary}" -o "{debug_file}.dSYM"')
+                self.run(f'"{xcrun.strip}" -S "{binary}"')
+            elif magic == b"!<arch>\n":
+                # debug info of a static library only ends up in the consumer's link, and objects
+                # reduced to their debug sections can't be linked: the whole archive goes to the
+                # metadata, to link against instead of the packaged one when debugging
+                shutil.copy2(binary, debug_file)
+                strip = f'"{XCRun(self).strip}" -S' if is_apple_os(self) else f'"{self._objcopy}" --strip-debug'
+                self.run(f'{strip} "{binary}"')
+                stripped_archives = True
+        if stripped_archives:
+            # strip rewrites the member headers with the current time
+            self._normalize_archives()
+
+    @property
+    def _phase_timing(self):
+        return self.conf.get("user.build:phase_timing", check_type=bool)
+
+    @property
+    def _time_trace_cflags(self):
+        # one chrome://tracing file per translation unit, written next to its object file
+        compiler_version = Version(self.settings.compiler.version)
+        if self.settings.compiler == "clang" and compiler_version >= "9" and not self.settings.get_safe("compiler.runtime"):
+            return ["-ftime-trace"]
+        if self.settings.compiler == "apple-clang" and compiler_version >= "12":
+            return ["-ftime-trace"]
+        return []
+
+    @property
+    def _build_phases_file(self):
+        # source() runs before the build folder exists, its entry reaches the build with the sources copy
+        return os.path.join(self.build_folder or self.source_folder, "build_phases.json")
+
+    def _load_build_phases(self):
+        for path in (self._build_phases_file, os.path.join(self.source_folder, "build_phases.json")):
+            if os.path.isfile(path):
+                return json.loads(load(self, path))
+        return {"reference": f"{self.name}/{self.version}", "phases": {}}
+
+    def _save_build_phases(self, phases=None, **sections):
+        report = self._load_build_phases()
+        report["phases"].update(phases or {})
+        report.update(sections)
+        save(self, self._build_phases_file, json.dumps(report, indent=2))
+
+    @contextmanager
+    def _build_phase(self, name):
+        if not self._phase_timing:
+            yield
+            return
+        # time traces older than the first phase of this process come from earlier builds
+        self._phases_started = getattr(self, "_phases_started", None) or time.time()
+        start_wall, start_cpu = time.perf_counter(), os.times()
+        with _PeakRssSampler() as rss:
+            yield
+        end_cpu = os.times()
+        phase = {
+            "wall_s": round(time.perf_counter() - start_wall, 3),
+            "cpu_s": round(sum(end_cpu[:4]) - sum(start_cpu[:4]), 3),
+        }
+        if rss.peak_kib is not None:
+            phase["peak_rss_mb"] = round(rss.peak_kib / 1024, 1)
+        self._save_build_phases(phases={name: phase})
+        self.output.info(f"phase {name}: {phase['wall_s']:.1f}s wall, {phase['cpu_s']:.1f}s cpu")
+
+    def _time_trace_files(self):
+        # clang writes <object without extension>.json next to each object file, only those of
+        # objects compiled by this build count: not stale ones, not the other .json files of the tree
+        started = getattr(self, "_phases_started", None)
+        trace_files = set()
+        for folder in (self.build_folder, self.source_folder):
+            for extension in ("o", "obj"):
+                for obj in glob.glob(os.path.join(folder, "**", f"*.{extension}"), recursive=True):
+                    trace_file = os.path.splitext(obj)[0] + ".json"
+                    # with some slack for file systems that store whole seconds
+                    if os.path.isfile(trace_file) and (started is None or os.path.getmtime(trace_file) >= started - 2):
+                        trace_files.add(os.path.realpath(trace_file))
+        return sorted(trace_files)
+
+    def _save_time_trace(self, limit=20):
+        # inclusive times: a header's entry also counts the headers it includes
+        units, headers = {}, {}
+        for trace_file in self._time_trace_files():
+            try:
+                events = json.loads(load(self, trace_file)).get("traceEvents")
+            except (ValueError, AttributeError, UnicodeDecodeError):
+                continue
+            for event in events or []:
+                if event.get("name") == "ExecuteCompiler":
+                    units[os.path.splitext(os.path.relpath(trace_file, self.build_folder))[0]] = event["dur"] / 1e6
+                elif event.get("name") == "Source":
+                    header = event.get("args", {}).get("detail", "")
+                    headers[header] = headers.get(header, 0) + event["dur"] / 1e6
+        if not units:
+            return
+
+        def slowest(seconds):
+            return [{"name": name, "seconds": round(seconds[name], 3)}
+                    for name in sorted(seconds, key=seconds.get, reverse=True)[:limit]]
+        time_trace = {
+            "translation_units": len(units),
+            "compile_seconds": round(sum(units.values()), 3),
+            "slowest_units": slowest(units),
+            "slowest_headers": slowest(headers),
+        }
+        self._save_build_phases(time_trace=time_trace)
+        self.output.info(f"time trace: {len(units)} translation units, {time_trace['compile_seconds']:.1f}s of compilation")
+
+    @property
+    def _linker(self):
+        # -fuse-ld goes through the compiler driver: ELF targets only, ld64 and link.exe are left alone
+        if is_apple_os(self) or is_msvc(self):
+            return None
+        return self.conf.get("user.build:linker", check_type=str)
+
+    @property
+    def _linker_ldflags(self):
+        if not self._linker:
+            return []
+        flags = [f"-fuse-ld={self._linker}"]
+        icf = self.conf.get("user.build:icf", check_type=str)
+        if icf:
+            flags.append(f"-Wl,--icf={icf}")
+        return flags
+
+    def _link_timer_ldflags(self):
+        # the compiler driver looks up ld.<linker> in -B folders first: a wrapper there times every link
+        if not self._linker or not self._phase_timing or os.name == "nt":
+            return []
+        program = f"ld.{self._linker}"
+        search = [os.path.dirname(shutil.which(cc) or cc) for cc in [VirtualBuildEnv(self).vars().get("CC")] if cc]
+        ndk_path = self.conf.get("tools.android:ndk_path")
+        if self.settings.os == "Android" and ndk_path:
+            search.extend(glob.glob(os.path.join(ndk_path, "toolchains", "llvm", "prebuilt", "*", "bin")))
+        linker = shutil.which(program, path=os.pathsep.join(search + [os.environ.get("PATH", "")]))
+        if not linker:
+            self.output.warning(f"{program} not found, link times are not recorded")
+            return []
+        save(self, os.path.join(self.build_folder, "link_timings.log"), "")
+        timer_folder = os.path.join(self.build_folder, "link_timer")
+        timer = os.path.join(timer_folder, program)
+        save(self, timer, textwrap.dedent(f"""\
+            #!{sys.executable}
+            import os, subprocess, sys, time
+            start = time.perf_counter()
+            status = subprocess.call([{linker!r}] + sys.argv[1:])
+            output = os.path.abspath(sys.argv[sys.argv.index("-o") + 1] if "-o" in sys.argv[1:-1] else "a.out")
+            with open({os.path.join(self.build_folder, "link_timings.log")!r}, "a") as log:
+                log.write(f"{{time.perf_counter() - start:.4f}} {{output}}\\n")
+            sys.exit(status)
+        """))
+        os.chmod(timer, 0o755)
+        return [f"-B{timer_folder}{os.sep}"]
+
+    def _save_link_times(self, limit=10):
+        timings_log = os.path.join(self.build_folder, "link_timings.log")
+        if not os.path.isfile(timings_log):
+            return
+        links = {}
+        for line in load(self, timings_log).splitlines():
+            seconds, output = line.split(" ", 1)
+            output = os.path.relpath(output, self.build_folder)
+            # configure checks link throwaway programs
+            if not output.startswith("..") and not any(marker in output for marker in ("conftest", "CMakeScratch", "CMakeTmp", "meson-private")):
+                links[output] = links.get(output, 0) + float(seconds)
+        link = {
+            "linker": self._linker,
+            "icf": self.conf.get("user.build:icf", check_type=str),
+            "links": len(links),
+            "wall_s": round(sum(links.values()), 3),
+            "slowest": [{"name": name, "seconds": round(links[name], 3)}
+                        for name in sorted(links, key=links.get, reverse=True)[:limit]],
+        }
+        self._save_build_phases(link=link)
+        self.output.info(f"link: {link['links']} links with {self._linker}, {link['wall_s']:.1f}s")
+
+    def _report_build_phases(self):
+        if not self._phase_timing or not os.path.isfile(self._build_phases_file):
+            return
+        phases = self._load_build_phases()["phases"]
+        self.output.info(f"build phases in {self._build_phases_file}")
+        self.output.info("benchmark: " + json.dumps({
+            "name": "build_phases", "reference": f"{self.name}/{self.version}",
+            "wall_s": round(sum(phase["wall_s"] for phase in phases.values()), 3),
+            "phases": {name: phase["wall_s"] for name, phase in phases.items()},
+        }))
+
+    def _get_sources(self):
+        source = self.conan_data["sources"][self.version]
+        url = source["url"][0] if isinstance(source["url"], list) else source["url"]
+        # Python's bz2/lzma extract on one core, lbzip2/pbzip2 and xz -T0 use all of them
+        decompressor = None
+        if os.name != "nt" and url.endswith(".tar.bz2"):
+            decompressor = next((tool for tool in ("lbzip2", "pbzip2") if shutil.which(tool)), None)
+        elif os.name != "nt" and url.endswith(".tar.xz") and shutil.which("xz"):
+            decompressor = "xz -T0"
+        if not decompressor:
+            get(self, **source, strip_root=True)
+            return
+        # download() goes through core.sources:download_cache and the backup urls like get() does
+        tarball = os.path.join(self.source_folder, os.path.basename(url))
+        download(self, source["url"], tarball, sha256=source["sha256"])
+        self.run(f'tar --use-compress-program="{decompressor}" --strip-components=1 -xf "{tarball}"', cwd=self.source_folder)
+        os.unlink(tarball)
+
+    @property
+    def _patch_stamps_file(self):
+        # a local `conan build` reuses the patched sources: patching them again fails, or touches
+        # files so that make rebuilds everything depending on them
+        return os.path.join(self.source_folder, ".conan_patches")
+
+    def _patch_once(self, apply, *inputs):
+        digest = hashlib.sha256(repr(inputs).encode()).hexdigest()
+        stamps = load(self, self._patch_stamps_file).split() if os.path.isfile(self._patch_stamps_file) else []
+        if digest in stamps:
+            return
+        apply()
+        save(self, self._patch_stamps_file, "".join(f"{stamp}\n" for stamp in stamps + [digest]))
+
+    def _apply_conandata_patches_once(self):
+        patches = self.conan_data.get("patches", {}).get(self.version, [])
+        contents = [load(self, os.path.join(self.export_sources_folder, entry["patch_file"]))
+                    for entry in patches if "patch_file" in entry]
+        self._patch_once(lambda: apply_conandata_patches(self), patches, contents)
+
+    def _replace_in_file_once(self, path, search, replace, strict=True):
+        self._patch_once(lambda: replace_in_file(self, path, search, replace, strict=strict),
+                         os.path.relpath(os.path.abspath(path), self.source_folder), search, replace)
+
+    def _configure_once(self, configure, configured_file, sources, args=None):
+        # configure rewrites config.h/config.mak, which makes make rebuild everything: only run it
+        # again when the generated toolchain and dependencies, the given sources or the args changed
+        generated = [path for path in glob.glob(os.path.join(self.generators_folder, "*"))
+                     # deactivate scripts save the calling environment, they are not an input
+                     if not os.path.basename(path).startswith("deactivate")]
+        digests = []
+        for path in sorted(generated) + list(sources):
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    digests.append((os.path.basename(path), hashlib.sha256(f.read()).hexdigest()))
+        digest = hashlib.sha256(repr((digests, args)).encode()).hexdigest()
+        stamp = os.path.join(os.path.dirname(os.path.abspath(configured_file)), ".conan_configure")
+        if os.path.isfile(configured_file) and os.path.isfile(stamp) and load(self, stamp) == digest:
+            self.output.info(f"configure inputs unchanged, reusing {configured_file}")
+            return
+        configure()
+        save(self, stamp, digest)
+
+
+class TestPackageHelpers:
+    # Base class of the test packages, through
+    #
+    #     python_requires = "recipe-helpers/1.0"
+    #     python_requires_extend = "recipe-helpers.TestPackageHelpers"
+    #
+    # The test programs link with the user.build:linker and user.build:icf of the libraries.
+
+    _linker = RecipeHelpers._linker
+    _linker_ldflags = RecipeHelpers._linker_ldflags
+
+    def _repo_script(self, name):
+        # every test package sits three levels below the repository root: <recipe>/<folder>/test_package
+        return os.path.join(self.recipe_folder, os.pardir, os.pardir, os.pardir, "scripts", name)
+
+    def _executable(self, name):
+        bin_path = os.path.join(self.cpp.build.bindirs[0], name)
+        if self.settings.os == "Windows":
+            bin_path += ".exe"
+        elif self.settings.os == "Emscripten":
+            bin_path += ".js"
+        return bin_path
+
+    def _command(self, name):
+        if self.settings.os != "Emscripten":
+            return self._executable(name)
+        # node loads the .js, which instantiates the .wasm next to it
+        node = self.conf.get("user.build:node", default="node", check_type=str)
+        return f'"{node}" "{self._repo_script("wasm_runner.js")}" "{self._executable(name)}"'
+
+
+class _PeakRssSampler:
+    # Peak of the summed resident set size of the processes a build phase starts (make, compilers,
+    # linkers, ...), sampled every interval seconds: processes that start and end between two
+    # samples are missed. peak_kib stays None where it can't be measured (Windows).
+
+    def __init__(self, interval=0.1):
+        self.peak_kib = None
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True) if os.name != "nt" else None
+
+    def __enter__(self):
+        if self._thread:
+            self.peak_kib = 0
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+
+    def _sample(self):
+        while True:
+            try:
+                rss = _descendants_rss_kib(os.getpid())
+            except (OSError, ValueError, subprocess.SubprocessError):
+                self.peak_kib = None  # no /proc and no usable ps
+                return
+            self.peak_kib = max(self.peak_kib, rss)
+            if self._stop.wait(self._interval):
+                return
+
+
+def _descendants_rss_kib(root_pid):
+    processes = {}
+    if os.path.isdir("/proc/self"):
+        page_kib = os.sysconf("SC_PAGE_SIZE") // 1024
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # the command name may hold spaces and parentheses, the fields after it don't
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except (OSError, IndexError):
+                continue  # exited meanwhile
+            processes[int(entry)] = (int(fields[1]), int(fields[21]) * page_kib)
+    else:
+        output = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss="], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, check=True, text=True).stdout
+        for line in output.splitlines():
+            pid, ppid, rss = (int(value) for value in line.split())
+            processes[pid] = (ppid, rss)
+    children = {}
+    for pid, (ppid, _) in processes.items():
+        children.setdefault(ppid, []).append(pid)
+    total, pending = 0, list(children.get(root_pid, []))
+    while pending:
+        pid = pending.pop()
+        total += processes[pid][1]
+        pending.extend(children.get(pid, []))
+    return total
+
+
+class RecipeHelpersConan(ConanFile):
+    name = "recipe-helpers"
+    version = "1.0"
+    description = "Build helpers shared by the recipes of this repository"
+    license = "MIT"
+    package_type = "python-require"
@@ -0,0 +1,108 @@
+#include "cpu_tier_loader.h"
+
+#include <dlfcn.h>
+#include <stdio.h>
+#include <string.h>
+#include <sys/stat.h>
+
+#if defined(__aarch64__) && defined(__linux__)
+#   include <sys/auxv.h>
+#   ifndef AT_HWCAP2
+#       define AT_HWCAP2 26
+#   endif
+#   define CPU_TIER_HWCAP_ATOMICS  (1UL << 8)
+#   define CPU_TIER_HWCAP_ASIMDRDM (1UL << 12)
+#   define CPU_TIER_HWCAP_ASIMDDP  (1UL << 20)
+#   define CPU_TIER_HWCAP2_I8MM    (1UL << 13)
+#elif defined(__aarch64__) && defined(__APPLE__)
+#   include <sys/sysctl.h>
+#endif
+
+/* best first */
+static const char *const tiers[] = {
+#if defined(__x86_64__)
+    "x86-64-v4", "x86-64-v3", "x86-64-v2",
+#elif defined(__aarch64__)
+    "armv8.2-a+dotprod+i8mm", "armv8.2-a+dotprod",
+#endif
+    NULL
+};
+
+#if defined(__aarch64__) && defined(__APPLE__)
+static int sysctl_flag(const char *name)
+{
+    int value = 0;
+    size_t size = sizeof(value);
+    return sysctlbyname(name, &value, &size, NULL, 0) == 0 && value;
+}
+#endif
+
+int cpu_tier_supported(const char *tier)
+{
+#if defined(__x86_64__) && (defined(__GNUC__) || defined(__clang__))
+    int v2, v3;
+
+    __builtin_cpu_init();
+    v2 = __builtin_cpu_supports("ssse3") && __builtin_cpu_supports("sse4.2") && __builtin_cpu_supports("popcnt");
+    v3 = v2 && __builtin_cpu_supports("avx") && __builtin_cpu_supports("avx2") && __builtin_cpu_supports("fma") &&
+         __builtin_cpu_supports("bmi") && __builtin_cpu_supports("bmi2");
+    if (strcmp(tier, "x86-64-v2") == 0)
+        return v2;
+    if (strcmp(tier, "x86-64-v3") == 0)
+        return v3;
+    if (strcmp(tier, "x86-64-v4") == 0)
+        return v3 && __builtin_cpu_supports("avx512f") && __builtin_cpu_supports("avx512bw") &&
+               __builtin_cpu_supports("avx512cd") && __builtin_cpu_supports("avx512dq") &&
+               __builtin_cpu_supports("avx512vl");
+#elif defined(__aarch64__) && defined(__linux__)
+    unsigned long hwcap = getauxval(AT_HWCAP);
+    unsigned long hwcap2 = getauxval(AT_HWCAP2);
+    unsigned long v82 = CPU_TIER_HWCAP_ATOMICS | CPU_TIER_HWCAP_ASIMDRDM | CPU_TIER_HWCAP_ASIMDDP;
+
+    if (strcmp(tier, "armv8.2-a+dotprod") == 0)
+        return (hwcap & v82) == v82;
+    if (strcmp(tier, "armv8.2-a+dotprod+i8mm") == 0)
+        return (hwcap & v82) == v82 && (hwcap2 & CPU_TIER_HWCAP2_I8MM);
+#elif defined(__aarch64__) && defined(__APPLE__)
+    if (strcmp(tier, "armv8.2-a+dotprod") == 0)
+        return sysctl_flag("hw.optional.arm.FEAT_DotProd");
+    if (strcmp(tier, "armv8.2-a+dotprod+i8mm") == 0)
+        return sysctl_flag("hw.optional.arm.FEAT_DotProd") && sysctl_flag("hw.optional.arm.FEAT_I8MM");
+#endif
+    (void)tier;
+    return 0;
+}
+
+const char *cpu_tier_select(const char *root)
+{
+    char path[4096];
+    struct stat st;
+    size_t i;
+
+    for (i = 0; tiers[i]; i++) {
+        snprintf(path, sizeof(path), "%s/%s", root, tiers[i]);
+        if (stat(path, &st) == 0 && S_ISDIR(st.st_mode) && cpu_tier_supported(tiers[i]))
+            return tiers[i];
+    }
+    return NULL;
+}
+
+void *cpu_tier_dlopen(const char *root, const char *const *libraries, size_t count, int flags)
+{
+    const char *tier = cpu_tier_select(root);
+    char path[4096];
+    void *handle = NULL;
+    size_t i;
+
+    for (i = 0; i < count; i++) {
+        if (tier)
+            snprintf(path, sizeof(path), "%s/%s/%s", root, tier, libraries[i]);
+        else
+            snprintf(path, sizeof(path), "%s/%s", root, libraries[i]);
+        /* RTLD_GLOBAL so that later libraries resolve their DT_NEEDED entries to this tier */
+        handle = dlopen(path, flags | RTLD_GLOBAL);
+        if (!handle)
+            return NULL;
+    }
+    return handle;
+}
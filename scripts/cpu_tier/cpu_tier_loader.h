@@ -0,0 +1,33 @@
+/*
+ * Runtime selection between CPU-tiered builds produced by scripts/package_cpu_tiers.py.
+ *
+ * The baseline libraries live directly in <root>, every tier in <root>/<tier> (for example
+ * <root>/x86-64-v3 or <root>/armv8.2-a+dotprod). The best tier that both exists on disk and is
+ * supported by the running CPU is picked, falling back to the baseline.
+ */
+#ifndef CPU_TIER_LOADER_H
+#define CPU_TIER_LOADER_H
+
+#include <stddef.h>
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/* Non-zero if the running CPU can execute code built for the given cpu_tier. */
+int cpu_tier_supported(const char *tier);
+
+/* Best tier available under root for this CPU, or NULL for the baseline. */
+const char *cpu_tier_select(const char *root);
+
+/*
+ * dlopen()s the libraries (file names, dependencies first) of the selected tier with the given
+ * dlopen flags. Returns the handle of the last library, or NULL if one of them failed to load.
+ */
+void *cpu_tier_dlopen(const char *root, const char *const *libraries, size_t count, int flags);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif /* CPU_TIER_LOADER_H */
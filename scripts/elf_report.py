@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Report the load-time relevant properties of ELF shared libraries.
+
+For every library it prints the number of dynamic relocations (and how many of them are
+relative ones), whether they are packed (RELR / Android APS2), the hash tables present, the
+number of exported symbols and the alignment of the PT_LOAD segments.
+
+    python scripts/elf_report.py <package>/lib/*.so
+    python scripts/elf_report.py --min-page-size 16384 --require-gnu-hash lib/*.so
+
+Only the python standard library is used, so it also works for cross-compiled libraries.
+"""
+import argparse
+import json
+import struct
+import sys
+
+SHT_RELA = 4
+SHT_HASH = 5
+SHT_REL = 9
+SHT_DYNSYM = 11
+SHT_RELR = 19
+SHT_ANDROID_REL = 0x60000001
+SHT_ANDROID_RELA = 0x60000002
+SHT_ANDROID_RELR = 0x6fffff00
+SHT_GNU_HASH = 0x6ffffff6
+PT_LOAD = 1
+
+# e_machine -> R_*_RELATIVE
+RELATIVE_RELOCATION_TYPES = {
+    3: 8,       # EM_386
+    40: 23,     # EM_ARM
+    62: 8,      # EM_X86_64
+    183: 1027,  # EM_AARCH64
+}
+
+
+class ElfError(Exception):
+    pass
+
+
+def _sleb128(data, offset):
+    result = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            if byte & 0x40:
+                result -= 1 << shift
+            return result, offset
+
+
+def _relr_count(data, entry_size):
+    fmt = "Q" if entry_size == 8 else "I"
+    count = 0
+    for (entry,) in struct.iter_unpack("<" + fmt, data):
+        # an even entry is an address, an odd one a bitmap of the following words
+        count += 1 if entry & 1 == 0 else bin(entry).count("1") - 1
+    return count
+
+
+def _android_packed_count(data):
+    if data[:4] != b"APS2":
+        raise ElfError("unknown android packed relocation format")
+    count, _ = _sleb128(data, 4)
+    return count
+
+
+def inspect(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != b"\x7fELF":
+        raise ElfError("not an ELF file")
+    is_64 = data[4] == 2
+    endian = "<" if data[5] == 1 else ">"
+    if is_64:
+        header = struct.unpack_from(endian + "HHIQQQIHHHHHH", data, 16)
+    else:
+        header = struct.unpack_from(endian + "HHIIIIIHHHHHH", data, 16)
+    _, machine, _, _, phoff, shoff, _, _, phentsize, phnum, shentsize, shnum, shstrndx = header
+
+    segments = []
+    for i in range(phnum):
+        offset = phoff + i * phentsize
+        if is_64:
+            p_type, _, _, vaddr, _, _, memsz, align = struct.unpack_from(endian + "IIQQQQQQ", data, offset)
+        else:
+            p_type, _, vaddr, _, _, memsz, _, align = struct.unpack_from(endian + "IIIIIIII", data, offset)
+        if p_type == PT_LOAD:
+            segments.append({"vaddr": vaddr, "memsz": memsz, "align": align})
+
+    sections = []
+    for i in range(shnum):
+        offset = shoff + i * shentsize
+        if is_64:
+            name, sh_type, _, _, sh_offset, size, link, _, _, entsize = struct.unpack_from(endian + "IIQQQQIIQQ", data, offset)
+        else:
+            name, sh_type, _, _, sh_offset, size, link, _, _, entsize = struct.unpack_from(endian + "IIIIIIIIII", data, offset)
+        sections.append({"name": name, "type": sh_type, "offset": sh_offset, "size": size, "entsize": entsize})
+    if sections and shstrndx < len(sections):
+        strtab = sections[shstrndx]
+        for section in sections:
+            start = strtab["offset"] + section["name"]
+            section["name"] = data[start:data.index(b"\0", start)].decode()
+
+    relative_type = RELATIVE_RELOCATION_TYPES.get(machine)
+    relocations = {"total": 0, "relative": 0, "plt": 0, "packed": []}
+    hash_styles = []
+    exported = 0
+    for section in sections:
+        sh_type = section["type"]
+        body = data[section["offset"]:section["offset"] + section["size"]]
+        if sh_type in (SHT_REL, SHT_RELA) and section["entsize"]:
+            count = section["size"] // section["entsize"]
+            relocations["total"] += count
+            if section["name"].endswith(".plt"):
+                relocations["plt"] += count
+                continue
+            for i in range(count):
+                offset = i * section["entsize"]
+                info = struct.unpack_from(endian + ("Q" if is_64 else "I"), body, offset + (8 if is_64 else 4))[0]
+                r_type = info & 0xffffffff if is_64 else info & 0xff
+                if r_type == relative_type:
+                    relocations["relative"] += 1
+        elif sh_type in (SHT_RELR, SHT_ANDROID_RELR):
+            count = _relr_count(body, 8 if is_64 else 4)
+            relocations["total"] += count
+            relocations["relative"] += count
+            relocations["packed"].append("relr")
+        elif sh_type in (SHT_ANDROID_REL, SHT_ANDROID_RELA):
+            relocations["total"] += _android_packed_count(body)
+            relocations["packed"].append("android")
+        elif sh_type == SHT_GNU_HASH:
+            hash_styles.append("gnu")
+        elif sh_type == SHT_HASH:
+            hash_styles.append("sysv")
+        elif sh_type == SHT_DYNSYM and section["entsize"]:
+            for i in range(1, section["size"] // section["entsize"]):
+                offset = i * section["entsize"]
+                if is_64:
+                    _, st_info, st_other, st_shndx = struct.unpack_from(endian + "IBBH", body, offset)
+                else:
+                    st_info, st_other, st_shndx = struct.unpack_from(endian + "BBH", body, offset + 12)
+                if st_shndx != 0 and st_info >> 4 in (1, 2, 10) and st_other & 3 in (0, 3):
+                    exported += 1
+
+    return {
+        "path": path,
+        "relocations": relocations,
+        "hash_styles": hash_styles,
+        "exported_symbols": exported,
+        "load_segments": len(segments),
+        "min_segment_alignment": min((s["align"] for s in segments), default=0),
+    }
+
+
+def check(report, min_page_size, require_gnu_hash):
+    problems = []
+    if min_page_size and report["min_segment_alignment"] < min_page_size:
+        problems.append(f"PT_LOAD aligned to {report['min_segment_alignment']}, expected at least {min_page_size}")
+    if require_gnu_hash and "gnu" not in report["hash_styles"]:
+        problems.append("no .gnu.hash section")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("libraries", nargs="+")
+    parser.add_argument("--json", action="store_true", help="print one JSON document instead of a table")
+    parser.add_argument("--min-page-size", type=int, default=0, help="fail if a PT_LOAD segment is aligned below this")
+    parser.add_argument("--require-gnu-hash", action="store_true", help="fail if a library has no .gnu.hash")
+    args = parser.parse_args(argv)
+
+    reports = []
+    failed = False
+    for path in args.libraries:
+        try:
+            report = inspect(path)
+        except (ElfError, struct.error, ValueError, IndexError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        report["problems"] = check(report, args.min_page_size, args.require_gnu_hash)
+        failed = failed or bool(report["problems"])
+        reports.append(report)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            relocations = report["relocations"]
+            packed = "+".join(relocations["packed"]) or "no"
+            print(f"{report['path']}: {relocations['total']} relocations ({relocations['relative']} relative, "
+                  f"{relocations['plt']} plt, packed: {packed}), hash: {','.join(report['hash_styles']) or '-'}, "
+                  f"{report['exported_symbols']} exported symbols, PT_LOAD alignment {report['min_segment_alignment']}")
+            for problem in report["problems"]:
+                print(f"  FAIL: {problem}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
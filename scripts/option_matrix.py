@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Measure what recipe options cost: build time, library sizes and benchmark results.
+
+Every argument after ``--`` is passed to ``conan create`` unchanged, and gives the base. Each
+``--vary`` is one variant: the base plus the options it lists. Variants build ``--jobs`` at a time,
+and the ``--cpus`` budget is split between them through ``tools.build:jobs``::
+
+    python scripts/option_matrix.py --jobs 3 --cpus 24 --runs 3 --output matrix.json \\
+        --vary "ffmpeg/*:avfilter=False" --vary "ffmpeg/*:swscale=False" \\
+        --vary "ffmpeg/*:with_libx264=False" --vary "ffmpeg/*:with_ssl=False" \\
+        --vary "libx264/*:bit_depth=8" --vary "openssl/*:no_deprecated=True" "openssl/*:no_dso=True" \\
+        -- ffmpeg/all --version 7.0.1 -pr:h profiles/Android --build=missing
+
+The base is built first, with the created package and every package named in a ``--vary``
+rebuilt. Its binaries are then restored into one private Conan home per parallel
+build, because two ``conan`` processes must not share a cache. Builds run with
+``user.build:phase_timing=True``. The build time of a package is the sum of the phases in its
+``build_phases`` benchmark line. A variant rebuilds the packages its options name, and the ones
+whose package id they change. Only packages that the base built too are compared; the others are
+listed on their own. Parallel builds compete for memory bandwidth and disk, so compare variants
+built with the same ``--jobs``.
+
+Benchmarks don't run during the parallel builds. Afterwards, the test_package of the base and of
+each variant runs ``--runs`` times in turns, one at a time, and the median of every metric is used.
+Library sizes are the files in the ``lib`` and ``bin`` folders of each host package.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import queue
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK = re.compile(r"benchmark: (\{.*\})\s*$")
+LIBRARY = re.compile(r"\.(a|lib|so(\.\d+)*|dylib|dll)$")
+
+
+def conan_home():
+    return subprocess.run(["conan", "config", "home"], stdout=subprocess.PIPE, check=True, text=True).stdout.strip()
+
+
+def conan(args, home=None, check=True):
+    env = dict(os.environ)
+    if home:
+        env["CONAN_HOME"] = home
+    print(" ".join(["conan"] + args), file=sys.stderr)
+    start = time.perf_counter()
+    result = subprocess.run(["conan"] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False, text=True, env=env)
+    if check and result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(result.returncode)
+    return result, time.perf_counter() - start
+
+
+def benchmarks(output):
+    found = {}
+    for line in output.splitlines():
+        match = BENCHMARK.search(line)
+        if match:
+            benchmark = json.loads(match[1])
+            found.setdefault(benchmark.get("name", "benchmark"), []).append(benchmark)
+    return found
+
+
+def metrics(value, prefix=""):
+    """flattens the numeric leaves of a benchmark into {"a/b/c": number}"""
+    if isinstance(value, bool):
+        return {}
+    if isinstance(value, (int, float)):
+        return {prefix: value}
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(metrics(item, f"{prefix}/{key}" if prefix else str(key)))
+        return flat
+    return {}
+
+
+def library_sizes(graph):
+    sizes = {}
+    for node in graph["graph"]["nodes"].values():
+        folder = node.get("package_folder")
+        if node.get("context") != "host" or not folder or not os.path.isdir(folder):
+            continue
+        for subfolder in ("lib", "bin"):
+            for root, _, names in os.walk(os.path.join(folder, subfolder)):
+                for name in names:
+                    path = os.path.join(root, name)
+                    if LIBRARY.search(name) and not os.path.islink(path):
+                        sizes[f"{node['name']}/{name}"] = os.path.getsize(path)
+    return sizes
+
+
+def build(label, conan_args, options, build_jobs, home=None):
+    args = ["create"] + conan_args + [f"--build={name}/*" for name in sorted(varied_packages(options))]
+    for option in options:
+        args += ["-o", option]
+    # without the test_package: the benchmarks run later, one at a time
+    args += ["-tf", "", "-c", "user.build:phase_timing=True", "-c", f"tools.build:jobs={build_jobs}", "--format=json"]
+    result, seconds = conan(args, home, check=False)
+    if result.returncode != 0:
+        return {"label": label, "options": options, "error": result.stderr.strip().splitlines()[-1:]}
+    graph = json.loads(result.stdout)
+    build_s = {}
+    for phases in benchmarks(result.stderr).get("build_phases", []):
+        build_s[phases["reference"].split("/")[0]] = phases["wall_s"]
+    return {"label": label, "options": options, "home": home, "graph": graph, "conan_create_s": round(seconds, 1),
+            "build_s": build_s, "library_sizes": library_sizes(graph)}
+
+
+def varied_packages(options):
+    return {option.split(":")[0].split("/")[0] for option in options if ":" in option}
+
+
+def run_benchmarks(conan_args, options, home):
+    args = ["create"] + conan_args + ["--build=missing"]
+    for option in options:
+        args += ["-o", option]
+    result, _ = conan(args + ["--format=json"], home, check=False)
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        return {}
+    samples = {}
+    for name, found in benchmarks(result.stderr).items():
+        if name == "build_phases":
+            continue
+        for benchmark in found:
+            for metric, value in metrics(benchmark).items():
+                samples[f"{name}/{metric}"] = value
+    return samples
+
+
+def delta_percent(base, value):
+    return 100.0 * (value - base) / base if base else None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--" not in argv:
+        print("usage: option_matrix.py --vary OPTION [OPTION ...] [--vary ...] [--jobs N] [--cpus N] [--runs N] "
+              "[--output FILE] -- <conan create arguments>", file=sys.stderr)
+        return 2
+    separator = argv.index("--")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vary", action="append", nargs="+", required=True, metavar="OPTION",
+                        help="one variant: options like 'ffmpeg/*:avfilter=False' added to the base")
+    parser.add_argument("--jobs", type=int, default=2, help="variants built at the same time")
+    parser.add_argument("--cpus", type=int, default=os.cpu_count(), help="cores shared by the parallel builds")
+    parser.add_argument("--runs", type=int, default=1, help="test_package runs per variant")
+    parser.add_argument("--output", help="write the matrix as JSON")
+    args = parser.parse_args(argv[:separator])
+    conan_args = argv[separator + 1:]
+    build_jobs = max(1, args.cpus // args.jobs)
+    all_options = [option for options in args.vary for option in options]
+
+    # the base rebuilds the created package and every package a variant changes, so that each has a time to compare
+    result, _ = conan(["inspect", conan_args[0], "--format=json"])
+    rebuilt = varied_packages(all_options) | {json.loads(result.stdout)["name"]}
+    base = build("base", conan_args + [f"--build={name}/*" for name in sorted(rebuilt)], [], build_jobs)
+    if "error" in base:
+        print(f"the base doesn't build: {' '.join(base['error'])}", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory(prefix="option_matrix_") as tmp:
+        graph_file, list_file, archive = (os.path.join(tmp, name) for name in ("base.json", "list.json", "base.tgz"))
+        with open(graph_file, "w") as f:
+            json.dump(base["graph"], f)
+        result, _ = conan(["list", f"--graph={graph_file}", "--format=json"])
+        with open(list_file, "w") as f:
+            f.write(result.stdout)
+        conan(["cache", "save", f"--list={list_file}", f"--file={archive}"])
+        homes = queue.Queue()
+        current_home = conan_home()
+        for slot in range(args.jobs):
+            # configuration, profiles and remotes of the current home, the binaries of the base
+            home = os.path.join(tmp, f"home{slot}")
+            shutil.copytree(current_home, home, ignore=lambda folder, names: ["p"] if folder == current_home else [])
+            conan(["cache", "restore", archive], home)
+            homes.put(home)
+
+        def build_variant(options):
+            home = homes.get()
+            try:
+                return build(" ".join(options), conan_args, options, build_jobs, home)
+            finally:
+                homes.put(home)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            variants = list(executor.map(build_variant, args.vary))
+
+        samples = {variant["label"]: {} for variant in [base] + variants if "error" not in variant}
+        for _ in range(args.runs):
+            for variant in [base] + variants:
+                if "error" in variant:
+                    continue
+                for metric, value in run_benchmarks(conan_args, variant["options"], variant["home"]).items():
+                    samples[variant["label"]].setdefault(metric, []).append(value)
+
+    base_build_s = base["build_s"]
+    base_size = sum(base["library_sizes"].values())
+    base_metrics = {metric: statistics.median(values) for metric, values in samples["base"].items()}
+    report = {"reference": base["graph"]["graph"]["nodes"]["1"]["ref"], "base": conan_args, "runs": args.runs,
+              "jobs": args.jobs, "build_jobs": build_jobs,
+              "base_result": {"build_s": base_build_s, "library_sizes": base["library_sizes"], "metrics": base_metrics},
+              "variants": {}}
+    print(f"{'variant':50} {'build min':>10} {'delta':>7} {'libs KB':>10} {'delta':>9}")
+    print(f"{'base':50} {sum(base_build_s.values()) / 60:>10.1f} {'':>7} {base_size / 1024:>10.0f}")
+    for variant in variants:
+        label = variant["label"]
+        if "error" in variant:
+            report["variants"][label] = {"options": variant["options"], "error": variant["error"]}
+            print(f"{label:50} failed: {' '.join(variant['error'])}")
+            continue
+        compared = sorted(set(base_build_s) & set(variant["build_s"]))
+        build_delta_s = sum(variant["build_s"][name] - base_build_s[name] for name in compared)
+        size = sum(variant["library_sizes"].values())
+        libraries = {}
+        for library in sorted(set(base["library_sizes"]) | set(variant["library_sizes"])):
+            before, after = base["library_sizes"].get(library, 0), variant["library_sizes"].get(library, 0)
+            if before != after:
+                libraries[library] = {"base": before, "variant": after, "delta": after - before}
+        variant_metrics = {}
+        for metric, values in samples[label].items():
+            if metric in base_metrics:
+                value = statistics.median(values)
+                variant_metrics[metric] = {"base": base_metrics[metric], "variant": value,
+                                           "delta_percent": delta_percent(base_metrics[metric], value)}
+        report["variants"][label] = {
+            "options": variant["options"],
+            "build_s": variant["build_s"],
+            "build_delta_s": round(build_delta_s, 1),
+            # rebuilt because their package id changed, the base didn't build them
+            "rebuilt_only_here": sorted(set(variant["build_s"]) - set(base_build_s)),
+            "library_delta_bytes": size - base_size,
+            "libraries": libraries,
+            "metrics": variant_metrics,
+        }
+        print(f"{label:50} {sum(variant['build_s'][name] for name in compared) / 60:>10.1f} {build_delta_s / 60:>+7.1f} "
+              f"{size / 1024:>10.0f} {(size - base_size) / 1024:>+9.0f}")
+        for library, sizes in libraries.items():
+            print(f"    {library:46} {sizes['base'] / 1024:>10.0f} KB -> {sizes['variant'] / 1024:>10.0f} KB")
+        for metric, values in sorted(variant_metrics.items()):
+            if values["delta_percent"]:
+                print(f"    {metric:46} {values['base']:>14.4g} -> {values['variant']:>14.4g} {values['delta_percent']:+7.2f}%")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    print("benchmark: " + json.dumps({"name": "option_matrix", "reference": report["reference"], "variants": {
+        label: {"build_delta_s": variant.get("build_delta_s"), "library_delta_bytes": variant.get("library_delta_bytes")}
+        for label, variant in report["variants"].items()}}))
+    return 0 if all("error" not in variant for variant in variants) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
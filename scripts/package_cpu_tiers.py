@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Build a package once per cpu_tier and bundle the shared libraries with a runtime loader.
+
+Every argument after ``--`` is passed to ``conan create`` unchanged. The baseline build
+(no cpu_tier) is always made, then one build per requested tier with ``-o "*:cpu_tier=<tier>"``.
+Shared libraries of the host graph are collected into::
+
+    <output>/include/                headers of the baseline build
+    <output>/lib/                    baseline libraries
+    <output>/lib/<tier>/             libraries built for <tier>
+    <output>/loader/                 cpu_tier_loader.{h,c}, picks a tier at runtime
+    <output>/cpu_tiers.json          tiers, package ids and library names
+
+Example, one libffmpeg.so per tier for Android arm64::
+
+    python scripts/package_cpu_tiers.py --output dist/ffmpeg --tiers armv8.2-a+dotprod armv8.2-a+dotprod+i8mm -- \\
+        ffmpeg/all --version 7.0.1 -pr:h profiles/Android -o "ffmpeg/*:shared=True" -o "ffmpeg/*:monolithic=True"
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+LOADER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cpu_tier")
+LIBRARY_PATTERNS = ("*.so", "*.so.*", "*.dylib")
+
+
+def conan_create(conan_args, cpu_tier):
+    command = ["conan", "create"] + conan_args + ["--format=json"]
+    if cpu_tier:
+        command += ["-o", f"*:cpu_tier={cpu_tier}"]
+    print(" ".join(command), file=sys.stderr)
+    result = subprocess.run(command, stdout=subprocess.PIPE, check=True, text=True)
+    return json.loads(result.stdout)["graph"]["nodes"].values()
+
+
+def host_packages(nodes):
+    for node in nodes:
+        if node.get("context") == "host" and node.get("package_folder") and node.get("ref"):
+            yield node
+
+
+def copy_libraries(package_folder, destination):
+    copied = []
+    for pattern in LIBRARY_PATTERNS:
+        for library in glob.glob(os.path.join(package_folder, "lib", pattern)):
+            target = os.path.join(destination, os.path.basename(library))
+            if os.path.lexists(target):
+                continue
+            if os.path.islink(library):
+                os.symlink(os.readlink(library), target)
+            else:
+                shutil.copy2(library, target)
+            copied.append(os.path.basename(library))
+    return sorted(copied)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--" not in argv:
+        print("usage: package_cpu_tiers.py --output DIR --tiers TIER [TIER ...] -- <conan create arguments>",
+              file=sys.stderr)
+        return 2
+    separator = argv.index("--")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--tiers", nargs="+", required=True, help="cpu_tier values to build besides the baseline")
+    args = parser.parse_args(argv[:separator])
+    conan_args = argv[separator + 1:]
+
+    if os.path.exists(args.output):
+        shutil.rmtree(args.output)
+    manifest = {"tiers": {}}
+    for cpu_tier in [None] + args.tiers:
+        destination = os.path.join(args.output, "lib", cpu_tier) if cpu_tier else os.path.join(args.output, "lib")
+        os.makedirs(destination)
+        packages = {}
+        libraries = []
+        for node in host_packages(conan_create(conan_args, cpu_tier)):
+            packages[node["ref"]] = node.get("package_id")
+            libraries += copy_libraries(node["package_folder"], destination)
+            include = os.path.join(node["package_folder"], "include")
+            if cpu_tier is None and os.path.isdir(include):
+                shutil.copytree(include, os.path.join(args.output, "include"), dirs_exist_ok=True)
+        if not libraries:
+            print(f"no shared libraries in the graph for cpu_tier={cpu_tier}, build with shared=True", file=sys.stderr)
+            return 1
+        manifest["tiers"][cpu_tier or "baseline"] = {"packages": packages, "libraries": sorted(libraries)}
+
+    shutil.copytree(LOADER_DIR, os.path.join(args.output, "loader"))
+    with open(os.path.join(args.output, "cpu_tiers.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"bundled {', '.join(manifest['tiers'])} into {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
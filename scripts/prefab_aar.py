@@ -0,0 +1,220 @@
+"""Conan deployer that packs the Android host graph into a prefab AAR.
+
+Run it once per ABI with the same ``--deployer-folder``. Every run replaces the libraries of
+its ABI and rewrites the AAR with all the ABIs deployed so far::
+
+    for arch in armv8 armv7 x86_64; do
+        conan install --requires ffmpeg/7.0.1 -pr:h profiles/Android -s arch=$arch --build=missing \\
+            -o "*:shared=True" --deployer=scripts/prefab_aar.py --deployer-folder=MyApplication/app/libs
+    done
+
+The folder then holds::
+
+    <name>.aar                  AndroidManifest.xml, classes.jar, jni/<abi>/*.so and prefab/
+    <name>_sizes.json           per ABI size of every library before and after stripping
+    prefab_aar/                 the unpacked AAR, kept between runs
+
+Each library of a package component is a prefab module, e.g. ``mediastack::avcodec``,
+``mediastack::x264`` or ``mediastack::ssl``. A module exports the modules and system
+libraries its component requires. Shared libraries are stripped with the NDK's llvm-strip
+and shipped in jni/ so the Android Gradle plugin packs them into the APK. Static libraries
+only lose their debug info and are only used for linking.
+
+Confs, from the profile or ``-c``: ``tools.android:ndk_path`` (required),
+``user.prefab:name`` (default ``mediastack``), ``user.prefab:version`` (default: the version
+of the first required package, when it is numeric) and ``user.prefab:package`` (the manifest
+package, default ``org.conan.<name>``).
+"""
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import zipfile
+
+from conan.api.output import ConanOutput
+from conan.errors import ConanException
+
+ANDROID_ABIS = {"armv7": "armeabi-v7a", "armv8": "arm64-v8a", "x86": "x86", "x86_64": "x86_64"}
+# fixed timestamps and permissions, so the same libraries always give the same AAR
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def _ndk_major(ndk_path):
+    properties = os.path.join(ndk_path, "source.properties")
+    if os.path.isfile(properties):
+        with open(properties) as f:
+            match = re.search(r"Pkg\.Revision\s*=\s*(\d+)", f.read())
+        if match:
+            return int(match[1])
+    raise ConanException(f"prefab_aar: can't read the NDK version from {properties}")
+
+
+def _llvm_strip(ndk_path):
+    found = glob.glob(os.path.join(ndk_path, "toolchains", "llvm", "prebuilt", "*", "bin", "llvm-strip*"))
+    return found[0] if found else shutil.which("llvm-strip")
+
+
+def _library_file(cpp_info, lib):
+    for libdir in cpp_info.libdirs:
+        for name, static in ((f"lib{lib}.so", False), (f"lib{lib}.a", True)):
+            path = os.path.join(libdir, name)
+            if os.path.isfile(path):
+                return os.path.realpath(path), static
+    return None, None
+
+
+def _components(dep):
+    cpp_info = dep.cpp_info
+    if cpp_info.has_components:
+        return {name: component for name, component in cpp_info.components.items() if name}
+    return {None: cpp_info}
+
+
+def _modules(packages, package, component, seen=None):
+    """prefab modules (library names) that stand for <package>::<component>"""
+    seen = seen if seen is not None else set()
+    if (package, component) in seen or package not in packages:
+        return []
+    seen.add((package, component))
+    components = packages[package]
+    targets = [component] if component in components else list(components)
+    modules = []
+    for target in targets:
+        cpp_info = components[target]
+        if cpp_info.libs:
+            modules.extend(cpp_info.libs)
+            continue
+        for require in cpp_info.requires:
+            required_package, _, required_component = require.rpartition("::")
+            modules.extend(_modules(packages, required_package or package, required_component, seen))
+    return list(dict.fromkeys(modules))
+
+
+def _export_libraries(packages, package, cpp_info):
+    exports = []
+    for require in cpp_info.requires:
+        required_package, _, required_component = require.rpartition("::")
+        exports.extend(f":{module}" for module in _modules(packages, required_package or package, required_component))
+    exports.extend(f"-l{lib}" for lib in cpp_info.system_libs)
+    return list(dict.fromkeys(exports))
+
+
+def _write_json(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(content, f, indent=2, sort_keys=True)
+
+
+def _zip_entry(archive, name, data):
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE)
+    info.external_attr = 0o644 << 16
+    info.compress_type = zipfile.ZIP_DEFLATED
+    archive.writestr(info, data)
+
+
+def _write_aar(stage, aar):
+    # AAR consumers expect a classes.jar, even an empty one
+    with zipfile.ZipFile(os.path.join(stage, "classes.jar"), "w") as jar:
+        _zip_entry(jar, "META-INF/MANIFEST.MF", "Manifest-Version: 1.0\n")
+    paths = sorted(os.path.relpath(os.path.join(root, name), stage) for root, _, names in os.walk(stage) for name in names)
+    with zipfile.ZipFile(aar, "w") as archive:
+        for path in paths:
+            with open(os.path.join(stage, path), "rb") as f:
+                _zip_entry(archive, path.replace(os.sep, "/"), f.read())
+
+
+def deploy(graph, output_folder, **kwargs):
+    conanfile = graph.root.conanfile
+    output = ConanOutput(scope="prefab_aar")
+    conf = conanfile.conf
+    ndk_path = conf.get("tools.android:ndk_path")
+    if not ndk_path:
+        raise ConanException("prefab_aar: tools.android:ndk_path is required")
+    host = [dep for dep in conanfile.dependencies.host.values() if dep.package_folder is not None]
+    if not host:
+        raise ConanException("prefab_aar: no host packages to deploy")
+    settings = host[0].settings
+    if settings.get_safe("os") != "Android":
+        raise ConanException("prefab_aar: only os=Android packages can be deployed")
+    abi = ANDROID_ABIS[str(settings.get_safe("arch"))]
+    abi_json = {
+        "abi": abi,
+        "api": int(str(settings.get_safe("os.api_level"))),
+        "ndk": _ndk_major(ndk_path),
+        "stl": str(settings.get_safe("compiler.libcxx") or "none"),
+    }
+    name = conf.get("user.prefab:name", default="mediastack")
+    version = conf.get("user.prefab:version", default=str(host[0].ref.version))
+    strip = _llvm_strip(ndk_path)
+    if not strip:
+        output.warning("llvm-strip not found in the NDK, libraries are packed unstripped")
+
+    stage = os.path.join(output_folder, "prefab_aar")
+    shutil.rmtree(os.path.join(stage, "jni", abi), ignore_errors=True)
+    for abi_folder in glob.glob(os.path.join(stage, "prefab", "modules", "*", "libs", f"android.{abi}")):
+        shutil.rmtree(abi_folder)
+
+    packages = {dep.ref.name: _components(dep) for dep in host}
+    sizes = {}
+    for dep in host:
+        includes = dep.cpp_info.aggregated_components().includedirs
+        for component, cpp_info in packages[dep.ref.name].items():
+            exports = _export_libraries(packages, dep.ref.name, cpp_info)
+            libs = cpp_info.libs
+            for index, lib in enumerate(libs):
+                library, static = _library_file(cpp_info, lib)
+                if library is None:
+                    output.warning(f"{dep.ref}: lib{lib} not found, skipped")
+                    continue
+                module = os.path.join(stage, "prefab", "modules", lib)
+                _write_json(os.path.join(module, "module.json"), {
+                    # later libraries of the same component resolve the symbols of the earlier ones
+                    "export_libraries": [f":{other}" for other in libs[index + 1:]] + exports,
+                    "library_name": f"lib{lib}",
+                })
+                for include in includes:
+                    if os.path.isdir(include):
+                        shutil.copytree(include, os.path.join(module, "include"), dirs_exist_ok=True)
+                target = os.path.join(module, "libs", f"android.{abi}", os.path.basename(library))
+                _write_json(os.path.join(os.path.dirname(target), "abi.json"), dict(abi_json, static=static))
+                shutil.copyfile(library, target)
+                if strip:
+                    subprocess.run([strip, "--strip-debug" if static else "--strip-unneeded", target], check=True)
+                if not static:
+                    os.makedirs(os.path.join(stage, "jni", abi), exist_ok=True)
+                    shutil.copyfile(target, os.path.join(stage, "jni", abi, os.path.basename(library)))
+                sizes[lib] = {"package": str(dep.ref), "static": static,
+                              "size": os.path.getsize(library), "stripped": os.path.getsize(target)}
+
+    for module in glob.glob(os.path.join(stage, "prefab", "modules", "*")):
+        if not glob.glob(os.path.join(module, "libs", "android.*")):
+            shutil.rmtree(module)  # no longer in the graph of any ABI
+    prefab_json = {"name": name, "schema_version": 2, "dependencies": []}
+    if re.fullmatch(r"\d+(\.\d+)*", version):
+        prefab_json["version"] = version
+    _write_json(os.path.join(stage, "prefab", "prefab.json"), prefab_json)
+    with open(os.path.join(stage, "AndroidManifest.xml"), "w") as f:
+        f.write(f'<manifest xmlns:android="http://schemas.android.com/apk/res/android" '
+                f'package="{conf.get("user.prefab:package", default=f"org.conan.{name}")}">\n'
+                f'    <uses-sdk android:minSdkVersion="{abi_json["api"]}" />\n'
+                f'</manifest>\n')
+    aar = os.path.join(output_folder, f"{name}.aar")
+    _write_aar(stage, aar)
+
+    report_file = os.path.join(output_folder, f"{name}_sizes.json")
+    report = {}
+    if os.path.isfile(report_file):
+        with open(report_file) as f:
+            report = json.load(f)
+    # the APK payload is what the shared libraries weigh after stripping
+    report[abi] = {"libraries": sizes,
+                   "apk_payload": sum(size["stripped"] for size in sizes.values() if not size["static"]),
+                   "size": sum(size["size"] for size in sizes.values()),
+                   "stripped": sum(size["stripped"] for size in sizes.values())}
+    _write_json(report_file, report)
+    print("benchmark: " + json.dumps({"prefab_aar": {"abi": abi, "apk_payload": report[abi]["apk_payload"],
+                                                     "size": report[abi]["size"], "stripped": report[abi]["stripped"],
+                                                     "aar": os.path.getsize(aar)}}))
+    output.success(f"{abi} packed into {aar}")
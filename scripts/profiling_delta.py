@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Measure what ``profiling=True`` (frame pointers and unwind tables) costs a package.
+
+Every argument after ``--`` is passed to ``conan create`` unchanged. The package is created with
+``-o "*:profiling=False"`` and with ``-o "*:profiling=True"``. The ``benchmark:`` lines that its
+test_package prints are then compared metric by metric. With ``--runs N``, both variants run
+their test_package N times in turns, and the median of every metric is used::
+
+    python scripts/profiling_delta.py --runs 5 --output profiling_delta.json -- \\
+        libx264/all --version cci.20240224 --build=missing
+
+For throughput metrics (fps, MB/s, times realtime), a negative delta is the overhead. For times
+(seconds, ms), a positive delta is the overhead.
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+BENCHMARK = re.compile(r"benchmark: (\{.*\})\s*$")
+
+
+def conan_create(conan_args, profiling, reuse):
+    command = ["conan", "create"] + conan_args + ["-o", f"*:profiling={profiling}", "--format=json"]
+    if reuse:
+        command.append("--build=missing")
+    print(" ".join(command), file=sys.stderr)
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False, text=True)
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(result.returncode)
+    benchmarks = {}
+    for line in result.stderr.splitlines():
+        match = BENCHMARK.search(line)
+        if match:
+            benchmark = json.loads(match[1])
+            benchmarks[benchmark.get("name", "benchmark")] = benchmark
+    return json.loads(result.stdout)["graph"]["nodes"]["1"]["ref"], benchmarks
+
+
+def metrics(value, prefix=""):
+    """flattens the numeric leaves of a benchmark into {"a/b/c": number}"""
+    if isinstance(value, bool):
+        return {}
+    if isinstance(value, (int, float)):
+        return {prefix: value}
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(metrics(item, f"{prefix}/{key}" if prefix else str(key)))
+        return flat
+    return {}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--" not in argv:
+        print("usage: profiling_delta.py [--runs N] [--output FILE] -- <conan create arguments>", file=sys.stderr)
+        return 2
+    separator = argv.index("--")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=1, help="test_package runs per variant")
+    parser.add_argument("--output", help="write the comparison as JSON")
+    args = parser.parse_args(argv[:separator])
+    conan_args = argv[separator + 1:]
+
+    samples = {False: {}, True: {}}
+    reference = None
+    for run in range(args.runs):
+        for profiling in (False, True):
+            reference, benchmarks = conan_create(conan_args, profiling, reuse=run > 0)
+            for name, benchmark in benchmarks.items():
+                for metric, value in metrics(benchmark).items():
+                    samples[profiling].setdefault(f"{name}/{metric}", []).append(value)
+    if not samples[False]:
+        print("the test_package printed no benchmark: lines", file=sys.stderr)
+        return 1
+
+    report = {"reference": reference, "runs": args.runs, "metrics": {}}
+    for metric in sorted(set(samples[False]) & set(samples[True])):
+        baseline = statistics.median(samples[False][metric])
+        profiling = statistics.median(samples[True][metric])
+        delta = 100.0 * (profiling - baseline) / baseline if baseline else None
+        report["metrics"][metric] = {"baseline": baseline, "profiling": profiling, "delta_percent": delta}
+        print(f"{metric:60} {baseline:>14.4g} {profiling:>14.4g} " + (f"{delta:+7.2f}%" if delta is not None else ""))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    print("benchmark: " + json.dumps({"name": "profiling_delta", "reference": reference,
+                                      "delta_percent": {metric: values["delta_percent"]
+                                                        for metric, values in report["metrics"].items()}}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
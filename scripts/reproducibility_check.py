@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Build a package twice and check that both builds are bit for bit identical.
+
+Every argument after ``--`` is passed to ``conan create``, plus ``--build=<name>/*`` for the created
+package, so that both runs build it from source instead of reusing a binary from the cache.
+Conan builds every package in a new, randomly named folder, so the second build also catches
+build paths that leak into the binaries. The package revision is a hash of the package files, so
+identical builds get the same revision, and a binary remote stores them only once::
+
+    python scripts/reproducibility_check.py --output reproducibility.json -- \\
+        zlib/all --version 1.3.1 --build=missing
+
+Files that differ are listed. For static libraries, the members that differ are listed too, and
+so are the members whose content is the same but whose headers (timestamps, owners) differ.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# conanmanifest.txt holds the time the package was created, it is not part of the package revision
+IGNORED = {"conanmanifest.txt"}
+
+
+def conan_create(conan_args):
+    command = ["conan", "create"] + conan_args + ["--format=json"]
+    print(" ".join(command), file=sys.stderr)
+    start = time.perf_counter()
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False, text=True)
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(result.returncode)
+    node = json.loads(result.stdout)["graph"]["nodes"]["1"]
+    return node, time.perf_counter() - start
+
+
+def file_hashes(folder):
+    hashes = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, folder).replace(os.sep, "/")
+            if relative in IGNORED:
+                continue
+            if os.path.islink(path):
+                hashes[relative] = "-> " + os.readlink(path)
+                continue
+            with open(path, "rb") as f:
+                hashes[relative] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def archive_members(path):
+    """[(name, header fields, sha256 of the content)] of a GNU or BSD ar archive, None otherwise"""
+    with open(path, "rb") as f:
+        content = f.read()
+    if not content.startswith(b"!<arch>\n"):
+        return None
+    members = []
+    names = b""
+    offset = 8
+    while offset + 60 <= len(content):
+        header = content[offset:offset + 60]
+        name = header[:16].decode(errors="replace").rstrip()
+        size = int(header[48:58])
+        data = content[offset + 60:offset + 60 + size]
+        if name == "//":
+            names = data
+        elif name.startswith("#1/"):
+            length = int(name[3:])
+            name, data = data[:length].rstrip(b"\0").decode(errors="replace"), data[length:]
+        elif name.startswith("/") and name[1:].isdigit():
+            start = int(name[1:])
+            name = names[start:names.index(b"\n", start)].decode(errors="replace").rstrip("/")
+        elif name not in ("/", "/SYM64/"):
+            name = name.rstrip("/")
+        members.append((name, header[16:48].decode(errors="replace").split(), hashlib.sha256(data).hexdigest()))
+        offset += 60 + size + size % 2
+    return members
+
+
+def compare_archives(first, second):
+    first_members, second_members = archive_members(first), archive_members(second)
+    if first_members is None or second_members is None:
+        return None
+    if [member[0] for member in first_members] != [member[0] for member in second_members]:
+        return {"members": "different members or order"}
+    differences = {}
+    for (name, first_header, first_hash), (_, second_header, second_hash) in zip(first_members, second_members):
+        if first_hash != second_hash:
+            differences[name] = "content"
+        elif first_header != second_header:
+            differences[name] = f"header {' '.join(first_header)} != {' '.join(second_header)}"
+    return differences
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--" not in argv:
+        print("usage: reproducibility_check.py [--output FILE] -- <conan create arguments>", file=sys.stderr)
+        return 2
+    separator = argv.index("--")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the comparison as JSON")
+    args = parser.parse_args(argv[:separator])
+    conan_args = argv[separator + 1:]
+    # --build=missing alone would reuse the first package for the second run
+    inspect = subprocess.run(["conan", "inspect", conan_args[0], "--format=json"], stdout=subprocess.PIPE, check=True, text=True)
+    conan_args = conan_args + [f"--build={json.loads(inspect.stdout)['name']}/*"]
+
+    with tempfile.TemporaryDirectory(prefix="reproducibility_") as tmp:
+        first, first_seconds = conan_create(conan_args)
+        # the second build replaces the first package when both get the same revision
+        first_copy = os.path.join(tmp, "first")
+        shutil.copytree(first["package_folder"], first_copy, symlinks=True)
+        second, second_seconds = conan_create(conan_args)
+
+        first_hashes, second_hashes = file_hashes(first_copy), file_hashes(second["package_folder"])
+        differences = {}
+        for path in sorted(set(first_hashes) | set(second_hashes)):
+            if path not in second_hashes:
+                differences[path] = {"status": "only in the first build"}
+            elif path not in first_hashes:
+                differences[path] = {"status": "only in the second build"}
+            elif first_hashes[path] != second_hashes[path]:
+                differences[path] = {"status": "different"}
+                members = compare_archives(os.path.join(first_copy, path), os.path.join(second["package_folder"], path))
+                if members:
+                    differences[path]["members"] = members
+
+    reference = f"{first['ref']}:{first['package_id']}"
+    identical = not differences and first["prev"] == second["prev"]
+    for path, difference in differences.items():
+        print(f"{difference['status']:>24} {path}")
+        for member, status in difference.get("members", {}).items():
+            print(f"{'':>24}   {member}: {status}")
+    print(f"{reference} {'is reproducible' if identical else 'is NOT reproducible'}: "
+          f"#{first['prev']} and #{second['prev']}, {len(first_hashes)} files, {len(differences)} differ")
+    report = {"reference": reference, "identical": identical, "revisions": [first["prev"], second["prev"]],
+              "files": len(first_hashes), "differences": differences,
+              "build_s": [round(first_seconds, 1), round(second_seconds, 1)]}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    print("benchmark: " + json.dumps({"name": "reproducibility", "reference": reference, "identical": identical,
+                                      "differing_files": len(differences), "build_s": report["build_s"]}))
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
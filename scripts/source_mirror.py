@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Prefetch the sources of every recipe into a sha256-addressed mirror and serve it back.
+
+The mirror uses the layout of Conan's sources download cache, one file per checksum::
+
+    <mirror>/s/<sha256>          the tarball
+    <mirror>/s/<sha256>.json     references and urls it was fetched for
+
+Recipes use it without changes, because ``get()``/``download()`` look up the cache by the
+sha256 in conandata.yml. ``core.*`` confs are only read from global.conf, so point it there;
+with every tarball in the mirror, builds are fully offline::
+
+    python scripts/source_mirror.py prefetch --mirror ~/conan-sources -j 8
+    echo "core.sources:download_cache=$HOME/conan-sources" >> "$(conan config home)/global.conf"
+    conan create ffmpeg/all --version 7.0.1
+
+Other machines can use it as a Conan backup sources server, falling back to the origin urls::
+
+    python scripts/source_mirror.py serve --mirror ~/conan-sources --port 8123
+    echo 'core.sources:download_urls=["http://<host>:8123/", "origin"]' >> "$(conan config home)/global.conf"
+
+``--url-map`` rewrites url prefixes before downloading, e.g. to a local HTTP stand-in in tests
+or to an internal mirror on CI::
+
+    python scripts/source_mirror.py prefetch --mirror /tmp/m --url-map https://ffmpeg.org/=http://127.0.0.1:8000/
+"""
+import argparse
+import concurrent.futures
+import functools
+import glob
+import hashlib
+import http.server
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+import yaml  # ships with Conan
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def recipe_sources(root, names=None):
+    """(reference, urls, sha256) of every version in every <name>/<folder>/conandata.yml"""
+    for conandata in sorted(glob.glob(os.path.join(root, "*", "*", "conandata.yml"))):
+        name = os.path.basename(os.path.dirname(os.path.dirname(conandata)))
+        if names and name not in names:
+            continue
+        with open(conandata) as f:
+            sources = (yaml.safe_load(f) or {}).get("sources", {})
+        for version, source in sources.items():
+            urls = source["url"] if isinstance(source["url"], list) else [source["url"]]
+            yield f"{name}/{version}", urls, source["sha256"]
+
+
+def map_url(url, url_map):
+    for old, new in url_map:
+        if url.startswith(old):
+            return new + url[len(old):]
+    return url
+
+
+def save_summary(path, reference, urls):
+    # same format as Conan's own <sha256>.json, which backup sources servers must provide
+    summary = {"references": {}, "timestamp": time.time()}
+    if os.path.isfile(path):
+        with open(path) as f:
+            summary = json.load(f)
+    known = summary["references"].setdefault(reference, [])
+    known.extend(url for url in urls if url not in known)
+    with open(path, "w") as f:
+        json.dump(summary, f)
+
+
+def fetch(mirror, reference, urls, sha256, url_map, retries):
+    target = os.path.join(mirror, "s", sha256)
+    if os.path.isfile(target):
+        save_summary(target + ".json", reference, urls)
+        return reference, "cached", 0
+    errors = []
+    for url in urls:
+        for attempt in range(retries + 1):
+            checksum = hashlib.sha256()
+            size = 0
+            fd, partial = tempfile.mkstemp(dir=os.path.dirname(target), prefix=f".{sha256}.")
+            try:
+                with os.fdopen(fd, "wb") as out, urllib.request.urlopen(map_url(url, url_map), timeout=60) as response:
+                    for chunk in iter(lambda: response.read(1 << 20), b""):
+                        checksum.update(chunk)
+                        out.write(chunk)
+                        size += len(chunk)
+                if checksum.hexdigest() != sha256:
+                    raise ValueError(f"sha256 mismatch, got {checksum.hexdigest()}")
+                os.replace(partial, target)
+                save_summary(target + ".json", reference, urls)
+                return reference, "downloaded", size
+            except Exception as e:  # network errors, HTTP errors and checksum mismatches alike
+                errors.append(f"{map_url(url, url_map)}: {e}")
+                if os.path.exists(partial):
+                    os.unlink(partial)
+                if attempt < retries:
+                    time.sleep(2 ** attempt)
+    raise RuntimeError(f"{reference}: " + "; ".join(errors))
+
+
+def prefetch(args):
+    os.makedirs(os.path.join(args.mirror, "s"), exist_ok=True)
+    url_map = [tuple(entry.split("=", 1)) for entry in args.url_map]
+    sources = list(recipe_sources(args.root, args.recipes))
+    failed = 0
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(fetch, args.mirror, reference, urls, sha256, url_map, args.retries)
+                   for reference, urls, sha256 in sources]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                reference, status, size = future.result()
+                print(f"{status:>10} {reference} {size / (1 << 20):.1f} MiB" if size else f"{status:>10} {reference}")
+            except RuntimeError as e:
+                failed += 1
+                print(f"{'failed':>10} {e}", file=sys.stderr)
+    print(f"{len(sources) - failed}/{len(sources)} sources in {args.mirror} ({time.perf_counter() - start:.1f}s)")
+    print(f"add to global.conf: core.sources:download_cache={os.path.abspath(args.mirror)}")
+    return 1 if failed else 0
+
+
+def verify(args):
+    missing = 0
+    for reference, _, sha256 in recipe_sources(args.root, args.recipes):
+        path = os.path.join(args.mirror, "s", sha256)
+        if not os.path.isfile(path):
+            print(f"missing {reference} {sha256}")
+            missing += 1
+            continue
+        checksum = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                checksum.update(chunk)
+        if checksum.hexdigest() != sha256:
+            print(f"corrupt {reference} {sha256}")
+            os.unlink(path)
+            missing += 1
+    return 1 if missing else 0
+
+
+def serve(args):
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=os.path.join(args.mirror, "s"))
+    with http.server.ThreadingHTTPServer((args.bind, args.port), handler) as server:
+        print(f"serving {args.mirror} on http://{args.bind}:{server.server_address[1]}/")
+        print(f'add to global.conf: core.sources:download_urls=["http://<host>:{server.server_address[1]}/", "origin"]')
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, function in (("prefetch", prefetch), ("verify", verify), ("serve", serve)):
+        subparser = subparsers.add_parser(name)
+        subparser.set_defaults(function=function)
+        subparser.add_argument("--mirror", required=True, help="mirror folder, usable as core.sources:download_cache")
+        if name == "serve":
+            subparser.add_argument("--bind", default="0.0.0.0")
+            subparser.add_argument("--port", type=int, default=8123)
+            continue
+        subparser.add_argument("--root", default=ROOT, help="folder with the <name>/<folder>/conandata.yml files")
+        subparser.add_argument("--recipes", nargs="*", help="recipe names, all of them by default")
+        if name == "prefetch":
+            subparser.add_argument("-j", "--jobs", type=int, default=8, help="parallel downloads")
+            subparser.add_argument("--retries", type=int, default=2)
+            subparser.add_argument("--url-map", action="append", default=[], metavar="OLD=NEW",
+                                   help="rewrite urls starting with OLD, can be repeated")
+    args = parser.parse_args()
+    sys.exit(args.function(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
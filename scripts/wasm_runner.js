@@ -0,0 +1,104 @@
+#!/usr/bin/env node
+// Run a program that emcc linked for node, with its arguments, the way a native test program runs:
+//
+//     node scripts/wasm_runner.js build/Release/test_package.js [arguments...]
+//
+// The test packages call this for os=Emscripten, with the node of user.build:node. The programs are
+// linked with -sNODERAWFS=1, so they see the real file system, and with -sEXIT_RUNTIME=1, so their
+// exit status is the exit status of node.
+"use strict";
+const fs = require("fs");
+const path = require("path");
+
+// (module (func (result v128) i32.const 0 i8x16.splat i8x16.popcnt))
+const SIMD_MODULE = new Uint8Array([0, 97, 115, 109, 1, 0, 0, 0, 1, 5, 1, 96, 0, 1, 123, 3, 2, 1, 0, 10, 10, 1, 8, 0,
+                                    65, 0, 253, 15, 253, 98, 11]);
+
+function supportsSimd() {
+    return WebAssembly.validate(SIMD_MODULE);
+}
+
+function supportsThreads() {
+    try {
+        const memory = new WebAssembly.Memory({ initial: 1, maximum: 1, shared: true });
+        return memory.buffer instanceof SharedArrayBuffer;
+    } catch (e) {
+        return false;
+    }
+}
+
+// true when the module imports a shared memory, which emcc -pthread does
+function usesSharedMemory(wasm) {
+    const bytes = fs.readFileSync(wasm);
+    let offset = 8;
+    const leb = () => {
+        let value = 0, shift = 0, byte;
+        do {
+            byte = bytes[offset++];
+            value |= (byte & 0x7f) << shift;
+            shift += 7;
+        } while (byte & 0x80);
+        return value >>> 0;
+    };
+    const name = () => {
+        const length = leb();
+        offset += length;
+    };
+    while (offset < bytes.length) {
+        const id = bytes[offset++];
+        const size = leb();
+        const end = offset + size;
+        if (id === 2) {
+            for (let count = leb(); count > 0; count--) {
+                name();
+                name();
+                const kind = bytes[offset++];
+                if (kind === 0) {
+                    leb();  // function type index
+                } else if (kind === 1) {
+                    offset++;  // table reference type
+                    const flags = leb();
+                    leb();
+                    if (flags & 1) leb();
+                } else if (kind === 2) {
+                    const flags = leb();
+                    return (flags & 2) !== 0;
+                } else if (kind === 3) {
+                    offset += 2;  // global value type and mutability
+                } else {
+                    return false;
+                }
+            }
+            return false;
+        }
+        offset = end;
+    }
+    return false;
+}
+
+function main() {
+    const program = process.argv[2];
+    if (!program) {
+        console.error("usage: wasm_runner.js <program.js> [arguments...]");
+        process.exit(2);
+    }
+    const loader = path.resolve(program);
+    const wasm = loader.replace(/\.js$/, ".wasm");
+    if (fs.existsSync(wasm)) {
+        // the loader instantiates the module asynchronously, its errors don't say what is missing
+        if (!WebAssembly.validate(fs.readFileSync(wasm))) {
+            console.error(supportsSimd() ? `${program}: ${wasm} is not a valid WebAssembly module`
+                : `${program}: node ${process.version} doesn't support WebAssembly SIMD, build with wasm_simd=False`);
+            process.exit(1);
+        }
+        if (usesSharedMemory(wasm) && !supportsThreads()) {
+            console.error(`${program}: linked with -pthread, node ${process.version} has no shared WebAssembly memory`);
+            process.exit(1);
+        }
+    }
+    // the loader reads its arguments from process.argv.slice(2) and its name from process.argv[1]
+    process.argv = [process.argv[0], loader].concat(process.argv.slice(3));
+    require(loader);
+}
+
+main();
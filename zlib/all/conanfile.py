@@ -1,9 +1,10 @@
 from conan import ConanFile
 from conan.tools.cmake import CMake, CMakeToolchain, cmake_layout
-from conan.tools.files import apply_conandata_patches, export_conandata_patches, get, load, replace_in_file, save
+from conan.tools.files import export_conandata_patches, get, load, save
 from conan.tools.scm import Version
 import os
 
+
 required_conan_version = ">=1.53.0"
 
 
@@ -18,14 +19,30 @@ class ZlibConan(ConanFile):
                    "(Also Free, Not to Mention Unencumbered by Patents)")
     topics = ("zlib", "compression")
 
+    python_requires = "recipe-helpers/1.0"
+    python_requires_extend = "recipe-helpers.RecipeHelpers"
     settings = "os", "arch", "compiler", "build_type"
     options = {
         "shared": [True, False],
         "fPIC": [True, False],
+        "section_gc": [True, False],
+        "fast_load": [True, False],
+        "cpu_tier": [None, "x86-64-v2", "x86-64-v3", "x86-64-v4", "armv8.2-a+dotprod", "armv8.2-a+dotprod+i8mm"],
+        "debug_symbols": [None, "split", "split_line_tables"],
+        "profiling": [True, False],
+        "wasm_simd": [True, False],
+        "wasm_threads": [True, False],
     }
     default_options = {
         "shared": False,
         "fPIC": True,
+        "section_gc": False,
+        "fast_load": False,
+        "cpu_tier": None,
+        "debug_symbols": None,
+        "profiling": False,
+        "wasm_simd": True,
+        "wasm_threads": False,
     }
 
     @property
@@ -38,21 +55,28 @@ class ZlibConan(ConanFile):
     def config_options(self):
         if self.settings.os == "Windows":
             del self.options.fPIC
+        self._config_build_options()
 
     def configure(self):
         if self.options.shared:
             self.options.rm_safe("fPIC")
+        self._configure_build_options()
         self.settings.rm_safe("compiler.libcxx")
         self.settings.rm_safe("compiler.cppstd")
 
     def layout(self):
         cmake_layout(self, src_folder="src")
 
+    def validate(self):
+        self._validate_build_options()
+
     def source(self):
-        get(self, **self.conan_data["sources"][self.version],
-            destination=self.source_folder, strip_root=True)
+        with self._build_phase("source"):
+            get(self, **self.conan_data["sources"][self.version],
+                destination=self.source_folder, strip_root=True)
 
     def generate(self):
+        self._save_reproducible_env()
         tc = CMakeToolchain(self)
         tc.variables["SKIP_INSTALL_ALL"] = False
         tc.variables["SKIP_INSTALL_LIBRARIES"] = False
@@ -62,29 +86,59 @@ class ZlibConan(ConanFile):
         tc.variables["INSTALL_LIB_DIR"] = "lib"
         tc.variables["INSTALL_INC_DIR"] = "include"
         tc.variables["ZLIB_BUILD_EXAMPLES"] = False
+        if self.options.section_gc:
+            tc.extra_cflags.extend(self._section_gc_cflags)
+            if self.options.shared:
+                tc.extra_sharedlinkflags.extend(self._section_gc_ldflags)
+        if self.options.get_safe("fast_load"):
+            # HAVE_HIDDEN gives ZLIB_INTERNAL functions hidden visibility, exports follow zlib.map
+            tc.extra_cflags.extend(self._fast_load_cflags + ["-DHAVE_HIDDEN"])
+            tc.extra_sharedlinkflags.extend(self._fast_load_ldflags)
+        if self.options.get_safe("cpu_tier"):
+            tc.extra_cflags.extend(self._cpu_tier_cflags)
+        if self.options.get_safe("debug_symbols"):
+            tc.extra_cflags.extend(self._debug_symbols_cflags)
+            tc.extra_sharedlinkflags.extend(self._debug_symbols_ldflags)
+        if self.options.get_safe("profiling"):
+            tc.extra_cflags.extend(self._profiling_cflags)
+        tc.extra_cflags.extend(self._reproducible_cflags)
+        tc.extra_cflags.extend(self._wasm_cflags)
+        tc.extra_exelinkflags.extend(self._wasm_ldflags)
+        if self._phase_timing:
+            tc.extra_cflags.extend(self._time_trace_cflags)
+        linker_ldflags = self._linker_ldflags + self._link_timer_ldflags()
+        tc.extra_sharedlinkflags.extend(linker_ldflags)
+        tc.extra_exelinkflags.extend(linker_ldflags)
         tc.generate()
 
     def _patch_sources(self):
-        apply_conandata_patches(self)
+        self._apply_conandata_patches_once()
 
         is_apple_clang12 = self.settings.compiler == "apple-clang" and Version(self.settings.compiler.version) >= "12.0"
         if not is_apple_clang12:
             for filename in ['zconf.h', 'zconf.h.cmakein', 'zconf.h.in']:
                 filepath = os.path.join(self.source_folder, filename)
-                replace_in_file(self, filepath,
-                                      '#ifdef HAVE_UNISTD_H    '
-                                      '/* may be set to #if 1 by ./configure */',
-                                      '#if defined(HAVE_UNISTD_H) && (1-HAVE_UNISTD_H-1 != 0)')
-                replace_in_file(self, filepath,
-                                      '#ifdef HAVE_STDARG_H    '
-                                      '/* may be set to #if 1 by ./configure */',
-                                      '#if defined(HAVE_STDARG_H) && (1-HAVE_STDARG_H-1 != 0)')
+                self._replace_in_file_once(filepath,
+                                           '#ifdef HAVE_UNISTD_H    '
+                                           '/* may be set to #if 1 by ./configure */',
+                                           '#if defined(HAVE_UNISTD_H) && (1-HAVE_UNISTD_H-1 != 0)')
+                self._replace_in_file_once(filepath,
+                                           '#ifdef HAVE_STDARG_H    '
+                                           '/* may be set to #if 1 by ./configure */',
+                                           '#if defined(HAVE_STDARG_H) && (1-HAVE_STDARG_H-1 != 0)')
 
     def build(self):
-        self._patch_sources()
+        with self._build_phase("patch"):
+            self._patch_sources()
         cmake = CMake(self)
-        cmake.configure()
-        cmake.build()
+        with self._build_phase("configure"):
+            cmake.configure()
+        with self._build_phase("build"):
+            cmake.build()
+        if self._phase_timing and self._time_trace_cflags:
+            self._save_time_trace()
+        if self._phase_timing and self._linker:
+            self._save_link_times()
 
     def _extract_license(self):
         tmp = load(self, os.path.join(self.source_folder, "zlib.h"))
@@ -94,7 +148,13 @@ class ZlibConan(ConanFile):
     def package(self):
         save(self, os.path.join(self.package_folder, "licenses", "LICENSE"), self._extract_license())
         cmake = CMake(self)
-        cmake.install()
+        with self._build_phase("install"):
+            cmake.install()
+        self._normalize_archives()
+        if self.options.get_safe("debug_symbols"):
+            with self._build_phase("split_debug_symbols"):
+                self._split_debug_symbols()
+        self._report_build_phases()
 
     def package_info(self):
         self.cpp_info.set_property("cmake_find_mode", "both")
@@ -106,6 +166,13 @@ class ZlibConan(ConanFile):
         else:
             libname = "z"
         self.cpp_info.libs = [libname]
+        if self.options.section_gc:
+            self.cpp_info.exelinkflags.extend(self._section_gc_ldflags)
+            self.cpp_info.sharedlinkflags.extend(self._section_gc_ldflags)
+        if self.options.get_safe("wasm_threads"):
+            self.cpp_info.cflags.append("-pthread")
+            self.cpp_info.cxxflags.append("-pthread")
+            self.cpp_info.exelinkflags.extend(self._wasm_ldflags)
 
         self.cpp_info.names["cmake_find_package"] = "ZLIB"
         self.cpp_info.names["cmake_find_package_multi"] = "ZLIB"